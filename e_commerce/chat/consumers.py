@@ -1,38 +1,169 @@
+import asyncio
 import json
+import logging
 
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from django_redis import get_redis_connection
 
 from .bot import process_message
+from .throttling import ConcurrencyLimit, RejectedFrames, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+ROOM_MEMBERS_TIMEOUT = 24 * 60 * 60
+
+REJECTION_MESSAGES = {
+    "invalid": "Не удалось прочитать сообщение",
+    "rate_limited": "Слишком много сообщений, подождите немного",
+    "coalesced": "Отвечу только на последнее сообщение",
+    "busy": "Сейчас слишком много вопросов, попробуйте позже",
+}
+
+bot_limit = ConcurrencyLimit(settings.CHAT_BOT_CONCURRENCY)
+rejected_frames = RejectedFrames()
+
+
+def room_members_key(room_name: str) -> str:
+    """This function returns a Redis key of a number of sockets connected
+    to a chat room.
+
+    :param room_name: a name of a chat room
+    :type room_name: str
+    """
+    return f"chat:room:{room_name}:members"
+
+
+@sync_to_async(thread_sensitive=False)
+def change_room_members(room_name: str, delta: int) -> int:
+    """This function changes a number of sockets connected to a chat room
+    and returns the new number.
+
+    :param room_name: a name of a chat room
+    :type room_name: str
+    :param delta: number of joined (or left, if negative) sockets
+    :type delta: int
+    """
+    key = room_members_key(room_name)
+    pipe = get_redis_connection("default").pipeline()
+    pipe.incrby(key, delta)
+    pipe.expire(key, ROOM_MEMBERS_TIMEOUT)
+    members, _ = pipe.execute()
+    return members
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
+    """This class serves chat rooms with the bot. When 'CHAT_DIRECT_REPLY'
+    setting is on, messages of a room with a single socket are sent straight
+    to the socket, the channel layer group is used only by rooms with several
+    sockets.
+
+    Every connection may send 'CHAT_MESSAGES_BURST' messages at once and
+    'CHAT_MESSAGES_RATE' messages a second after that. The bot answers one
+    message of a connection at a time, messages sent while it is busy are
+    coalesced into the latest one, and no more than 'CHAT_BOT_CONCURRENCY'
+    answers of a process are prepared at once. Rejected messages are
+    answered with an error frame and counted.
+    """
+
     async def connect(self):
         self.room_name = self.scope["url_route"]["kwargs"]["room_name"]
         self.room_group_name = "chat_%s" % self.room_name
+        self.members = None
+        self.bucket = TokenBucket(
+            settings.CHAT_MESSAGES_RATE, settings.CHAT_MESSAGES_BURST
+        )
+        self.pending = None
+        self.replying = None
 
         # Join room group
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
 
+        if settings.CHAT_DIRECT_REPLY:
+            self.members = await change_room_members(self.room_name, 1)
+            if self.members > 1:
+                await self.channel_layer.group_send(
+                    self.room_group_name,
+                    {"type": "room_members", "members": self.members},
+                )
+
         await self.accept()
 
     async def disconnect(self, close_code):
+        if self.replying is not None:
+            self.replying.cancel()
+
         # Leave room group
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 
+        if self.members is not None:
+            members = await change_room_members(self.room_name, -1)
+            if members > 0:
+                await self.channel_layer.group_send(
+                    self.room_group_name, {"type": "room_members", "members": members}
+                )
+
+    @property
+    def is_private(self) -> bool:
+        """This property shows whether this socket is the only one in a room."""
+        return self.members == 1
+
+    async def broadcast(self, message: str):
+        """This method sends a message to every socket of a room."""
+        if self.is_private:
+            await self.chat_message({"message": message})
+        else:
+            await self.channel_layer.group_send(
+                self.room_group_name, {"type": "chat_message", "message": message}
+            )
+
+    async def reject(self, reason: str):
+        """This method answers a rejected message with an error frame."""
+        rejected_frames.add(reason)
+        await self.send(
+            text_data=json.dumps(
+                {"error": reason, "message": f"Бот: {REJECTION_MESSAGES[reason]}"}
+            )
+        )
+
     # Receive message from WebSocket
     async def receive(self, text_data):
-        text_data_json = json.loads(text_data)
-        message = text_data_json["message"]
+        try:
+            message = json.loads(text_data)["message"]
+        except (ValueError, TypeError, KeyError):
+            await self.reject("invalid")
+            return
+        if not isinstance(message, str):
+            await self.reject("invalid")
+            return
+        if not self.bucket.consume():
+            await self.reject("rate_limited")
+            return
 
-        # Send message to room group
-        await self.channel_layer.group_send(
-            self.room_group_name, {"type": "chat_message", "message": f"Вы: {message}"}
-        )
+        await self.broadcast(f"Вы: {message}")
 
-        reply = await process_message(message)
-        await self.channel_layer.group_send(
-            self.room_group_name, {"type": "chat_message", "message": f"Бот: {reply}"}
-        )
+        if self.pending is not None:
+            await self.reject("coalesced")
+        self.pending = message
+        if self.replying is None or self.replying.done():
+            self.replying = asyncio.ensure_future(self.reply())
+
+    async def reply(self):
+        """This method answers pending messages one by one."""
+        while self.pending is not None:
+            message, self.pending = self.pending, None
+            if not await bot_limit.acquire(settings.CHAT_BOT_TIMEOUT):
+                await self.reject("busy")
+                continue
+            try:
+                reply = await process_message(message)
+            except Exception:
+                logger.exception("Chat bot failed to answer %r", message)
+                continue
+            finally:
+                bot_limit.release()
+            await self.broadcast(f"Бот: {reply}")
 
     # Receive message from room group
     async def chat_message(self, event):
@@ -40,3 +171,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         # Send message to WebSocket
         await self.send(text_data=json.dumps({"message": message}))
+
+    # Receive a number of room sockets from room group
+    async def room_members(self, event):
+        self.members = event["members"]
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from typing import List, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from chat.routing import websocket_urlpatterns
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+}
+
+
+def percentile(values: List[float], share: float) -> float:
+    """This function returns a value below which a given share of sorted
+    values lies.
+    """
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+class Command(BaseCommand):
+    """This is a class for 'benchchat' management command which measures
+    the chat throughput with many concurrent sockets over the in-memory
+    channel layer, with and without direct replies.
+    """
+
+    help = "Benchmarks chat rooms with many concurrent websocket clients."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=200)
+        parser.add_argument("--messages", type=int, default=20)
+        parser.add_argument("--message", default="Привет")
+
+    async def client(
+        self, application, room: str, options: dict, latencies: List[float]
+    ):
+        """This method connects to a room, sends messages one by one and
+        records the time until the bot reply arrives.
+        """
+        communicator = WebsocketCommunicator(application, f"/ws/chat/{room}/")
+        connected, _ = await communicator.connect()
+        assert connected, f"Room {room} refused connection"
+        for _ in range(options["messages"]):
+            started = time.perf_counter()
+            await communicator.send_json_to({"message": options["message"]})
+            await communicator.receive_json_from()
+            await communicator.receive_json_from()
+            latencies.append(time.perf_counter() - started)
+        await communicator.disconnect()
+
+    async def run(self, options: dict) -> Tuple[float, List[float]]:
+        """This method runs all clients concurrently, every client gets
+        its own room.
+        """
+        application = URLRouter(websocket_urlpatterns)
+        base = time.time_ns()
+        latencies = []
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                self.client(application, str(base + number), options, latencies)
+                for number in range(options["clients"])
+            )
+        )
+        return time.perf_counter() - started, sorted(latencies)
+
+    def handle(self, *args, **options):
+        """The actual logic of the command."""
+        self.stdout.write(
+            f"{options['clients']} clients x {options['messages']} messages"
+        )
+        self.stdout.write(f"{'mode':<8}{'msg/s':>10}{'p50, ms':>10}{'p99, ms':>10}")
+        for mode, direct in (("group", False), ("direct", True)):
+            with override_settings(
+                CHAT_DIRECT_REPLY=direct,
+                CHAT_MESSAGES_BURST=options["messages"],
+                CHAT_MESSAGES_RATE=options["messages"],
+                CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS,
+            ):
+                duration, latencies = async_to_sync(self.run)(options)
+            self.stdout.write(
+                f"{mode:<8}{len(latencies) / duration:>10.0f}"
+                f"{percentile(latencies, 0.5) * 1000:>10.2f}"
+                f"{percentile(latencies, 0.99) * 1000:>10.2f}"
+            )
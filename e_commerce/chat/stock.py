@@ -0,0 +1,130 @@
+import asyncio
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Tuple
+
+from channels.db import database_sync_to_async
+from django.apps import apps
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+STOCK_CACHE_TIMEOUT = 10
+STOCK_CACHE_SIZE = 10000
+STOCK_LOOKUP_LIMIT = 10
+
+
+class StockItem(NamedTuple):
+    """This class describes a stock of one good found by the chat bot."""
+
+    name: str
+    in_stock: int
+
+
+@lru_cache(maxsize=None)
+def trigram_available() -> bool:
+    """This function checks whether the 'pg_trgm' extension is installed,
+    the result is computed once per process.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def find_in_stock(name: str, limit: int = STOCK_LOOKUP_LIMIT) -> List[StockItem]:
+    """This function finds goods by a name typed into the chat. A case
+    insensitive exact match is tried first, then a name prefix and then
+    similar names. Exact and prefix matches use the 'UPPER(name)' index,
+    similar names use the trigram index.
+
+    :param name: a name of a good
+    :type name: str
+    :param limit: max number of found goods
+    :type limit: int
+    """
+    goods = apps.get_model("main.Goods").catalog.all()
+    for lookup in ("name__iexact", "name__istartswith"):
+        found = goods.filter(**{lookup: name}).order_by("name", "id")
+        found = found.values_list("name", "in_stock")[:limit]
+        if found:
+            return [StockItem(*row) for row in found]
+    if not trigram_available():
+        return []
+    found = (
+        goods.filter(name__trigram_similar=name)
+        .annotate(similarity=TrigramSimilarity("name", name))
+        .order_by("-similarity", "name", "id")
+        .values_list("name", "in_stock")[:limit]
+    )
+    return [StockItem(*row) for row in found]
+
+
+class StockLookup:
+    """This class serves stock lookups of the chat bot. Found goods are kept
+    in memory for a few seconds, concurrent lookups of the same name share
+    one DB query which runs outside of the ASGI event loop thread.
+
+    Saves of goods made by this process clear the memory at once, saves made
+    by other processes are picked up after 'timeout' seconds.
+
+    timeout - number of seconds lookup results are kept for
+    size - max number of kept lookup results
+    """
+
+    def __init__(
+        self, timeout: float = STOCK_CACHE_TIMEOUT, size: int = STOCK_CACHE_SIZE
+    ) -> None:
+        self.timeout = timeout
+        self.size = size
+        self._results: Dict[str, Tuple[float, List[StockItem]]] = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._generation = 0
+
+    async def find(self, name: str) -> List[StockItem]:
+        """This method returns goods found by a given name.
+
+        :param name: a name of a good
+        :type name: str
+        """
+        key = " ".join(name.split()).lower()
+        if not key:
+            return []
+        cached = self._results.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._results.move_to_end(key)
+            return cached[1]
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load(key))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def _load(self, key: str) -> List[StockItem]:
+        generation = self._generation
+        query = database_sync_to_async(find_in_stock, thread_sensitive=False)
+        items = await query(key)
+        if generation == self._generation:
+            self._results[key] = (time.monotonic() + self.timeout, items)
+            self._results.move_to_end(key)
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+        return items
+
+    def clear(self) -> None:
+        """This method forgets all found goods, results of queries which are
+        running at the moment aren't kept either.
+        """
+        self._generation += 1
+        self._results.clear()
+
+
+stock_lookup = StockLookup()
+
+
+@receiver([post_save, post_delete], sender="main.Goods")
+def invalidate_stock_lookup(sender, **kwargs):
+    stock_lookup.clear()
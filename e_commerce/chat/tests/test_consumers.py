@@ -0,0 +1,98 @@
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from chat.routing import websocket_urlpatterns
+from django.test import SimpleTestCase, override_settings
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+)
+class ChatConsumerTestCase(SimpleTestCase):
+    """This class serves for testing delivery of chat room messages."""
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        self.application = URLRouter(websocket_urlpatterns)
+        self.path = f"/ws/chat/{time.time_ns()}/"
+
+    async def talk(self, communicators, message="Привет"):
+        """This method sends a message from the first socket and returns
+        messages received by every socket.
+        """
+        await communicators[0].send_json_to({"message": message})
+        received = []
+        for communicator in communicators:
+            received.append(
+                [
+                    (await communicator.receive_json_from())["message"],
+                    (await communicator.receive_json_from())["message"],
+                ]
+            )
+        return received
+
+    def test_private_room_replies_directly(self):
+        """This method testing that a room with one socket doesn't use
+        the channel layer group.
+        """
+
+        async def chat():
+            communicator = WebsocketCommunicator(self.application, self.path)
+            await communicator.connect()
+            received = await self.talk([communicator])
+            await communicator.disconnect()
+            return received
+
+        with mock.patch.object(InMemoryChannelLayer, "group_send") as group_send:
+            received = async_to_sync(chat)()
+        group_send.assert_not_called()
+        self.assertEqual(
+            received, [["Вы: Привет", "Бот: К сожалению, я не понял ваш запрос"]]
+        )
+
+    def test_shared_room_uses_group(self):
+        """This method testing that every socket of a shared room receives
+        messages, and a socket left alone switches back to direct replies.
+        """
+
+        async def chat():
+            first = WebsocketCommunicator(self.application, self.path)
+            second = WebsocketCommunicator(self.application, self.path)
+            await first.connect()
+            await second.connect()
+            # Let the first socket learn the room is shared
+            await first.receive_nothing()
+            shared = await self.talk([first, second])
+            await second.disconnect()
+            await first.receive_nothing()
+            with mock.patch.object(InMemoryChannelLayer, "group_send") as group_send:
+                alone = await self.talk([first])
+            await first.disconnect()
+            return shared, alone, group_send.called
+
+        shared, alone, group_used = async_to_sync(chat)()
+        expected = ["Вы: Привет", "Бот: К сожалению, я не понял ваш запрос"]
+        self.assertEqual(shared, [expected, expected])
+        self.assertEqual(alone, [expected])
+        self.assertFalse(group_used)
+
+    @override_settings(CHAT_DIRECT_REPLY=False)
+    def test_direct_reply_disabled(self):
+        """This method testing that all messages go through the group when
+        direct replies are switched off.
+        """
+
+        async def chat():
+            communicator = WebsocketCommunicator(self.application, self.path)
+            await communicator.connect()
+            with mock.patch.object(InMemoryChannelLayer, "group_send") as group_send:
+                await communicator.send_json_to({"message": "Привет"})
+                await communicator.receive_nothing()
+            await communicator.disconnect()
+            return group_send.call_count
+
+        self.assertEqual(async_to_sync(chat)(), 2)
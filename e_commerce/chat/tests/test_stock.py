@@ -0,0 +1,87 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from chat import stock
+from chat.bot import process_message
+from chat.stock import StockItem, StockLookup, find_in_stock, trigram_available
+from django.test import TransactionTestCase
+from django.utils.timezone import now
+from main.models import Category, Goods, Seller
+
+
+class StockLookupTestCase(TransactionTestCase):
+    """This class serves for testing stock lookups of the chat bot. Lookups
+    run in worker threads with their own DB connections, so test data has to
+    be committed.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        seller = Seller.objects.create(
+            name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+        )
+        category = Category.objects.create(name="Tools")
+        for name, in_stock in (("Hammer", 3), ("Hammer XL", 0), ("Sledgehammer", 1)):
+            Goods.objects.create(
+                name=name,
+                description="Iron hammer. Keep your fingers safe",
+                seller=seller,
+                category=category,
+                manufacturer="Noname",
+                in_stock=in_stock,
+                creation_date=now(),
+            )
+        stock.stock_lookup.clear()
+
+    def test_exact_match_goes_first(self):
+        """This method testing that a case insensitive exact match hides
+        prefix matches and a prefix is used when nothing matches exactly.
+        """
+        self.assertEqual(find_in_stock("hAMMER"), [StockItem("Hammer", 3)])
+        self.assertEqual(
+            find_in_stock("hamm"), [StockItem("Hammer", 3), StockItem("Hammer XL", 0)]
+        )
+        self.assertEqual(find_in_stock("Screwdriver"), [])
+
+    def test_similar_names(self):
+        """This method testing that misspelled names find similar goods."""
+        if not trigram_available():
+            self.skipTest("pg_trgm extension is not installed")
+        self.assertIn(StockItem("Sledgehammer", 1), find_in_stock("Sledgehamer"))
+
+    def test_results_are_kept_until_goods_saved(self):
+        """This method testing that found goods are served from memory and
+        forgotten when a good is saved.
+        """
+        lookup = async_to_sync(stock.stock_lookup.find)
+        self.assertEqual(lookup("Hammer"), [StockItem("Hammer", 3)])
+
+        Goods.objects.filter(name="Hammer").update(in_stock=2)
+        self.assertEqual(lookup("hammer"), [StockItem("Hammer", 3)])
+
+        goods = Goods.objects.get(name="Hammer")
+        goods.in_stock = 1
+        goods.save()
+        self.assertEqual(lookup("Hammer"), [StockItem("Hammer", 1)])
+
+    def test_concurrent_lookups_share_query(self):
+        """This method testing that concurrent lookups of one name run a
+        single DB query.
+        """
+        lookup = StockLookup()
+
+        async def chat():
+            return await asyncio.gather(*(lookup.find("Hammer") for _ in range(50)))
+
+        with mock.patch.object(stock, "find_in_stock", wraps=find_in_stock) as query:
+            results = async_to_sync(chat)()
+        self.assertEqual(query.call_count, 1)
+        self.assertEqual(results, [[StockItem("Hammer", 3)]] * 50)
+
+    def test_bot_reply(self):
+        """This method testing the bot reply to a stock request."""
+        reply = async_to_sync(process_message)("Наличие #Hammer")
+        self.assertEqual(reply, "Вот что удалось найти:\nHammer. На складе осталось: 3")
+        reply = async_to_sync(process_message)("Наличие #Screwdriver")
+        self.assertEqual(reply, "Ничего не найдено")
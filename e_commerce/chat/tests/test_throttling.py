@@ -0,0 +1,159 @@
+import asyncio
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from chat import consumers
+from chat.routing import websocket_urlpatterns
+from chat.throttling import (REJECTED_FRAMES_KEY, ConcurrencyLimit,
+                             RejectedFrames, TokenBucket, get_rejected_frames)
+from django.test import SimpleTestCase, override_settings
+from django_redis import get_redis_connection
+
+
+class TokenBucketTestCase(SimpleTestCase):
+    """This class serves for testing the chat messages rate limit."""
+
+    def test_burst_and_refill(self):
+        """This method testing that a bucket lets a burst through and then
+        refills at a given rate.
+        """
+        now = [0.0]
+        bucket = TokenBucket(rate=2, capacity=3, clock=lambda: now[0])
+
+        self.assertEqual([bucket.consume() for _ in range(4)], [True] * 3 + [False])
+        now[0] += 0.5
+        self.assertEqual([bucket.consume() for _ in range(2)], [True, False])
+        now[0] += 60
+        self.assertEqual([bucket.consume() for _ in range(4)], [True] * 3 + [False])
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    CHAT_MESSAGES_BURST=3,
+    CHAT_MESSAGES_RATE=0.01,
+)
+class ChatBackpressureTestCase(SimpleTestCase):
+    """This class serves for testing rejection of chat messages."""
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        self.path = f"/ws/chat/{time.time_ns()}/"
+        get_redis_connection("default").delete(REJECTED_FRAMES_KEY)
+
+    def chat(self, scenario):
+        """This method runs a scenario with a connected socket."""
+
+        async def run():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), self.path
+            )
+            await communicator.connect()
+            try:
+                return await scenario(communicator)
+            finally:
+                await communicator.disconnect()
+
+        return async_to_sync(run)()
+
+    def test_rate_limited(self):
+        """This method testing that messages beyond a burst are rejected
+        with an error frame.
+        """
+
+        async def scenario(communicator):
+            for number in range(4):
+                await communicator.send_json_to({"message": str(number)})
+            received = []
+            while not await communicator.receive_nothing():
+                received.append(await communicator.receive_json_from())
+            return received
+
+        received = self.chat(scenario)
+        errors = [frame["error"] for frame in received if "error" in frame]
+        self.assertEqual(errors.count("rate_limited"), 1)
+        self.assertNotIn({"message": "Вы: 3"}, received)
+
+    def test_invalid_frame(self):
+        """This method testing that an unreadable frame gets an error frame."""
+
+        async def scenario(communicator):
+            await communicator.send_to(text_data="not json")
+            return await communicator.receive_json_from()
+
+        self.assertEqual(self.chat(scenario)["error"], "invalid")
+
+    def test_waiting_messages_are_coalesced(self):
+        """This method testing that the bot answers only the latest of
+        messages sent while it was busy.
+        """
+        answered, release = [], {}
+
+        async def process_message(message):
+            answered.append(message)
+            await release["event"].wait()
+            return message
+
+        async def scenario(communicator):
+            release["event"] = asyncio.Event()
+            for number in range(3):
+                await communicator.send_json_to({"message": str(number)})
+            await communicator.receive_nothing()
+            release["event"].set()
+            received = []
+            while not await communicator.receive_nothing():
+                received.append(await communicator.receive_json_from())
+            return received
+
+        with mock.patch.object(consumers, "process_message", process_message):
+            received = self.chat(scenario)
+        self.assertEqual(answered, ["0", "2"])
+        self.assertEqual(
+            [frame.get("error", frame["message"]) for frame in received],
+            ["Вы: 0", "Вы: 1", "Вы: 2", "coalesced", "Бот: 0", "Бот: 2"],
+        )
+
+    @override_settings(CHAT_BOT_TIMEOUT=0.01)
+    def test_busy_bot(self):
+        """This method testing that a message which can't get a bot slot in
+        time is rejected and counted.
+        """
+
+        async def scenario(communicator):
+            await communicator.send_json_to({"message": "Привет"})
+            await communicator.receive_json_from()
+            frame = await communicator.receive_json_from()
+            await consumers.rejected_frames.flush()
+            return frame
+
+        with mock.patch.object(consumers, "bot_limit", ConcurrencyLimit(0)):
+            frame = self.chat(scenario)
+        self.assertEqual(frame["error"], "busy")
+        self.assertEqual(get_rejected_frames().get("busy"), 1)
+
+
+class RejectedFramesTestCase(SimpleTestCase):
+    """This class serves for testing counters of rejected chat frames."""
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        get_redis_connection("default").delete(REJECTED_FRAMES_KEY)
+
+    def test_counts_are_saved_once(self):
+        """This method testing that rejected frames are saved by one delayed
+        flush.
+        """
+        frames = RejectedFrames(interval=0.05)
+
+        async def flood():
+            for _ in range(100):
+                frames.add("rate_limited")
+            frames.add("invalid")
+            await asyncio.sleep(0.2)
+
+        with mock.patch("chat.throttling.save_rejected_frames") as save:
+            async_to_sync(flood)()
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(save.call_args[0][0], {"rate_limited": 100, "invalid": 1})
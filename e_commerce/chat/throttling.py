@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Callable, Dict
+from weakref import WeakKeyDictionary
+
+from asgiref.sync import sync_to_async
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+REJECTED_FRAMES_KEY = "chat:rejected_frames"
+REJECTED_FRAMES_FLUSH_INTERVAL = 1
+
+
+class TokenBucket:
+    """This class limits a rate of chat messages of one connection. A bucket
+    holds up to 'capacity' tokens and gets 'rate' tokens a second, every
+    message takes a token.
+
+    rate - number of tokens added a second
+    capacity - max number of tokens, i.e. a burst of messages
+    clock - a function returning current time in seconds
+    """
+
+    def __init__(
+        self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def consume(self, tokens: int = 1) -> bool:
+        """This method takes tokens from a bucket if there are enough of them.
+
+        :param tokens: number of tokens to take
+        :type tokens: int
+        :return: whether tokens were taken
+        :rtype: bool
+        """
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+
+class ConcurrencyLimit:
+    """This class bounds a number of coroutines of a process running a block
+    at once. A semaphore is made for every event loop because a semaphore
+    is bound to a loop it was created in.
+
+    limit - max number of coroutines running a block at once
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._semaphores = WeakKeyDictionary()
+
+    def semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_event_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return self._semaphores[loop]
+
+    async def acquire(self, timeout: float) -> bool:
+        """This method waits for a free slot for at most 'timeout' seconds.
+
+        :return: whether a slot was taken
+        :rtype: bool
+        """
+        try:
+            await asyncio.wait_for(self.semaphore().acquire(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def release(self) -> None:
+        self.semaphore().release()
+
+
+class RejectedFrames:
+    """This class counts chat frames rejected by the consumer. Counts are
+    kept in memory and added to a Redis hash at most once in 'interval'
+    seconds, so a flood of rejected frames costs a single Redis round trip.
+
+    interval - number of seconds counts are kept in memory for
+    """
+
+    def __init__(self, interval: float = REJECTED_FRAMES_FLUSH_INTERVAL) -> None:
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._flushing = None
+
+    def add(self, reason: str) -> None:
+        """This method counts one rejected frame and schedules a flush of
+        counts unless one is already scheduled.
+
+        :param reason: why a frame was rejected
+        :type reason: str
+        """
+        self.counts[reason] += 1
+        flushing = self._flushing
+        if flushing is None or flushing.done() or flushing.get_loop().is_closed():
+            self._flushing = asyncio.ensure_future(self.flush(self.interval))
+
+    async def flush(self, delay: float = 0) -> None:
+        """This method adds counted frames to the Redis hash.
+
+        :param delay: number of seconds to wait before a flush
+        :type delay: float
+        """
+        await asyncio.sleep(delay)
+        counts, self.counts = self.counts, Counter()
+        try:
+            if counts:
+                save = sync_to_async(save_rejected_frames, thread_sensitive=False)
+                await save(counts)
+        except Exception:
+            logger.exception("Rejected chat frames couldn't be saved")
+            self.counts.update(counts)
+
+
+def save_rejected_frames(counts: Dict[str, int]) -> None:
+    pipe = get_redis_connection("default").pipeline()
+    for reason, count in counts.items():
+        pipe.hincrby(REJECTED_FRAMES_KEY, reason, count)
+    pipe.execute()
+
+
+def get_rejected_frames() -> Dict[str, int]:
+    """This function returns numbers of rejected chat frames by a reason."""
+    counts = get_redis_connection("default").hgetall(REJECTED_FRAMES_KEY)
+    return {reason.decode(): int(count) for reason, count in counts.items()}
@@ -2,6 +2,7 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
+from kombu import Exchange, Queue
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "e_commerce.settings")
 
@@ -11,6 +12,40 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 app.autodiscover_tasks()
 
+# Tasks a user waits for, mass mailings and periodic housekeeping run on
+# separate queues served by separate workers, so a digest blast can't delay
+# an SMS code. Redis handles 0 as the highest priority within a queue.
+app.conf.task_queues = tuple(
+    Queue(name, Exchange(name), routing_key=name)
+    for name in ("interactive", "bulk", "maintenance")
+)
+app.conf.task_default_queue = "bulk"
+app.conf.broker_transport_options = {
+    "priority_steps": list(range(10)),
+    "queue_order_strategy": "priority",
+}
+app.conf.task_routes = {
+    "main.tasks.send_sms_verification_code": {"queue": "interactive", "priority": 0},
+    "main.tasks.send_welcome_email_task": {"queue": "interactive", "priority": 3},
+    "main.tasks.notify_new_goods_subscribers_task": {"queue": "bulk", "priority": 4},
+    "main.tasks.send_new_goods_subscribers_notification_task": {
+        "queue": "bulk",
+        "priority": 6,
+    },
+    "main.tasks.send_weekly_new_goods_email_task": {"queue": "bulk", "priority": 4},
+    "main.tasks.send_new_goods_digest_task": {"queue": "bulk", "priority": 4},
+    "main.tasks.send_new_goods_digest_chunk_task": {"queue": "bulk", "priority": 6},
+    "main.tasks.generate_thumbnails_task": {"queue": "bulk", "priority": 2},
+    "main.tasks.bulk_update_goods_task": {"queue": "bulk", "priority": 3},
+    "main.tasks.save_views_counter_cached_values_task": {
+        "queue": "maintenance",
+        "priority": 0,
+    },
+    "main.tasks.refresh_goods_short_task": {"queue": "maintenance", "priority": 1},
+    "main.tasks.refresh_popular_tags_task": {"queue": "maintenance", "priority": 5},
+    "main.tasks.create_new_tags_task": {"queue": "maintenance", "priority": 5},
+}
+
 app.conf.beat_schedule = {
     "send_weekly_new_goods_email_task": {
         "task": "main.tasks.send_weekly_new_goods_email_task",
@@ -20,4 +55,8 @@ app.conf.beat_schedule = {
         "task": "main.tasks.save_views_counter_cached_values_task",
         "schedule": crontab(minute="*/1"),
     },
+    "refresh_popular_tags_task": {
+        "task": "main.tasks.refresh_popular_tags_task",
+        "schedule": crontab(minute="*/15"),
+    },
 }
@@ -27,6 +27,8 @@ SECRET_KEY = secrets["django"]["secret_key"]
 TWILIO_ACCOUNT_SID = secrets["twilio"]["account_sid"]
 TWILIO_AUTH_TOCKEN = secrets["twilio"]["auth_token"]
 TWILIO_PHONE_NUMBER = secrets["twilio"]["from_number"]
+# "main.sms.LocMemBackend" keeps SMS in memory instead of sending them
+SMS_BACKEND = "main.sms.TwilioBackend"
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -45,7 +47,8 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "django.contrib.sites",
     "django.contrib.flatpages",
-    "main",
+    "django.contrib.postgres",
+    "main.apps.MainConfig",
     "ckeditor",
     "sorl.thumbnail",
     "allauth",
@@ -59,6 +62,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "main.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -70,9 +74,11 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "e_commerce.urls"
 
+# The templates backend is always installed, it measures render time only
+# of requests measured when METRICS_ENABLED is on and does nothing otherwise
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "main.metrics.InstrumentedDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -81,6 +87,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "main.context_processors.avatar",
             ],
         },
     },
@@ -154,10 +161,12 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 DEFAULT_FROM_EMAIL = "no-reply@bomzhon.com"
 
 # redis-cache
+# The cache backend is always installed, it counts hits and misses only of
+# requests measured when METRICS_ENABLED is on and does nothing otherwise
 
 CACHES = {
     "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
+        "BACKEND": "main.metrics.InstrumentedRedisCache",
         "LOCATION": "redis://redis:6379/1",
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
@@ -165,6 +174,11 @@ CACHES = {
     }
 }
 
+# Measure views and aggregate their timings by URL names, aggregates of
+# a process are saved to Redis at most once in a given number of seconds
+METRICS_ENABLED = False
+METRICS_FLUSH_INTERVAL = 5
+
 CACHE_MIDDLEWARE_ALIAS = "default"
 CACHE_MIDDLEWARE_SECONDS = "600"
 CACHE_MIDDLEWARE_KEY_PREFIX = ""
@@ -206,6 +220,9 @@ CELERY_BROKER_URL = "redis://redis:6379"
 CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+# A worker reserves only as many tasks as it runs, so queued tasks aren't
+# held behind a long task of a busy process
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 
 # Channels configuration
 ASGI_APPLICATION = "e_commerce.routing.application"
@@ -218,3 +235,16 @@ CHANNEL_LAYERS = {
         },
     },
 }
+
+# Reply straight to a socket which is alone in its chat room instead of
+# passing messages through the channel layer group
+CHAT_DIRECT_REPLY = True
+
+# Chat messages a socket may send at once and a second after that
+CHAT_MESSAGES_BURST = 5
+CHAT_MESSAGES_RATE = 1
+
+# Bot answers prepared by a process at once and seconds a message may wait
+# for its turn
+CHAT_BOT_CONCURRENCY = 20
+CHAT_BOT_TIMEOUT = 5
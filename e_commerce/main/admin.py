@@ -1,11 +1,15 @@
 from ckeditor.widgets import CKEditorWidget
 from django import forms
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.flatpages.admin import FlatPageAdmin
 from django.contrib.flatpages.models import FlatPage
+from django.db import transaction
 from django.utils.html import format_html
 
-from .models import Goods, Subscriptions, Tag
+from .bulk_updates import BULK_UPDATE_SYNC_LIMIT, start_bulk_update
+from .models import BulkUpdateJob, Goods, Subscriptions, Tag
+from .tasks import bulk_update_goods_task
 
 
 class FlatPageAdminForm(forms.ModelForm):
@@ -24,40 +28,108 @@ class SubscriptionsAdmin(admin.ModelAdmin):
     list_display = ("name",)
 
 
+BULK_UPDATE_SESSION_KEY = "main_bulk_updates"
+
+
+def update_goods(modeladmin, request, queryset, title, **changes):
+    """This function updates selected goods within a request if there are few
+    of them. Otherwise a background job updates them by chunks, so a request
+    doesn't lock all selected rows, and the admin shows its progress.
+    """
+    selected = queryset.order_by()[: BULK_UPDATE_SYNC_LIMIT + 1].count()
+    if selected <= BULK_UPDATE_SYNC_LIMIT:
+        queryset.update_versioned(**changes)
+        return
+    job = start_bulk_update(queryset, changes, title, request.user)
+    transaction.on_commit(lambda: bulk_update_goods_task.delay(job.pk))
+    request.session[BULK_UPDATE_SESSION_KEY] = request.session.get(
+        BULK_UPDATE_SESSION_KEY, []
+    ) + [job.pk]
+    modeladmin.message_user(
+        request, f"{title}: goods will be updated in background.", messages.INFO
+    )
+
+
 def make_published(modeladmin, request, queryset):
-    queryset.update(is_published=True)
+    update_goods(
+        modeladmin,
+        request,
+        queryset,
+        make_published.short_description,
+        is_published=True,
+    )
 
 
 make_published.short_description = "Public selected goods"
 
 
 def make_unpublished(modeladmin, request, queryset):
-    queryset.update(is_published=False)
+    update_goods(
+        modeladmin,
+        request,
+        queryset,
+        make_unpublished.short_description,
+        is_published=False,
+    )
 
 
 make_unpublished.short_description = "Hide selected goods"
 
 
 def make_archive(modeladmin, request, queryset):
-    queryset.update(is_archive=True)
+    update_goods(
+        modeladmin,
+        request,
+        queryset,
+        make_archive.short_description,
+        is_archive=True,
+    )
 
 
 make_archive.short_description = "Add selected goods to archive"
 
 
 def make_unarchive(modeladmin, request, queryset):
-    queryset.update(is_archive=False)
+    update_goods(
+        modeladmin,
+        request,
+        queryset,
+        make_unarchive.short_description,
+        is_archive=False,
+    )
 
 
 make_unarchive.short_description = "Remove selected goods from archive"
 
 
+def update_search_vector(modeladmin, request, queryset):
+    queryset.update_search_vector()
+
+
+update_search_vector.short_description = "Rebuild search index of selected goods"
+
+
+class GoodsChangeList(ChangeList):
+    """This class lists goods in the admin without reading their long
+    descriptions, a list shows short descriptions.
+    """
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).listing()
+
+
 class GoodsAdmin(admin.ModelAdmin):
-    actions = [make_published, make_unpublished, make_archive, make_unarchive]
+    actions = [
+        make_published,
+        make_unpublished,
+        make_archive,
+        make_unarchive,
+        update_search_vector,
+    ]
     list_display = (
         "id",
         "name",
-        "description",
+        "short_description",
         "seller",
         "weight",
         "category",
@@ -72,6 +144,7 @@ class GoodsAdmin(admin.ModelAdmin):
         "is_published",
         "is_archive",
     )
+    list_select_related = ("seller", "category")
     list_filter = ("tags", "creation_date", "category")
     readonly_fields = ("get_image", "creation_date")
     search_fields = ("name", "description")
@@ -80,10 +153,57 @@ class GoodsAdmin(admin.ModelAdmin):
     save_on_top = True
 
     def get_image(self, obj):
-        return format_html("<img src='{}' />".format(obj.image.url))
+        if not obj.image:
+            return "-"
+        thumbnail = obj.thumbnails.get("detail") or {}
+        return format_html("<img src='{}' />", thumbnail.get("url") or obj.image.url)
 
     get_image.short_description = "Изображение"
 
+    def get_changelist(self, request, **kwargs):
+        return GoodsChangeList
+
+    def changelist_view(self, request, extra_context=None):
+        self.report_bulk_updates(request)
+        return super().changelist_view(request, extra_context)
+
+    def report_bulk_updates(self, request):
+        """This method shows progress of background updates started by
+        a user and forgets finished and failed ones after showing them once.
+        """
+        job_ids = request.session.get(BULK_UPDATE_SESSION_KEY)
+        if not job_ids:
+            return
+        jobs = BulkUpdateJob.objects.defer("goods_ids").in_bulk(job_ids)
+        running = []
+        for job_id in job_ids:
+            job = jobs.get(job_id)
+            if job is None:
+                self.message_user(
+                    request, f"Background update #{job_id} was lost.", messages.ERROR
+                )
+            elif job.status == "F":
+                self.message_user(
+                    request,
+                    f"{job.title}: {job.done} goods were updated.",
+                    messages.SUCCESS,
+                )
+            elif job.status == "E":
+                self.message_user(
+                    request,
+                    f"{job.title}: failed after {job.done} of {job.total} goods "
+                    "were updated.",
+                    messages.ERROR,
+                )
+            else:
+                running.append(job_id)
+                self.message_user(
+                    request,
+                    f"{job.title}: {job.done} of {job.total} goods are updated.",
+                    messages.INFO,
+                )
+        request.session[BULK_UPDATE_SESSION_KEY] = running
+
 
 class TagAdmin(admin.ModelAdmin):
     list_display = ("name",)
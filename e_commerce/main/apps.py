@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class MainConfig(AppConfig):
     name = "main"
+
+    def ready(self):
+        """This method connects receivers of Celery signals measuring tasks."""
+        from . import task_metrics  # noqa: F401
@@ -0,0 +1,360 @@
+import json
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sites.models import Site
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django_redis import get_redis_connection
+
+from .caching import get_popular_tags
+from .models import Goods, GoodsShort
+from .pagination import KeysetPaginator
+from .views import GoodsList
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+DEEP_PAGE_OFFSET = 5000
+CHECKED_KEYS = ("queries_cold", "queries")
+# scenarios of views wrapped by 'cache_page', they keep a cache which was
+# configured when URLs were imported, so their first request may find a page
+# cached by the site and their cold numbers of queries aren't checked
+PAGE_CACHED_SCENARIOS = ("index",)
+# numbers of loaded goods: a catalog page and a long list like a feed export
+LISTING_SIZES = (GoodsList.paginate_by, 1000)
+# a Redis DB for caches of benchmark data, it's emptied after a benchmark
+BENCHMARK_REDIS_DB = 15
+
+
+class RedisDBNotEmpty(ValueError):
+    """This exception is raised when a Redis DB for benchmark caches has data
+    which would be removed after a benchmark.
+    """
+
+
+class Scenario(NamedTuple):
+    """This class describes a request measured by the benchmark.
+
+    name - a name of a scenario in results
+    method - 'get' or 'post'
+    url - a requested URL
+    data - query parameters or posted form data
+    login - whether a request is made by a logged in user
+    """
+
+    name: str
+    method: str
+    url: str
+    data: Optional[Dict[str, Any]] = None
+    login: bool = False
+
+
+def goods_form_data(goods: Goods, name: str) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "description": goods.description,
+        "category": goods.category_id or "",
+        "manufacturer": goods.manufacturer,
+        "tags": ",".join(goods.tags or []),
+        "price": goods.price,
+        "discount": goods.discount,
+    }
+
+
+def profile_form_data(user: User) -> Dict[str, Any]:
+    profile = user.profile
+    return {
+        "first_name": "Bench",
+        "last_name": "Mark",
+        "email": user.email,
+        "profile-TOTAL_FORMS": 1,
+        "profile-INITIAL_FORMS": 1,
+        "profile-MIN_NUM_FORMS": 0,
+        "profile-MAX_NUM_FORMS": 1,
+        "profile-0-id": profile.id,
+        "profile-0-user": user.id,
+        "profile-0-phone_number": "",
+    }
+
+
+def build_scenarios(user: User) -> List[Scenario]:
+    """This function makes measured requests for goods, tags and a user which
+    exist in DB.
+
+    :param user: a user with permissions to create and change goods
+    :type user: class 'django.contrib.auth.models.User'
+    """
+    goods = Goods.objects.order_by("id").first()
+    tags = [tag["name"] for tag in get_popular_tags()[:1]]
+    word = goods.name.split()[0]
+    paginator = KeysetPaginator(
+        GoodsShort.objects.all(), GoodsList.paginate_by, GoodsList.keyset_ordering
+    )
+    deep = GoodsShort.objects.order_by(*GoodsList.keyset_ordering)
+    deep = deep[DEEP_PAGE_OFFSET:].first() or deep.first() or goods
+    return [
+        Scenario("index", "get", reverse("index")),
+        Scenario("goods_list", "get", reverse("goods")),
+        Scenario("goods_list_tag", "get", reverse("goods"), {"tag": tags}),
+        Scenario("goods_list_search", "get", reverse("goods"), {"search": word}),
+        Scenario(
+            "goods_list_deep_page",
+            "get",
+            reverse("goods"),
+            {"after": paginator.encode_cursor(deep)},
+        ),
+        Scenario("goods_detail", "get", reverse("goods-detail", args=[goods.id])),
+        Scenario("profile", "get", reverse("profile", args=[user.id]), login=True),
+        Scenario(
+            "profile_update",
+            "post",
+            reverse("profile", args=[user.id]),
+            profile_form_data(user),
+            login=True,
+        ),
+        Scenario("goods_create", "get", reverse("goods-create"), login=True),
+        Scenario(
+            "goods_create_submit",
+            "post",
+            reverse("goods-create"),
+            goods_form_data(goods, "Benchmark good"),
+            login=True,
+        ),
+        Scenario(
+            "goods_edit", "get", reverse("goods-edit", args=[goods.id]), login=True
+        ),
+        Scenario(
+            "goods_edit_submit",
+            "post",
+            reverse("goods-edit", args=[goods.id]),
+            goods_form_data(goods, goods.name),
+            login=True,
+        ),
+    ]
+
+
+def run_commit_callbacks(start: int) -> None:
+    """This function runs callbacks registered by 'transaction.on_commit'
+    after a given number of them as if a transaction was committed. A
+    benchmark runs in a transaction which is rolled back, so tasks queued
+    by callbacks of a request would never be counted otherwise.
+    """
+    callbacks = connection.run_on_commit[start:]
+    del connection.run_on_commit[start:]
+    for _, callback in callbacks:
+        callback()
+
+
+def measure(client: Client, scenario: Scenario, repeat: int) -> Dict[str, Any]:
+    """This function makes a request once with empty caches and then
+    'repeat' more times.
+
+    :return: a status code, numbers of queries of the first and of the
+    slowest repeated request, number of queued tasks and latency percentiles
+    in milliseconds
+    :rtype: dict
+    """
+    request = getattr(client, scenario.method)
+
+    def timed():
+        committed = len(connection.run_on_commit)
+        with CaptureQueriesContext(connection) as queries, mock.patch(
+            "celery.app.task.Task.apply_async"
+        ) as apply_async:
+            started = time.perf_counter()
+            response = request(scenario.url, scenario.data or {})
+            run_commit_callbacks(committed)
+            elapsed = (time.perf_counter() - started) * 1000
+        return response, len(queries), apply_async.call_count, elapsed
+
+    response, queries_cold, tasks, _ = timed()
+    queries, latencies = 0, []
+    for _ in range(repeat):
+        _, count, _, elapsed = timed()
+        queries = max(queries, count)
+        latencies.append(elapsed)
+    return {
+        "status": response.status_code,
+        "queries_cold": queries_cold,
+        "queries": queries,
+        "tasks": tasks,
+        **latency_percentiles(latencies),
+    }
+
+
+def latency_percentiles(latencies: List[float]) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+    }
+
+
+def listing_querysets() -> Dict[str, QuerySet]:
+    """This function returns querysets of goods lists in the catalog order:
+    full rows of goods, the listing projection without long descriptions and
+    the 'GoodsShort' view read by the catalog.
+    """
+    return {
+        "full_rows": Goods.catalog.order_by(*GoodsList.keyset_ordering),
+        "listing": Goods.catalog.listing().order_by(*GoodsList.keyset_ordering),
+        "goods_short": GoodsList.queryset.order_by(*GoodsList.keyset_ordering),
+    }
+
+
+def measure_listing(repeat: int = 20) -> Dict[str, Dict[str, Any]]:
+    """This function loads lists of goods of 'LISTING_SIZES' with every
+    queryset of 'listing_querysets' and measures bytes of fetched values and
+    latency of making model objects.
+
+    :param repeat: number of times a list is loaded
+    :type repeat: int
+    :return: results by a queryset name and a list size
+    :rtype: dict
+    """
+    results = {}
+    for size in LISTING_SIZES:
+        for name, queryset in listing_querysets().items():
+            sql, params = queryset[:size].query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+            latencies = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset[:size])
+                latencies.append((time.perf_counter() - started) * 1000)
+            results[f"{name}_{size}"] = {
+                "rows": len(rows),
+                "bytes": sum(
+                    len(str(value).encode())
+                    for row in rows
+                    for value in row
+                    if value is not None
+                ),
+                **latency_percentiles(latencies),
+            }
+    return results
+
+
+def import_urls() -> None:
+    """This function imports URLs before caches are overridden. Views wrapped
+    by 'cache_page' keep a cache which was configured when URLs were
+    imported, so they stay bound to caches of the site and not to caches of
+    a benchmark which are emptied afterwards.
+    """
+    get_resolver().url_patterns
+
+
+def redis_location(location: str, db: int) -> str:
+    """This function returns a Redis URL which points to another DB."""
+    return urlsplit(location)._replace(path=f"/{db}").geturl()
+
+
+@contextmanager
+def isolated_redis(db: int = BENCHMARK_REDIS_DB) -> Iterator[None]:
+    """This function points caches to another Redis DB while benchmark data
+    is made and measured, and empties it afterwards. Rolling back a
+    transaction doesn't undo Redis writes, so popular tags, a catalog
+    version and views counters of benchmark goods would stay in caches of
+    a site otherwise. Pages of views wrapped by 'cache_page' don't depend on
+    benchmark data and stay in caches of the site.
+
+    :param db: a number of an empty Redis DB
+    :type db: int
+    :raises RedisDBNotEmpty: if a DB isn't empty
+    """
+    import_urls()
+    caches = {
+        alias: {**config, "LOCATION": redis_location(config["LOCATION"], db)}
+        for alias, config in settings.CACHES.items()
+    }
+    with override_settings(CACHES=caches):
+        redis = get_redis_connection("default")
+        if redis.dbsize():
+            raise RedisDBNotEmpty(f"Redis DB {db} isn't empty")
+        try:
+            yield
+        finally:
+            redis.flushdb()
+
+
+def run_benchmarks(user: User, repeat: int = 20) -> Dict[str, Dict[str, Any]]:
+    """This function measures every scenario. Cache keys get a new prefix,
+    so the first request of each scenario finds caches empty. The current
+    site is cached by a process once, it's loaded beforehand, so numbers of
+    queries don't depend on an order of scenarios.
+
+    :param user: a user with permissions to create and change goods
+    :type user: class 'django.contrib.auth.models.User'
+    :param repeat: number of requests of a scenario after the first one
+    :type repeat: int
+    """
+    import_urls()
+    Site.objects.get_current()
+    anonymous, logged_in = Client(), Client()
+    logged_in.force_login(user)
+    caches = {
+        alias: {**config, "KEY_PREFIX": f"bench-{uuid.uuid4().hex}"}
+        for alias, config in settings.CACHES.items()
+    }
+    results = {}
+    hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+    with override_settings(CACHES=caches, ALLOWED_HOSTS=hosts):
+        for scenario in build_scenarios(user):
+            client = logged_in if scenario.login else anonymous
+            results[scenario.name] = measure(client, scenario, repeat)
+    return results
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, Dict[str, int]]:
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def save_json(path: Path, data: Dict[str, Any]) -> None:
+    with open(path, "w") as output:
+        json.dump(data, output, indent=2, sort_keys=True)
+        output.write("\n")
+
+
+def checked_keys(name: str) -> List[str]:
+    """This function returns numbers of a scenario compared with a baseline."""
+    if name in PAGE_CACHED_SCENARIOS:
+        return [key for key in CHECKED_KEYS if key != "queries_cold"]
+    return list(CHECKED_KEYS)
+
+
+def make_baseline(results: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """This function keeps only checked numbers of benchmark results."""
+    return {
+        name: {key: result[key] for key in checked_keys(name)}
+        for name, result in results.items()
+    }
+
+
+def find_regressions(
+    results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, int]]
+) -> List[str]:
+    """This function compares numbers of queries with a baseline.
+
+    :return: descriptions of scenarios which run more queries than before
+    :rtype: List[str]
+    """
+    regressions = []
+    for name, result in results.items():
+        for key in checked_keys(name):
+            expected = baseline.get(name, {}).get(key)
+            if expected is not None and result[key] > expected:
+                regressions.append(f"{name}: {key} {result[key]} > {expected}")
+    return regressions
@@ -0,0 +1,91 @@
+from bisect import bisect_right
+from typing import Any, Dict
+
+from django.apps import apps
+from django.db import transaction
+
+# selections of up to this number of goods are updated within a request
+BULK_UPDATE_SYNC_LIMIT = 1000
+BULK_UPDATE_CHUNK_SIZE = 1000
+
+
+def start_bulk_update(
+    queryset: Any, changes: Dict[str, Any], title: str, user: Any = None
+) -> Any:
+    """This function stores a job which updates selected goods in background.
+    Ids of goods are stored, so a job updates goods which were selected even
+    if their values are changed by a job.
+
+    :param queryset: selected goods
+    :type queryset: class 'main.models.GoodsQuerySet'
+    :param changes: new values of fields
+    :type changes: Dict[str, Any]
+    :param title: a name of a job shown in the admin
+    :type title: str
+    :param user: a user who started a job
+    :type user: class 'django.contrib.auth.models.User'
+    :return: a created job
+    :rtype: class 'main.models.BulkUpdateJob'
+    """
+    goods_ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+    return apps.get_model("main.BulkUpdateJob").objects.create(
+        user=user,
+        title=title,
+        changes=changes,
+        goods_ids=goods_ids,
+        total=len(goods_ids),
+    )
+
+
+def run_bulk_update(job_id: int, chunk_size: int = BULK_UPDATE_CHUNK_SIZE) -> int:
+    """This function updates goods of a job by chunks of primary key ranges.
+    A chunk is updated in a transaction with a job's progress, so rows are
+    locked only while their chunk is updated and a restarted job continues
+    from a last updated chunk. A job is locked while a chunk is updated, so
+    a redelivered task never updates a chunk twice. Cached pages of goods are
+    made outdated once per chunk.
+
+    :param job_id: id of a job from 'start_bulk_update'
+    :type job_id: int
+    :param chunk_size: number of goods updated at once
+    :type chunk_size: int
+    :return: number of updated goods
+    :rtype: int
+    """
+    job_model = apps.get_model("main.BulkUpdateJob")
+    goods_model = apps.get_model("main.Goods")
+    job = job_model.objects.filter(pk=job_id).first()
+    if job is None or job.status in ("F", "E"):
+        return 0
+    goods_ids = job.goods_ids
+
+    updated = 0
+    try:
+        while True:
+            with transaction.atomic():
+                job = (
+                    job_model.objects.select_for_update()
+                    .defer("goods_ids")
+                    .get(pk=job_id)
+                )
+                if job.status in ("F", "E"):
+                    return updated
+                start = 0
+                if job.last_pk is not None:
+                    start = bisect_right(goods_ids, job.last_pk)
+                chunk = goods_ids[start : start + chunk_size]
+                if not chunk:
+                    job.status = "F"
+                    job.save(update_fields=["status"])
+                    return updated
+                rows = goods_model.objects.filter(
+                    pk__gte=chunk[0], pk__lte=chunk[-1], pk__in=chunk
+                ).update_versioned(**job.changes)
+                updated += rows
+                job.done += rows
+                job.last_pk = chunk[-1]
+                job.status = "R"
+                job.save(update_fields=["done", "last_pk", "status"])
+    except Exception:
+        job_model.objects.filter(pk=job_id).update(status="E")
+        raise
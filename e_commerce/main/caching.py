@@ -0,0 +1,100 @@
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Count, F, Func
+from django.http import QueryDict
+from django_redis import get_redis_connection
+
+POPULAR_TAGS_KEY = "main:popular_tags"
+POPULAR_TAGS_LIMIT = 20
+POPULAR_TAGS_TIMEOUT = 60 * 60
+CATALOG_VERSION_KEY = "main:catalog_version"
+CATALOG_PAGE_TIMEOUT = 60 * 10
+# query parameters of cached catalog pages, search results aren't cached
+CATALOG_PAGE_PARAMS = ("after", "before", "match", "tag")
+
+
+def compute_popular_tags(limit: int = POPULAR_TAGS_LIMIT) -> List[Dict[str, Any]]:
+    """This function counts how many published goods use each tag and returns
+    the most used ones.
+
+    :param limit: maximum number of returned tags
+    :type limit: int
+    :return: tags with 'name' and 'count' keys ordered by usage
+    :rtype: list
+    """
+    goods_model = apps.get_model("main.Goods")
+    rows = (
+        goods_model.catalog.annotate(tag=Func(F("tags"), function="unnest"))
+        .values("tag")
+        .annotate(count=Count("id"))
+        .order_by("-count", "tag")[: limit + 2]
+    )
+    # a set-returning function can't be filtered in WHERE, so NULL and empty
+    # tags are skipped here
+    popular_tags = [
+        {"name": row["tag"], "count": row["count"]} for row in rows if row["tag"]
+    ]
+    return popular_tags[:limit]
+
+
+def refresh_popular_tags() -> List[Dict[str, Any]]:
+    """This function recalculates popular tags and puts them to a cache."""
+    popular_tags = compute_popular_tags()
+    cache.set(POPULAR_TAGS_KEY, popular_tags, POPULAR_TAGS_TIMEOUT)
+    return popular_tags
+
+
+def get_popular_tags() -> List[Dict[str, Any]]:
+    """This function returns cached popular tags and calculates them only if
+    a cache is empty.
+    """
+    popular_tags = cache.get(POPULAR_TAGS_KEY)
+    if popular_tags is None:
+        popular_tags = refresh_popular_tags()
+    return popular_tags
+
+
+def get_catalog_version() -> int:
+    """This function returns a current version of the catalog. The version
+    changes every time any goods are changed.
+    """
+    return int(get_redis_connection("default").get(CATALOG_VERSION_KEY) or 0)
+
+
+def bump_catalog_version() -> int:
+    """This function makes all cached catalog pages outdated."""
+    return get_redis_connection("default").incr(CATALOG_VERSION_KEY)
+
+
+def catalog_page_cache_key(query: QueryDict, version: int) -> Optional[str]:
+    """This function returns a cache key of a rendered catalog page. The key
+    depends on query parameters read by the catalog (page cursor, tag) and
+    a catalog version. Only pages which the catalog links to are cached:
+    pages of one popular tag and pages of signed cursors, which are issued
+    for existing goods only. Search results, other tags and pages with
+    other or repeated parameters aren't cached, so the number of cached
+    pages is limited by the catalog and a request can't add a page with
+    random values.
+
+    :param query: request's query parameters
+    :type query: class 'django.http.QueryDict'
+    :param version: a catalog version
+    :type version: int
+    :return: a cache key or None if a page mustn't be cached
+    :rtype: Optional[str]
+    """
+    for key in query:
+        if key not in CATALOG_PAGE_PARAMS or len(query.getlist(key)) > 1:
+            return None
+    if query.get("match", "any") != "any":
+        return None
+    if "tag" in query and query["tag"] not in {
+        tag["name"] for tag in get_popular_tags()
+    }:
+        return None
+    params = sorted((key, value) for key in query for value in query.getlist(key))
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    return f"main:catalog_page:{version}:{digest}"
@@ -0,0 +1,18 @@
+from typing import Any, Dict
+
+from django.http.request import HttpRequest
+
+from .models import Profile
+
+
+def avatar(request: HttpRequest) -> Dict[str, Any]:
+    """This function provides avatar thumbnails to a context of every template
+    rendered with a request. The avatar is taken from a cache, so an
+    authenticated page doesn't query a profile.
+
+    :param request: user's request object
+    :type request: class 'django.http.request.HttpRequest'
+    """
+    if not request.user.is_authenticated:
+        return {"avatar": None}
+    return {"avatar": Profile.get_cached_avatar(request.user.pk)}
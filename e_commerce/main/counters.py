@@ -0,0 +1,100 @@
+import time
+from typing import Any, Dict, List
+
+from django.apps import apps
+from django.db.models import F
+from django_redis import get_redis_connection
+
+DIRTY_VIEWS_COUNTERS_KEY = "main:views_counter:dirty"
+FLUSH_CHUNK_SIZE = 1000
+
+
+def views_delta_key(goods_id: int) -> str:
+    """This function returns a Redis key of views of a good which weren't
+    saved to DB yet.
+
+    :param goods_id: id of a goods in DB
+    :type goods_id: int
+    """
+    return f"main:views_counter:delta:{goods_id}"
+
+
+def record_view(goods: Any) -> int:
+    """This function atomically counts one more view of a good in Redis and
+    marks the good as having views which weren't saved to DB yet. It doesn't
+    query DB.
+
+    :param goods: a viewed Goods object
+    :type goods: class 'main.models.Goods'
+    :return: a current views counter
+    :rtype: int
+    """
+    pipe = get_redis_connection("default").pipeline()
+    pipe.incr(views_delta_key(goods.id))
+    pipe.sadd(DIRTY_VIEWS_COUNTERS_KEY, goods.id)
+    delta, _ = pipe.execute()
+    return goods.views_counter + delta
+
+
+def _chunks(items: List[int], size: int):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _drain_deltas(redis, goods_ids: List[int]) -> Dict[int, int]:
+    """This function atomically takes pending views of given goods from Redis.
+    Views counted after this call are kept for a next flush.
+    """
+    pipe = redis.pipeline()
+    pipe.srem(DIRTY_VIEWS_COUNTERS_KEY, *goods_ids)
+    for gid in goods_ids:
+        pipe.get(views_delta_key(gid))
+        pipe.delete(views_delta_key(gid))
+    values = pipe.execute()[1::2]
+    return {gid: int(value) for gid, value in zip(goods_ids, values) if value}
+
+
+def _restore_deltas(redis, deltas: Dict[int, int]) -> None:
+    """This function returns drained views back to Redis if they couldn't be
+    saved to DB.
+    """
+    pipe = redis.pipeline()
+    for gid, delta in deltas.items():
+        pipe.incrby(views_delta_key(gid), delta)
+        pipe.sadd(DIRTY_VIEWS_COUNTERS_KEY, gid)
+    pipe.execute()
+
+
+def flush_views_counters(chunk_size: int = FLUSH_CHUNK_SIZE) -> Dict[str, Any]:
+    """This function adds views counted in Redis to goods views counters in
+    DB. Only goods viewed since a previous flush are touched, each chunk of
+    them is saved with a single UPDATE statement of the 'views_counter'
+    column.
+
+    :param chunk_size: number of goods saved by one statement
+    :type chunk_size: int
+    :return: number of flushed rows and time spent in seconds
+    :rtype: dict
+    """
+    started = time.monotonic()
+    goods_model = apps.get_model("main.Goods")
+    redis = get_redis_connection("default")
+    dirty_ids = sorted(int(gid) for gid in redis.smembers(DIRTY_VIEWS_COUNTERS_KEY))
+
+    flushed = 0
+    for chunk in _chunks(dirty_ids, chunk_size):
+        deltas = _drain_deltas(redis, chunk)
+        if not deltas:
+            continue
+        goods = [
+            goods_model(id=gid, views_counter=F("views_counter") + delta)
+            for gid, delta in deltas.items()
+        ]
+        try:
+            goods_model.objects.bulk_update(goods, ["views_counter"])
+        except Exception:
+            _restore_deltas(redis, deltas)
+            raise
+        flushed += len(goods)
+
+    return {"flushed": flushed, "duration": time.monotonic() - started}
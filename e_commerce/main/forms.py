@@ -1,4 +1,5 @@
 from datetime import date, datetime
+from typing import Dict
 
 from dateutil.relativedelta import relativedelta
 from django import forms
@@ -7,7 +8,8 @@ from django.core.exceptions import ValidationError
 from django.forms import inlineformset_factory, widgets
 from django.utils.translation import gettext as _
 
-from .models import Category, Goods, Profile, SMSLog, Subscriptions, Tag
+from .models import Category, Goods, Profile
+from .verification import check_code
 
 
 class UserForm(forms.ModelForm):
@@ -40,7 +42,7 @@ class ProfileForm(forms.ModelForm):
             "birth_date": widgets.SelectDateWidget(
                 years=range(datetime.now().year - 100, datetime.now().year + 1)
             ),
-            "subsciber": widgets.SelectMultiple(choices=Subscriptions.objects.all()),
+            "subsciber": widgets.SelectMultiple(),
         }
 
 
@@ -77,7 +79,7 @@ class GoodsCreateUpdateForm(forms.ModelForm):
         widgets = {
             "description": widgets.Textarea(attrs={"cols": 60, "rows": 5}),
             "weight": widgets.NumberInput(),
-            "category": widgets.Select(choices=Category.objects.all()),
+            "category": widgets.Select(),
             "size": widgets.Select(),
             "price": widgets.NumberInput(),
             "discount": widgets.NumberInput(),
@@ -98,6 +100,41 @@ class GoodsCreateUpdateForm(forms.ModelForm):
         return data
 
 
+class GoodsImportForm(GoodsCreateUpdateForm):
+    """This class describes a form that used to validate a row of an imported
+    goods file with the 'GoodsCreateUpdateForm' rules. A category is given
+    by a name and looked up in preloaded categories instead of DB.
+    """
+
+    class Meta(GoodsCreateUpdateForm.Meta):
+        fields = (
+            "name",
+            "description",
+            "weight",
+            "manufacturer",
+            "tags",
+            "size",
+            "price",
+            "discount",
+            "in_stock",
+        )
+
+    def __init__(self, *args, categories: Dict[str, Category], **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.fields["category"] = forms.TypedChoiceField(
+            choices=[("", "")] + [(name, name) for name in categories],
+            coerce=categories.get,
+            required=False,
+            empty_value=None,
+        )
+
+    def clean(self):
+        """This method sets a found category to a good."""
+        cleaned_data = super().clean()
+        self.instance.category = cleaned_data.get("category")
+        return cleaned_data
+
+
 class ProfileFormSet(
     inlineformset_factory(User, Profile, form=ProfileForm, can_delete=False)
 ):
@@ -143,22 +180,18 @@ class PhoneConfirmForm(forms.Form):
 
     def clean_code(self):
         """This method provides a custom check for the 'code' field and raises
-        an error if an inputted code mismatches a last sent to a user.
+        an error if an inputted code mismatches an active code sent to a user
+        or a user entered too many wrong codes.
         """
-        sms_log = (
-            SMSLog.objects.filter(user=self.request.user)
-            .order_by("creation_date")
-            .last()
-        )
+        profile = Profile.objects.get(user=self.request.user)
         code = self.cleaned_data["code"]
-        if code != sms_log.code:
+        if not check_code(profile.id, code):
             raise ValidationError(
                 _("Введён неверный код: %(value)s"),
                 code="invalid",
                 params={"value": code},
             )
         else:
-            profile = Profile.objects.get(user=self.request.user)
             profile.is_phone_confirmed = True
             profile.save()
         return code
@@ -0,0 +1,191 @@
+import csv
+import json
+import time
+import uuid
+from datetime import date
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from django.apps import apps
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import transaction
+
+from .caching import bump_catalog_version
+from .forms import GoodsImportForm
+from .models import shorten_description
+from .tasks import (refresh_popular_tags_task, schedule_goods_short_refresh,
+                    send_new_goods_digest_task)
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_DEFAULTS = {"price": 0, "discount": 0, "in_stock": 0}
+IMPORT_DIGEST_GOODS = 20
+IMPORT_ERRORS_KEPT = 100
+
+
+def read_rows(stream: IO[str], file_format: str) -> Iterator[Tuple[int, Any]]:
+    """This function reads rows of a CSV file with a header or of a JSONL file
+    one by one, so a file of any size is never loaded in memory. JSONL lines
+    are returned as is and decoded by 'form_data', so a malformed line is
+    reported like an invalid row.
+
+    :param stream: an opened text file
+    :type stream: IO[str]
+    :param file_format: 'csv' or 'jsonl'
+    :type file_format: str
+    :return: line numbers and rows
+    :rtype: Iterator[Tuple[int, Any]]
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                yield line_number, line
+    else:
+        raise ValueError(f"Unknown file format: {file_format}")
+
+
+def form_data(row: Any) -> Dict[str, Any]:
+    """This function converts a read row to data of a 'GoodsImportForm'.
+
+    :param row: a row of a CSV file or a line of a JSONL file
+    :type row: Union[Dict[str, Any], str]
+    :raises ValueError: if a line isn't a JSON object
+    """
+    if isinstance(row, str):
+        try:
+            row = json.loads(row)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+    if not isinstance(row, dict):
+        raise ValueError("A row must be a JSON object")
+    data = dict(IMPORT_DEFAULTS)
+    for field, value in row.items():
+        if isinstance(value, list):
+            value = ",".join(str(item) for item in value)
+        if value is not None and value != "":
+            data[field] = value
+    return data
+
+
+def _chunks(rows: Iterator, size: int) -> Iterator[List]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def add_error(report: Dict[str, Any], line_number: int, errors: Dict) -> None:
+    """This function counts an invalid row and keeps its errors in a report
+    unless enough errors are kept already.
+    """
+    report["invalid"] += 1
+    if len(report["errors"]) < IMPORT_ERRORS_KEPT:
+        report["errors"].append((line_number, errors))
+
+
+def finish_import(created_ids: List[int], tag_names: Set[str]) -> None:
+    """This function does what signals do for separate goods once for all
+    imported goods: creates their tags, makes cached catalog pages outdated,
+    refreshes the catalog view and popular tags and sends a digest.
+    """
+    tag_model = apps.get_model("main.Tag")
+    if tag_names:
+        tag_model.objects.bulk_create(
+            [tag_model(name=name) for name in sorted(tag_names)], ignore_conflicts=True
+        )
+    if created_ids:
+        bump_catalog_version()
+        schedule_goods_short_refresh()
+        refresh_popular_tags_task.delay()
+        send_new_goods_digest_task.delay(
+            f"import-{uuid.uuid4().hex}", created_ids[-IMPORT_DIGEST_GOODS:]
+        )
+
+
+def import_goods(
+    stream: IO[str],
+    file_format: str,
+    seller: Any,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """This function creates goods from a CSV or JSONL file. Rows are checked
+    with the 'GoodsCreateUpdateForm' rules, invalid rows are skipped and
+    reported. Valid rows are inserted with 'bulk_create', a chunk in a
+    transaction, so no signals are sent for separate goods. Instead tags
+    are created with one statement, cached catalog pages are made outdated
+    once and subscribed users get one email about the imported goods. It's
+    done for committed chunks even if an import fails.
+
+    :param stream: an opened text file
+    :type stream: IO[str]
+    :param file_format: 'csv' or 'jsonl'
+    :type file_format: str
+    :param seller: a seller of imported goods
+    :type seller: class 'main.models.Seller'
+    :param chunk_size: number of goods inserted by one statement
+    :type chunk_size: int
+    :param progress: a function called with a report after every chunk
+    :type progress: Callable
+    :return: numbers of read, created and invalid rows, first errors and
+    time spent in seconds
+    :rtype: dict
+    """
+    goods_model = apps.get_model("main.Goods")
+    category_model = apps.get_model("main.Category")
+    categories = {category.name: category for category in category_model.objects.all()}
+    creation_date = date.today()
+
+    started = time.monotonic()
+    report = {"read": 0, "created": 0, "invalid": 0, "errors": [], "duration": 0.0}
+    created_ids, tag_names = [], set()
+    try:
+        for chunk in _chunks(read_rows(stream, file_format), chunk_size):
+            goods = []
+            for line_number, row in chunk:
+                try:
+                    data = form_data(row)
+                except ValueError as e:
+                    add_error(
+                        report,
+                        line_number,
+                        {NON_FIELD_ERRORS: [{"message": str(e), "code": "invalid"}]},
+                    )
+                    continue
+                form = GoodsImportForm(
+                    data,
+                    instance=goods_model(seller=seller, creation_date=creation_date),
+                    categories=categories,
+                )
+                if not form.is_valid():
+                    add_error(report, line_number, form.errors.get_json_data())
+                    continue
+                form.instance.short_description = shorten_description(
+                    form.instance.description
+                )
+                goods.append(form.instance)
+
+            if goods:
+                with transaction.atomic():
+                    goods = goods_model.objects.bulk_create(goods)
+                    chunk_ids = [good.id for good in goods]
+                    goods_model.objects.filter(id__in=chunk_ids).update_search_vector()
+                created_ids.extend(chunk_ids)
+                for good in goods:
+                    tag_names.update(tag for tag in good.tags or [] if tag)
+
+            report["read"] += len(chunk)
+            report["created"] += len(goods)
+            report["duration"] = time.monotonic() - started
+            if progress is not None:
+                progress(report)
+    finally:
+        finish_import(created_ids, tag_names)
+    report["duration"] = time.monotonic() - started
+    return report
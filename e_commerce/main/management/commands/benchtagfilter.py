@@ -0,0 +1,96 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from main.models import Goods, Seller
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """This is a class for 'benchtagfilter' management command which measures
+    the catalog tag filter on a large synthetic catalog. All generated data is
+    rolled back when the command finishes.
+    """
+
+    help = "Benchmarks the catalog tag filter with and without the GIN index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--tags", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def measure(self, queryset, repeat):
+        """This method runs a query several times and returns the best time
+        in milliseconds and a number of fetched rows.
+        """
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = len(list(queryset.all()))
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings), rows
+
+    def seed(self, rows, tags):
+        """This method inserts synthetic goods with three skewed tags each."""
+        seller = Seller.objects.create(
+            name="Benchmark seller", rating=5, email="bench@bomzhon.com"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO main_goods (
+                    name, description, short_description, seller_id,
+                    manufacturer, tags, rating, price, discount, image,
+                    creation_date, views_counter, in_stock, is_published,
+                    is_archive, version, thumbnails
+                )
+                SELECT
+                    'Goods ' || n, '', '', %s, 'Bench',
+                    ARRAY[
+                        'tag' || floor(power(random(), 3) * %s)::int,
+                        'tag' || floor(power(random(), 3) * %s)::int,
+                        'tag' || floor(random() * %s)::int
+                    ],
+                    5, 10, 0, '', now(), 0, 1, true, false, 0, '{}'
+                FROM generate_series(1, %s) AS n
+                """,
+                [seller.id, tags, tags, tags, rows],
+            )
+            cursor.execute("ANALYZE main_goods")
+
+    def handle(self, *args, **options):
+        """The actual logic of the command."""
+        rows, tags, repeat = options["rows"], options["tags"], options["repeat"]
+        cases = {
+            "popular tag": Goods.objects.filter(tags__contains=["tag0"]),
+            "rare tag": Goods.objects.filter(tags__contains=[f"tag{tags - 1}"]),
+            "two tags (AND)": Goods.objects.filter(tags__contains=["tag0", "tag1"]),
+            "two tags (OR)": Goods.objects.filter(
+                tags__overlap=[f"tag{tags - 1}", f"tag{tags - 2}"]
+            ),
+        }
+
+        with transaction.atomic():
+            logger.info(f"Generating {rows} goods with {tags} tags.")
+            started = time.perf_counter()
+            self.seed(rows, tags)
+            self.stdout.write(
+                f"Seeded {rows} goods in {time.perf_counter() - started:.1f}s"
+            )
+            self.stdout.write(f"{'case':<16}{'rows':>8}{'GIN, ms':>12}{'seq, ms':>12}")
+            for name, queryset in cases.items():
+                counted = queryset.order_by().values("id")
+                indexed, found = self.measure(counted, repeat)
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_bitmapscan = off")
+                    cursor.execute("SET LOCAL enable_indexscan = off")
+                sequential, _ = self.measure(counted, repeat)
+                with connection.cursor() as cursor:
+                    cursor.execute("RESET enable_bitmapscan")
+                    cursor.execute("RESET enable_indexscan")
+                self.stdout.write(
+                    f"{name:<16}{found:>8}{indexed:>12.1f}{sequential:>12.1f}"
+                )
+            transaction.set_rollback(True)
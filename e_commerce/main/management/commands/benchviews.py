@@ -0,0 +1,110 @@
+import logging
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from main.benchmarks import (BASELINE_PATH, BENCHMARK_REDIS_DB,
+                             RedisDBNotEmpty, find_regressions,
+                             isolated_redis, load_baseline, make_baseline,
+                             measure_listing, run_benchmarks, save_json)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """This is a class for 'benchviews' management command which measures
+    latency and numbers of queries of the main views on a large synthetic
+    catalog with long descriptions and compares numbers of queries with
+    a stored baseline. It also compares fetched bytes and latency of goods
+    lists loaded with full rows and with listing projections. Generated
+    rows are rolled back when the command finishes. Caches and counters
+    are kept in a separate Redis DB which is emptied afterwards, except pages
+    cached by 'cache_page', and tasks queued after a commit are counted as if
+    requests were committed.
+    """
+
+    help = "Benchmarks the main views and fails if they run more queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--goods", type=int, default=100_000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--tags", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--description-paragraphs",
+            type=int,
+            default=20,
+            help="number of paragraphs of goods descriptions",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--no-seed", action="store_true", help="use data in DB")
+        parser.add_argument("--output", type=Path, help="a file for JSON results")
+        parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+        parser.add_argument("--update-baseline", action="store_true")
+        parser.add_argument(
+            "--redis-db",
+            type=int,
+            default=BENCHMARK_REDIS_DB,
+            help="an empty Redis DB for caches of benchmark data",
+        )
+
+    def handle(self, *args, **options):
+        """The actual logic of the command."""
+        try:
+            with isolated_redis(options["redis_db"]), transaction.atomic():
+                if not options["no_seed"]:
+                    call_command(
+                        "maketestdata",
+                        goods=options["goods"],
+                        users=options["users"],
+                        subscribers=options["users"] // 2,
+                        tags=options["tags"],
+                        seed=options["seed"],
+                        description_paragraphs=options["description_paragraphs"],
+                        stdout=self.stdout,
+                    )
+                user = User.objects.create_superuser(
+                    "benchmark", "benchmark@example.com", "benchmark"
+                )
+                logger.info("Measuring views.")
+                results = run_benchmarks(user, options["repeat"])
+                logger.info("Measuring goods lists.")
+                listing = measure_listing(options["repeat"])
+                transaction.set_rollback(True)
+        except RedisDBNotEmpty as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{'scenario':<22}{'status':>7}{'cold q':>8}{'queries':>8}"
+            f"{'tasks':>6}{'p50, ms':>10}{'p95, ms':>10}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<22}{result['status']:>7}{result['queries_cold']:>8}"
+                f"{result['queries']:>8}{result['tasks']:>6}"
+                f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            )
+        self.stdout.write(
+            f"\n{'goods list':<22}{'rows':>7}{'bytes':>12}"
+            f"{'p50, ms':>10}{'p95, ms':>10}"
+        )
+        for name, result in listing.items():
+            self.stdout.write(
+                f"{name:<22}{result['rows']:>7}{result['bytes']:>12}"
+                f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            )
+        if options["output"]:
+            save_json(options["output"], {"views": results, "listing": listing})
+
+        if options["update_baseline"]:
+            save_json(options["baseline"], make_baseline(results))
+            self.stdout.write(f"Baseline saved to {options['baseline']}")
+            return
+        regressions = find_regressions(results, load_baseline(options["baseline"]))
+        if regressions:
+            raise CommandError(
+                "Numbers of queries regressed:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No query regressions"))
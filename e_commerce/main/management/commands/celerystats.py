@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from main.task_metrics import (TASK_STATS_SAMPLES, get_task_stats, percentile,
+                               reset_task_stats)
+
+QUANTILES = (50, 95, 99)
+
+
+def _ms(value):
+    return "-" if value is None else f"{value * 1000:.0f}"
+
+
+class Command(BaseCommand):
+    """This is a class for 'celerystats' management command which shows
+    percentiles of a queue wait, runtime and number of DB queries of Celery
+    tasks over their latest runs.
+    """
+
+    help = "Shows timings of Celery tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--task", help="show only tasks containing this text")
+        parser.add_argument(
+            "--reset", action="store_true", help="remove collected stats"
+        )
+
+    def handle(self, *args, **options):
+        """The actual logic of the command."""
+        stats = get_task_stats()
+        self.stdout.write(
+            f"Percentiles of the latest {TASK_STATS_SAMPLES} runs of each task, ms"
+        )
+        self.stdout.write(
+            f"{'task':<44}{'runs':>6}{'fail':>6}{'retry':>6}"
+            + "".join(f"{f'wait p{q}':>10}" for q in QUANTILES)
+            + "".join(f"{f'run p{q}':>10}" for q in QUANTILES)
+            + f"{'queries p95':>12}"
+        )
+        for name, task in stats.items():
+            if options["task"] and options["task"] not in name:
+                continue
+            counts = task["counts"]
+            queries = percentile(task["queries"], 95)
+            self.stdout.write(
+                f"{name.rsplit('.', 1)[-1]:<44}{len(task['runtime']):>6}"
+                f"{counts.get('FAILURE', 0):>6}{counts.get('RETRY', 0):>6}"
+                + "".join(f"{_ms(percentile(task['wait'], q)):>10}" for q in QUANTILES)
+                + "".join(
+                    f"{_ms(percentile(task['runtime'], q)):>10}" for q in QUANTILES
+                )
+                + f"{'-' if queries is None else int(queries):>12}"
+            )
+            errors = {
+                state[len("error:") :]: count
+                for state, count in counts.items()
+                if state.startswith("error:")
+            }
+            if errors:
+                self.stdout.write(
+                    "    errors: "
+                    + ", ".join(f"{error} x{count}" for error, count in errors.items())
+                )
+        if options["reset"]:
+            reset_task_stats()
+            self.stdout.write("Stats were reset")
@@ -0,0 +1,62 @@
+import logging
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from main.importer import IMPORT_CHUNK_SIZE, import_goods
+from main.models import Seller
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """This is a class for 'importgoods' management command which creates
+    goods of a seller from a CSV or JSONL file.
+    """
+
+    help = "Imports goods from a CSV file with a header or a JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--seller", type=int, required=True, help="seller id")
+        parser.add_argument("--format", choices=("csv", "jsonl"))
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+
+    def progress(self, report):
+        """This method prints a number of processed rows and a speed."""
+        self.stdout.write(
+            f"{report['read']} rows, {report['created']} created, "
+            f"{report['invalid']} invalid, "
+            f"{report['read'] / max(report['duration'], 1e-9):.0f} rows/s"
+        )
+
+    def handle(self, *args, **options):
+        """The actual logic of the command."""
+        path = options["path"]
+        file_format = options["format"] or os.path.splitext(path)[1].lstrip(".")
+        if file_format not in ("csv", "jsonl"):
+            raise CommandError("Can't guess a file format, use --format")
+        try:
+            seller = Seller.objects.get(id=options["seller"])
+        except Seller.DoesNotExist:
+            raise CommandError(f"Seller {options['seller']} doesn't exist")
+
+        logger.info(f"Importing goods of {seller} from {path}")
+        with open(path, newline="", encoding="utf-8") as stream:
+            report = import_goods(
+                stream, file_format, seller, options["chunk_size"], self.progress
+            )
+
+        for line_number, errors in report["errors"]:
+            messages = "; ".join(
+                f"{field}: {error['message']}"
+                for field, field_errors in errors.items()
+                for error in field_errors
+            )
+            self.stderr.write(f"line {line_number}: {messages}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['created']} of {report['read']} goods in "
+                f"{report['duration']:.1f}s "
+                f"({report['read'] / max(report['duration'], 1e-9):.0f} rows/s)"
+            )
+        )
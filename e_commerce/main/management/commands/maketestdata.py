@@ -1,20 +1,312 @@
+import csv
+import io
+import itertools
 import logging
+import random
+import time
+from datetime import date, timedelta
+from typing import Iterable, List, Sequence
 
-from django.core.management.base import BaseCommand
-from main.tests.fixtures import GoodsFactory
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from main.caching import refresh_popular_tags
+from main.models import (Category, Goods, GoodsShort, Profile, Seller,
+                         Subscriptions, Tag, shorten_description)
+from main.projections import refresh_goods_short
 
 logger = logging.getLogger(__name__)
 
+COPY_CHUNK_SIZE = 10000
+TEST_PASSWORD = "testpassword"
+
+
+def zipf_weights(size: int, exponent: float = 1.1) -> List[float]:
+    """This function returns cumulative weights of ranks '1..size' where
+    a weight of rank 'k' is '1 / k ** exponent'.
+    """
+    return list(
+        itertools.accumulate(1 / rank**exponent for rank in range(1, size + 1))
+    )
+
+
+def pg_array(values: Sequence[str]) -> str:
+    """This function formats a list of strings as a Postgres array literal."""
+    quoted = (
+        '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values
+    )
+    return "{" + ",".join(quoted) + "}"
+
+
+def copy_rows(table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """This function loads rows to a table with 'COPY' in chunks.
+
+    :param table: a name of a table
+    :type table: str
+    :param columns: names of loaded columns
+    :type columns: Sequence[str]
+    :param rows: values of rows in order of columns, None is loaded as NULL
+    :type rows: Iterable[Sequence]
+    :return: number of loaded rows
+    :rtype: int
+    """
+    sql = (
+        f"COPY {table} ({', '.join(columns)}) "
+        "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    )
+    loaded = 0
+    rows = iter(rows)
+    with connection.cursor() as cursor:
+        while True:
+            chunk = list(itertools.islice(rows, COPY_CHUNK_SIZE))
+            if not chunk:
+                return loaded
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(
+                ["\\N" if value is None else value for value in row] for row in chunk
+            )
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            loaded += len(chunk)
+
 
 class Command(BaseCommand):
-    """This is a class for 'maketestdata' management command which adds some new goods."""
+    """This is a class for 'maketestdata' management command which fills DB
+    with synthetic goods, users and subscribers. Generated data depends only
+    on a seed, so a catalog of any size can be reproduced locally.
+    """
 
     help = "Makes test data."
 
+    def add_arguments(self, parser):
+        parser.add_argument("--goods", type=int, default=1000)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--subscribers", type=int, default=50)
+        parser.add_argument("--tags", type=int, default=100)
+        parser.add_argument("--sellers", type=int, default=20)
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument(
+            "--description-paragraphs",
+            type=int,
+            default=1,
+            help="number of paragraphs of goods descriptions",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def step(self, message, started):
+        self.stdout.write(f"{message} in {time.monotonic() - started:.1f}s")
+
+    def make_tags(self, fake: Faker, size: int) -> List[str]:
+        """This method makes unique tag names and saves them to DB."""
+        names = []
+        seen = set()
+        while len(names) < size:
+            name = fake.word()
+            if name in seen:
+                name = f"{name}-{len(names)}"
+            seen.add(name)
+            names.append(name)
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in names], ignore_conflicts=True
+        )
+        return names
+
+    def make_goods(self, fake: Faker, rng: random.Random, tags: List[str], options):
+        """This method loads goods with tags and views distributed by Zipf's
+        law: a few tags and goods are very popular and most are rare.
+        """
+        sellers = Seller.objects.bulk_create(
+            Seller(
+                name=fake.company()[:80],
+                rating=round(rng.uniform(1, 5), 1),
+                email=fake.company_email(),
+            )
+            for _ in range(options["sellers"])
+        )
+        categories = Category.objects.bulk_create(
+            Category(name=fake.word().capitalize())
+            for _ in range(options["categories"])
+        )
+        names = [fake.catch_phrase() for _ in range(min(options["goods"], 5000))]
+        descriptions = []
+        for _ in range(1000):
+            description = "\n".join(
+                fake.paragraph(nb_sentences=5)
+                for _ in range(options["description_paragraphs"])
+            )
+            descriptions.append((description, shorten_description(description)))
+        manufacturers = [fake.company() for _ in range(200)]
+        tag_weights = zipf_weights(len(tags))
+        today = date.today()
+
+        def rows():
+            for number in range(options["goods"]):
+                goods_tags = set(
+                    rng.choices(tags, cum_weights=tag_weights, k=rng.randint(0, 5))
+                )
+                yield (
+                    f"{rng.choice(names)} {number}"[:80],
+                    *rng.choice(descriptions),
+                    rng.choice(sellers).id,
+                    rng.choice(categories).id,
+                    rng.choice(manufacturers)[:80],
+                    pg_array(sorted(goods_tags)),
+                    rng.choice(("S", "M", "L", None)),
+                    round(rng.uniform(1, 5), 1),
+                    round(rng.lognormvariate(7, 1), 2),
+                    rng.choice((0, 0, 0, 5, 10, 25, 50)),
+                    "",
+                    today - timedelta(days=rng.randint(0, 365)),
+                    int(rng.paretovariate(1.2)) - 1,
+                    0 if rng.random() < 0.1 else rng.randint(1, 500),
+                    rng.random() < 0.95,
+                    rng.random() < 0.05,
+                    0,
+                    "{}",
+                )
+
+        copy_rows(
+            Goods._meta.db_table,
+            (
+                "name",
+                "description",
+                "short_description",
+                "seller_id",
+                "category_id",
+                "manufacturer",
+                "tags",
+                "size",
+                "rating",
+                "price",
+                "discount",
+                "image",
+                "creation_date",
+                "views_counter",
+                "in_stock",
+                "is_published",
+                "is_archive",
+                "version",
+                "thumbnails",
+            ),
+            rows(),
+        )
+
+    def make_users(self, fake: Faker, rng: random.Random, options):
+        """This method loads users with profiles and subscribes some of them
+        to new goods emails.
+        """
+        prefix = f"loadtest{options['seed']}_"
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users of seed {options['seed']} already exist")
+        password = make_password(TEST_PASSWORD)
+        joined = timezone.now()
+
+        def users():
+            for number in range(options["users"]):
+                first_name, last_name = fake.first_name(), fake.last_name()
+                yield (
+                    password,
+                    False,
+                    f"{prefix}{number}",
+                    first_name[:150],
+                    last_name[:150],
+                    f"{prefix}{number}@example.com",
+                    False,
+                    True,
+                    joined - timedelta(days=rng.randint(0, 3 * 365)),
+                )
+
+        copy_rows(
+            User._meta.db_table,
+            (
+                "password",
+                "is_superuser",
+                "username",
+                "first_name",
+                "last_name",
+                "email",
+                "is_staff",
+                "is_active",
+                "date_joined",
+            ),
+            users(),
+        )
+        user_ids = list(
+            User.objects.filter(username__startswith=prefix)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        copy_rows(
+            Profile._meta.db_table,
+            ("user_id", "phone_number", "is_phone_confirmed", "avatar", "thumbnails"),
+            ((user_id, "", False, "", "{}") for user_id in user_ids),
+        )
+        group, _ = Group.objects.get_or_create(name="common_users")
+        copy_rows(
+            User.groups.through._meta.db_table,
+            ("user_id", "group_id"),
+            ((user_id, group.id) for user_id in user_ids),
+        )
+
+        subscription, _ = Subscriptions.objects.get_or_create(name="New goods")
+        profile_ids = list(
+            Profile.objects.filter(user_id__in=user_ids)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        subscribers = rng.sample(
+            profile_ids, min(options["subscribers"], len(profile_ids))
+        )
+        copy_rows(
+            Profile.subsciber.through._meta.db_table,
+            ("profile_id", "subscriptions_id"),
+            ((profile_id, subscription.id) for profile_id in sorted(subscribers)),
+        )
+
+    def fill_search_vectors(self, first_id: int):
+        """This method fills search documents of loaded goods in batches."""
+        last_id = Goods.objects.aggregate(last=Max("id"))["last"] or 0
+        for start in range(first_id, last_id + 1, COPY_CHUNK_SIZE):
+            Goods.objects.filter(
+                id__gte=start, id__lt=start + COPY_CHUNK_SIZE
+            ).update_search_vector()
+
     def handle(self, *args, **options):
         """The actual logic of the command."""
+        rng = random.Random(options["seed"])
+        fake = Faker("ru_RU")
+        fake.seed_instance(options["seed"])
+
+        logger.info("Creating test data.")
+        with transaction.atomic():
+            started = time.monotonic()
+            tags = self.make_tags(fake, options["tags"])
+            self.step(f"Created {len(tags)} tags", started)
+
+            started = time.monotonic()
+            first_id = (Goods.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+            self.make_goods(fake, rng, tags, options)
+            self.step(f"Loaded {options['goods']} goods", started)
+
+            started = time.monotonic()
+            self.fill_search_vectors(first_id)
+            self.step("Filled search documents", started)
+
+            started = time.monotonic()
+            self.make_users(fake, rng, options)
+            self.step(
+                f"Loaded {options['users']} users and "
+                f"{min(options['subscribers'], options['users'])} subscribers",
+                started,
+            )
 
-        logger.info("Creating test Goods.")
-        new_test_good = GoodsFactory()
-        new_test_good.save()
+        refresh_goods_short(concurrently=False)
+        with connection.cursor() as cursor:
+            for model in (Goods, GoodsShort, User, Profile):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+        refresh_popular_tags()
         logger.info("Successfully created a test data!")
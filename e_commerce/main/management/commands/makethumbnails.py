@@ -0,0 +1,98 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.fields.json import KeyTextTransform
+from main.thumbnails import THUMBNAIL_FIELDS, update_thumbnails_chunk
+
+logger = logging.getLogger(__name__)
+
+MODELS = {"goods": ["main.Goods"], "profiles": ["main.Profile"]}
+MODELS["all"] = MODELS["goods"] + MODELS["profiles"]
+
+
+def outdated_ids(model_label: str, force: bool = False) -> List[int]:
+    """This function returns ids of objects with an image whose thumbnails
+    were made from another image or miss any size.
+
+    :param model_label: a label of a model from 'THUMBNAIL_FIELDS'
+    :type model_label: str
+    :param force: whether all objects with an image are returned
+    :type force: bool
+    """
+    field, sizes = THUMBNAIL_FIELDS[model_label]
+    queryset = apps.get_model(model_label).objects.exclude(**{field: ""})
+    if not force:
+        queryset = queryset.annotate(
+            thumbnails_source=KeyTextTransform("source", "thumbnails")
+        ).exclude(Q(thumbnails_source=F(field)) & Q(thumbnails__has_keys=list(sizes)))
+    return list(queryset.order_by("pk").values_list("pk", flat=True))
+
+
+class Command(BaseCommand):
+    """This is a class for 'makethumbnails' management command which generates
+    missing thumbnails of already uploaded images. Images are processed by
+    chunks in a pool of processes, so every CPU core decodes and resizes
+    images at once.
+    """
+
+    help = "Generates thumbnails of uploaded goods photos and avatars."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model", choices=sorted(MODELS), default="all", help="images to process"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="number of worker processes",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100,
+            help="number of images processed by a worker at once",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="make thumbnails again even if they are valid",
+        )
+
+    def handle(self, *args, **options):
+        """The actual logic of the command."""
+        chunk_size, force = options["chunk_size"], options["force"]
+        chunks = []
+        for model_label in MODELS[options["model"]]:
+            ids = outdated_ids(model_label, force)
+            logger.info(f"{len(ids)} objects of {model_label} need thumbnails.")
+            chunks += [
+                (model_label, ids[start : start + chunk_size])
+                for start in range(0, len(ids), chunk_size)
+            ]
+        if not chunks:
+            self.stdout.write("Thumbnails are up to date.")
+            return
+
+        made = 0
+        if options["workers"] <= 1:
+            for model_label, ids in chunks:
+                made += update_thumbnails_chunk(model_label, ids, force)
+        else:
+            # forked workers mustn't share a DB connection of this process
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+                futures = [
+                    executor.submit(update_thumbnails_chunk, model_label, ids, force)
+                    for model_label, ids in chunks
+                ]
+                for done, future in enumerate(as_completed(futures), 1):
+                    made += future.result()
+                    logger.info(f"Processed {done} of {len(futures)} chunks.")
+        self.stdout.write(f"Thumbnails were made for {made} objects.")
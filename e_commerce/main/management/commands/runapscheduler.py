@@ -1,5 +1,4 @@
 import logging
-from datetime import datetime, timedelta
 
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -7,22 +6,17 @@ from django.conf import settings
 from django.core.management.base import BaseCommand
 from django_apscheduler.jobstores import DjangoJobStore
 from django_apscheduler.models import DjangoJobExecution
-from main.messages import new_goods_subscribers_weekly_notification
-from main.models import Goods, Profile, Subscriptions
+from main.tasks import send_weekly_new_goods_email_task
 
 logger = logging.getLogger(__name__)
 
 
 def send_new_goods_weekly_schedule():
     """This job sends email weekly notification about new goods
-    to all subscribed users.
+    to all subscribed users. It starts the same digest as the Celery beat
+    schedule, so a week's digest is sent only once.
     """
-    start_date = datetime.now() - timedelta(days=7)
-    new_goods = Goods.objects.filter(creation_date__gte=start_date)
-
-    subscription = Subscriptions.objects.get(name="New goods")
-    for profile in Profile.objects.filter(subsciber=subscription):
-        new_goods_subscribers_weekly_notification(new_goods, profile)
+    send_weekly_new_goods_email_task.delay()
 
 
 def delete_old_job_executions(max_age=604_800):
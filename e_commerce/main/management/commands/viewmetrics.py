@@ -0,0 +1,47 @@
+from chat.throttling import get_rejected_frames
+from django.core.management.base import BaseCommand
+from main.metrics import get_metrics, render_prometheus, reset_metrics, summarize
+
+
+class Command(BaseCommand):
+    """This is a class for 'viewmetrics' management command which shows
+    metrics of views collected by 'MetricsMiddleware' and numbers of chat
+    frames rejected by the chat consumer.
+    """
+
+    help = "Shows timings and numbers of queries of views."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prometheus", action="store_true", help="print the Prometheus format"
+        )
+        parser.add_argument(
+            "--reset", action="store_true", help="remove collected metrics"
+        )
+
+    def handle(self, *args, **options):
+        """The actual logic of the command."""
+        values = get_metrics()
+        rejected_frames = get_rejected_frames()
+        if options["prometheus"]:
+            self.stdout.write(render_prometheus(values, rejected_frames), ending="")
+        else:
+            self.stdout.write(
+                f"{'view':<24}{'requests':>9}{'avg, ms':>9}{'p95, ms':>9}"
+                f"{'queries':>9}{'db, ms':>9}{'tpl, ms':>9}{'cache':>7}"
+            )
+            for view, row in summarize(values).items():
+                ratio = row["cache_hit_ratio"]
+                self.stdout.write(
+                    f"{view:<24}{row['requests']:>9}{row['avg_ms']:>9.1f}"
+                    f"{row['p95_ms']:>9.0f}{row['avg_queries']:>9.1f}"
+                    f"{row['avg_db_ms']:>9.1f}{row['avg_template_ms']:>9.1f}"
+                    f"{'-' if ratio is None else f'{ratio:.0%}':>7}"
+                )
+            if rejected_frames:
+                self.stdout.write(f"\n{'rejected chat frames':<24}{'frames':>9}")
+                for reason, count in sorted(rejected_frames.items()):
+                    self.stdout.write(f"{reason:<24}{count:>9}")
+        if options["reset"]:
+            reset_metrics()
+            self.stdout.write("Metrics were reset")
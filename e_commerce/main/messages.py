@@ -1,8 +1,12 @@
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import get_template
 from django.urls import reverse_lazy
-from twilio.rest import Client
+from django.utils.html import escape
+
+from .sms import get_sms_backend
+
+USER_NAME_PLACEHOLDER = "__USER_NAME__"
 
 
 def send_welcome_email(user):
@@ -22,57 +26,86 @@ def send_welcome_email(user):
     msg.send()
 
 
-def new_goods_subscribers_notification(goods, profile):
-    """This function sends an email about newly created goods to subscribed
-    users.
+def send_personalized_emails(email, profiles):
+    """This function sends one rendered email to many users replacing a user
+    name placeholder in it. All messages are sent through one mail connection.
+
+    :param email: rendered 'subject', 'text' and 'html' of an email
+    :type email: Dict[str, str]
+    :param profiles: Profile objects with selected users who need to send
+    an email
+    :type profiles: Iterable[class 'main.models.Profile']
+    :return: number of sent messages
+    :rtype: int
+    """
+    messages = []
+    for profile in profiles:
+        user_name = profile.user.get_username()
+        msg = EmailMultiAlternatives(
+            email["subject"],
+            email["text"].replace(USER_NAME_PLACEHOLDER, user_name),
+            settings.DEFAULT_FROM_EMAIL,
+            [profile.user.email],
+        )
+        msg.attach_alternative(
+            email["html"].replace(USER_NAME_PLACEHOLDER, escape(user_name)),
+            "text/html",
+        )
+        messages.append(msg)
+    return get_connection().send_messages(messages) or 0
+
+
+def render_new_goods_notification(goods):
+    """This function renders an email about newly created goods once for all
+    subscribed users. A user name is left as a placeholder which is replaced
+    by 'send_personalized_emails'.
 
     :param goods: a Goods object which was created
     :type goods: class 'main.models.Goods'
-    :param profile: a Profile object who need to send an email
-    :type profile: class 'main.models.Profile'
+    :return: rendered 'subject', 'text' and 'html' of an email
+    :rtype: Dict[str, str]
     """
     subject = "Новый товар в Bomzhon!"
     ctx = {
         "title": subject,
-        "user_name": profile.user.get_username(),
+        "user_name": USER_NAME_PLACEHOLDER,
         "goods_name": goods.name,
         "goods_description": goods.description,
         "goods_id": goods.id,
     }
     html_message = get_template("account/email/new_goods_email.html").render(ctx)
     url = reverse_lazy("goods-detail", kwargs={"pk": goods.id})
-    text_content = f"Привет, {profile.user.get_username()}! "
-    +f"В Bomzhon появился новый товар. Подробности по ссылке: {url}"
-    msg = EmailMultiAlternatives(
-        subject, text_content, settings.DEFAULT_FROM_EMAIL, [profile.user.email]
+    text_content = (
+        f"Привет, {USER_NAME_PLACEHOLDER}! "
+        + f"В Bomzhon появился новый товар. Подробности по ссылке: {url}"
     )
-    msg.attach_alternative(html_message, "text/html")
-    msg.send()
+    return {"subject": subject, "text": text_content, "html": html_message}
 
 
-def new_goods_subscribers_weekly_notification(goods, profile):
-    """This function sends an email about new goods to a provided user.
+def render_new_goods_digest(new_goods):
+    """This function renders an email about new goods once for all users.
+    A user name is left as a placeholder which is replaced by
+    'send_personalized_emails'.
 
-    :param goods: a Goods object which was added
-    :type goods: class 'main.models.Goods'
-    :param profile: a Profile object who need to send an email
-    :type profile: class 'main.models.Profile'
+    :param new_goods: new goods with 'id', 'name' and 'short_description'
+    keys
+    :type new_goods: List[Dict[str, Any]]
+    :return: rendered 'subject', 'text' and 'html' of an email
+    :rtype: Dict[str, str]
     """
     subject = "Новые товары в Bomzhon!"
     ctx = {
         "title": subject,
-        "user_name": profile.user.get_username(),
-        "new_goods": goods,
+        "user_name": USER_NAME_PLACEHOLDER,
+        "new_goods": new_goods,
     }
     html_message = get_template("account/email/new_goods_email_weekly.html").render(ctx)
     url = reverse_lazy("goods")
-    text_content = f"Привет, {profile.user.get_username()}! "
-    +f"В Bomzhon появились новые товары. Подробности по ссылке: {url}"
-    msg = EmailMultiAlternatives(
-        subject, text_content, settings.DEFAULT_FROM_EMAIL, [profile.user.email]
+    text_content = (
+        f"Привет, {USER_NAME_PLACEHOLDER}! "
+        + f"В Bomzhon появились новые товары. Подробности по ссылке: {url}"
     )
-    msg.attach_alternative(html_message, "text/html")
-    msg.send()
+    return {"subject": subject, "text": text_content, "html": html_message}
 
 
 def send_sms_to_number(to_number, sms_text):
@@ -82,9 +115,7 @@ def send_sms_to_number(to_number, sms_text):
     :type to_number: str
     :param sms_text: Text that will be sent
     :type sms_text: str
+    :return: a compact gate response
+    :rtype: Dict[str, Any]
     """
-    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOCKEN)
-    message = client.messages.create(
-        body=sms_text, from_=settings.TWILIO_PHONE_NUMBER, to=to_number
-    )
-    return message
+    return get_sms_backend().send(to_number, sms_text)
@@ -0,0 +1,327 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from django.template.backends.django import DjangoTemplates, Template
+from django_redis import get_redis_connection
+from django_redis.cache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "main:metrics"
+METRICS_PREFIX = "e_commerce"
+METRICS_FLUSH_INTERVAL = 5
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# a name of a histogram: its buckets and a help text
+HISTOGRAMS = {
+    "request_duration_seconds": (SECONDS_BUCKETS, "Wall time of requests."),
+    "db_queries": (QUERIES_BUCKETS, "Number of DB queries of requests."),
+    "db_duration_seconds": (SECONDS_BUCKETS, "Time of DB queries of requests."),
+    "template_duration_seconds": (
+        SECONDS_BUCKETS,
+        "Time of rendering templates of requests.",
+    ),
+}
+COUNTERS = {
+    "cache_hits_total": "Number of found cache keys.",
+    "cache_misses_total": "Number of missed cache keys.",
+}
+REJECTED_FRAMES_METRIC = "chat_rejected_frames_total"
+
+_MISSING = object()
+
+
+class RequestMetrics:
+    """This class collects numbers of a single request. An object is also
+    a DB execute wrapper counting queries and their time.
+
+    queries - number of DB queries
+    db_time - time of DB queries in seconds
+    cache_hits - number of keys found in the cache
+    cache_misses - number of keys missed in the cache
+    template_time - time of rendering templates in seconds
+    """
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "current_metrics", default=None
+)
+
+
+class InstrumentedRedisCache(RedisCache):
+    """This class is a Redis cache backend which counts hits and misses of
+    the request measured by 'MetricsMiddleware'.
+    """
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, _MISSING, version, client)
+        metrics = current_metrics.get()
+        if metrics is not None:
+            if value is _MISSING:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None, client=None):
+        values = super().get_many(keys, version=version, client=client)
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.cache_hits += len(values)
+            metrics.cache_misses += len(keys) - len(values)
+        return values
+
+
+class InstrumentedTemplate(Template):
+    """This class is a Django template which adds its render time to
+    the request measured by 'MetricsMiddleware'.
+    """
+
+    def render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """This class is a Django templates backend returning templates which
+    measure their render time. Templates included by other templates are
+    rendered inside them, so they aren't counted twice.
+    """
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return InstrumentedTemplate(super().get_template(template_name).template, self)
+
+
+class MetricsRecorder:
+    """This class aggregates metrics of requests by view names. Aggregates
+    are kept in memory and added to a Redis hash at most once in 'interval'
+    seconds, so measured requests don't wait for Redis.
+
+    interval - number of seconds aggregates are kept in memory for
+    """
+
+    def __init__(self, interval: float = METRICS_FLUSH_INTERVAL) -> None:
+        self.interval = interval
+        self.values: Counter = Counter()
+        self.flushed = time.monotonic()
+        self._lock = threading.Lock()
+
+    def observe(self, metric: str, view: str, value: float) -> None:
+        """This method adds a value to a histogram of a view.
+
+        :param metric: a name of a histogram from 'HISTOGRAMS'
+        :type metric: str
+        :param view: a name of a measured view
+        :type view: str
+        :param value: an observed value
+        :type value: float
+        """
+        buckets, _ = HISTOGRAMS[metric]
+        index = bisect_left(buckets, value)
+        bucket = str(buckets[index]) if index < len(buckets) else "+Inf"
+        self.values[f"{metric}|{view}|{bucket}"] += 1
+        self.values[f"{metric}|{view}|sum"] += value
+
+    def record(self, view: str, duration: float, metrics: RequestMetrics) -> None:
+        """This method adds all metrics of a request and saves aggregates to
+        Redis if they were kept long enough.
+
+        :param view: a name of a measured view
+        :type view: str
+        :param duration: wall time of a request in seconds
+        :type duration: float
+        :param metrics: numbers collected during a request
+        :type metrics: class 'main.metrics.RequestMetrics'
+        """
+        with self._lock:
+            self.observe("request_duration_seconds", view, duration)
+            self.observe("db_queries", view, metrics.queries)
+            self.observe("db_duration_seconds", view, metrics.db_time)
+            self.observe("template_duration_seconds", view, metrics.template_time)
+            self.values[f"cache_hits_total|{view}|"] += metrics.cache_hits
+            self.values[f"cache_misses_total|{view}|"] += metrics.cache_misses
+            if time.monotonic() - self.flushed < self.interval:
+                return
+            values, self.values = self.values, Counter()
+            self.flushed = time.monotonic()
+        self.flush(values)
+
+    def flush(self, values: Optional[Dict[str, float]] = None) -> None:
+        """This method adds aggregates to the Redis hash. Aggregates which
+        couldn't be saved are kept for a next flush.
+        """
+        if values is None:
+            with self._lock:
+                values, self.values = self.values, Counter()
+        try:
+            save_metrics(values)
+        except Exception:
+            logger.exception("Views metrics couldn't be saved")
+            with self._lock:
+                self.values.update(values)
+
+
+def save_metrics(values: Dict[str, float]) -> None:
+    pipe = get_redis_connection("default").pipeline()
+    for field, value in values.items():
+        if isinstance(value, int):
+            pipe.hincrby(METRICS_KEY, field, value)
+        elif value:
+            pipe.hincrbyfloat(METRICS_KEY, field, value)
+    pipe.execute()
+
+
+def get_metrics() -> Dict[Tuple[str, str, str], float]:
+    """This function returns saved aggregates keyed by a metric name, a view
+    name and a histogram bucket.
+    """
+    values = get_redis_connection("default").hgetall(METRICS_KEY)
+    return {
+        tuple(field.decode().split("|")): float(value)
+        for field, value in values.items()
+    }
+
+
+def reset_metrics() -> None:
+    get_redis_connection("default").delete(METRICS_KEY)
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render_prometheus(
+    values: Dict[Tuple[str, str, str], float],
+    rejected_frames: Optional[Dict[str, int]] = None,
+) -> str:
+    """This function formats aggregates in the Prometheus text format.
+    Histogram buckets are saved separately and are made cumulative here.
+
+    :param values: aggregates returned by 'get_metrics'
+    :type values: dict
+    :param rejected_frames: numbers of rejected chat frames by a reason
+        returned by 'chat.throttling.get_rejected_frames'
+    :type rejected_frames: Optional[Dict[str, int]]
+    :rtype: str
+    """
+    views = sorted({view for _, view, _ in values})
+    lines: List[str] = []
+    for metric, (buckets, help_text) in HISTOGRAMS.items():
+        name = f"{METRICS_PREFIX}_{metric}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for view in views:
+            if (metric, view, "sum") not in values:
+                continue
+            total = 0.0
+            for bucket in (*map(str, buckets), "+Inf"):
+                total += values.get((metric, view, bucket), 0)
+                lines.append(
+                    f'{name}_bucket{{view="{view}",le="{bucket}"}} {_number(total)}'
+                )
+            lines.append(
+                f'{name}_sum{{view="{view}"}} {_number(values[(metric, view, "sum")])}'
+            )
+            lines.append(f'{name}_count{{view="{view}"}} {_number(total)}')
+    for metric, help_text in COUNTERS.items():
+        name = f"{METRICS_PREFIX}_{metric}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for view in views:
+            if (metric, view, "") in values:
+                lines.append(
+                    f'{name}{{view="{view}"}} {_number(values[(metric, view, "")])}'
+                )
+    if rejected_frames is not None:
+        name = f"{METRICS_PREFIX}_{REJECTED_FRAMES_METRIC}"
+        lines += [
+            f"# HELP {name} Number of chat frames rejected by the consumer.",
+            f"# TYPE {name} counter",
+        ]
+        for reason, count in sorted(rejected_frames.items()):
+            lines.append(f'{name}{{reason="{reason}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def histogram_quantile(
+    values: Dict[Tuple[str, str, str], float], metric: str, view: str, q: float
+) -> float:
+    """This function returns an upper bound of a histogram bucket which
+    contains a given quantile of a view's observations.
+
+    :param q: a quantile from 0 to 1
+    :type q: float
+    """
+    buckets, _ = HISTOGRAMS[metric]
+    counts = [values.get((metric, view, str(bucket)), 0) for bucket in buckets]
+    total = sum(counts) + values.get((metric, view, "+Inf"), 0)
+    seen = 0.0
+    for bucket, count in zip(buckets, counts):
+        seen += count
+        if total and seen >= q * total:
+            return float(bucket)
+    return float("inf")
+
+
+def summarize(values: Dict[Tuple[str, str, str], float]) -> Dict[str, Dict]:
+    """This function makes a report of saved aggregates with numbers of
+    requests, average and 95th percentile of their time, average numbers of
+    queries, DB and template time and a cache hit ratio of each view.
+    """
+    report = {}
+    for view in sorted({view for _, view, _ in values}):
+        buckets, _ = HISTOGRAMS["request_duration_seconds"]
+        requests = sum(
+            values.get(("request_duration_seconds", view, bucket), 0)
+            for bucket in (*map(str, buckets), "+Inf")
+        )
+        if not requests:
+            continue
+        hits = values.get(("cache_hits_total", view, ""), 0)
+        lookups = hits + values.get(("cache_misses_total", view, ""), 0)
+        report[view] = {
+            "requests": int(requests),
+            "avg_ms": values.get(("request_duration_seconds", view, "sum"), 0)
+            / requests
+            * 1000,
+            "p95_ms": histogram_quantile(values, "request_duration_seconds", view, 0.95)
+            * 1000,
+            "avg_queries": values.get(("db_queries", view, "sum"), 0) / requests,
+            "avg_db_ms": values.get(("db_duration_seconds", view, "sum"), 0)
+            / requests
+            * 1000,
+            "avg_template_ms": values.get(("template_duration_seconds", view, "sum"), 0)
+            / requests
+            * 1000,
+            "cache_hit_ratio": hits / lookups if lookups else None,
+        }
+    return report
@@ -0,0 +1,45 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+from .metrics import MetricsRecorder, RequestMetrics, current_metrics
+
+
+class MetricsMiddleware:
+    """This class measures wall time, DB queries, cache hits and template
+    render time of requests and aggregates them by URL names. It is used
+    only if 'METRICS_ENABLED' setting is on.
+    """
+
+    def __init__(self, get_response) -> None:
+        if not getattr(settings, "METRICS_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.recorder = MetricsRecorder(settings.METRICS_FLUSH_INTERVAL)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        duration = time.perf_counter() - started
+        self.recorder.record(self.view_name(request), duration, metrics)
+        return response
+
+    @staticmethod
+    def view_name(request: HttpRequest) -> str:
+        """This method returns a URL name of a request's view or 'unmatched'
+        if no URL pattern matches a request.
+        """
+        match = getattr(request, "resolver_match", None)
+        return match.view_name if match is not None else "unmatched"
@@ -0,0 +1,17 @@
+# Generated by Django 3.1.7 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_goodsshort'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goods',
+            index=models.Index(fields=['name', 'id'], name='main_goods_name_id_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.1.7 on 2026-10-18 14:06
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, transaction
+from django.db.models import Max, Min
+
+BATCH_SIZE = 10000
+
+
+def backfill_search_vector(apps, schema_editor):
+    """Fills the search document of existing goods in primary key batches,
+    each batch is committed separately to keep row locks short.
+    """
+    Goods = apps.get_model('main', 'Goods')
+    bounds = Goods.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return
+    for start in range(bounds['first'], bounds['last'] + 1, BATCH_SIZE):
+        with transaction.atomic():
+            Goods.objects.filter(id__gte=start, id__lt=start + BATCH_SIZE).update(
+                search_vector=(
+                    SearchVector('name', weight='A')
+                    + SearchVector('description', weight='B')
+                )
+            )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('main', '0006_goods_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goods',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='goods',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='main_goods_search_idx'),
+        ),
+    ]
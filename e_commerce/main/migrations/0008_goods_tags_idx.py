@@ -0,0 +1,18 @@
+# Generated by Django 3.1.7 on 2026-10-18 14:10
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_goods_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goods',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tags'], name='main_goods_tags_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.7 on 2026-10-18 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_goods_tags_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goods',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
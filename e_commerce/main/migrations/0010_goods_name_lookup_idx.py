@@ -0,0 +1,38 @@
+# Generated by Django 3.1.7 on 2026-10-18 15:02
+
+from django.db import migrations
+
+
+def create_trigram_index(apps, schema_editor):
+    """Creates a trigram index of goods names when the server ships the
+    'pg_trgm' contrib extension, fuzzy lookups are skipped without it.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS main_goods_name_trgm_idx '
+        'ON main_goods USING gin (name gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS main_goods_name_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_goods_version'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX main_goods_name_upper_idx '
+            'ON main_goods (UPPER(name::text) text_pattern_ops)',
+            'DROP INDEX main_goods_name_upper_idx',
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.1.7 on 2026-10-18 14:42
+
+from django.db import migrations, models
+
+
+def copy_messages(apps, schema_editor):
+    """Keeps an id and a status of pickled Twilio responses of sent SMS."""
+    SMSLog = apps.get_model("main", "SMSLog")
+    for log in SMSLog.objects.only("id", "message").iterator():
+        message = log.message
+        response = {
+            "sid": getattr(message, "sid", None),
+            "status": getattr(message, "status", None),
+            "error_code": getattr(message, "error_code", None),
+        }
+        SMSLog.objects.filter(id=log.id).update(response=response)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_goods_name_lookup_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smslog',
+            name='response',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(copy_messages, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='smslog',
+            name='message',
+        ),
+        migrations.RenameField(
+            model_name='smslog',
+            old_name='response',
+            new_name='message',
+        ),
+        migrations.AddIndex(
+            model_name='smslog',
+            index=models.Index(fields=['user', 'creation_date'], name='main_smslog_user_date_idx'),
+        ),
+    ]
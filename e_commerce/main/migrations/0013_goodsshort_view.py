@@ -0,0 +1,42 @@
+# Generated by Django 3.1.7 on 2026-10-18 14:50
+
+from django.db import migrations
+
+# a card description is one character longer than shown, so a card knows
+# a description was cut
+CREATE_VIEW = [
+    'DROP VIEW main_goodsshort',
+    'CREATE MATERIALIZED VIEW main_goodsshort AS '
+    'SELECT id, name, left(description, 251) AS description, manufacturer, '
+    'tags, rating, price, discount, creation_date, views_counter, in_stock, '
+    'version, search_vector '
+    'FROM main_goods WHERE is_published AND NOT is_archive',
+    # a unique index is required by a concurrent refresh
+    'CREATE UNIQUE INDEX main_goodsshort_id_idx ON main_goodsshort (id)',
+    'CREATE INDEX main_goodsshort_name_id_idx ON main_goodsshort (name, id)',
+    'CREATE INDEX main_goodsshort_tags_idx ON main_goodsshort USING gin (tags)',
+    'CREATE INDEX main_goodsshort_search_idx '
+    'ON main_goodsshort USING gin (search_vector)',
+]
+# the plain view of migration 0004
+DROP_VIEW = [
+    'DROP MATERIALIZED VIEW main_goodsshort',
+    'CREATE VIEW main_goodsshort AS '
+    'SELECT id, name, description, manufacturer, tags, price, creation_date, '
+    'views_counter, in_stock, is_published, is_archive FROM main_goods',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='goodsshort',
+            options={'managed': False, 'ordering': ['name']},
+        ),
+        migrations.RunSQL(CREATE_VIEW, DROP_VIEW),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.7 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_goodsshort_view'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goods',
+            index=models.Index(condition=models.Q(('is_archive', False), ('is_published', True)), fields=['name', 'id'], name='main_goods_catalog_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goods',
+            index=models.Index(condition=models.Q(('is_archive', False), ('is_published', True)), fields=['creation_date', 'id'], name='main_goods_catalog_date_idx'),
+        ),
+    ]
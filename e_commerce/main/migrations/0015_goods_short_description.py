@@ -0,0 +1,49 @@
+# Generated by Django 3.1.7 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+FILL_SHORT_DESCRIPTION = (
+    "UPDATE main_goods SET short_description = CASE "
+    "WHEN length(description) > 250 THEN left(description, 249) || '…' "
+    "ELSE description END"
+)
+
+
+def goods_short_view(description):
+    """Returns statements which create the catalog view with a given card
+    description column and its indexes.
+    """
+    return [
+        'DROP MATERIALIZED VIEW main_goodsshort',
+        'CREATE MATERIALIZED VIEW main_goodsshort AS '
+        f'SELECT id, name, {description}, manufacturer, tags, rating, price, '
+        'discount, creation_date, views_counter, in_stock, version, '
+        'search_vector '
+        'FROM main_goods WHERE is_published AND NOT is_archive',
+        'CREATE UNIQUE INDEX main_goodsshort_id_idx ON main_goodsshort (id)',
+        'CREATE INDEX main_goodsshort_name_id_idx ON main_goodsshort (name, id)',
+        'CREATE INDEX main_goodsshort_tags_idx '
+        'ON main_goodsshort USING gin (tags)',
+        'CREATE INDEX main_goodsshort_search_idx '
+        'ON main_goodsshort USING gin (search_vector)',
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_goods_catalog_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goods',
+            name='short_description',
+            field=models.CharField(blank=True, editable=False, max_length=250),
+        ),
+        migrations.RunSQL(FILL_SHORT_DESCRIPTION, migrations.RunSQL.noop),
+        migrations.RunSQL(
+            goods_short_view('short_description'),
+            goods_short_view('left(description, 251) AS description'),
+        ),
+    ]
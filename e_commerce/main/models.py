@@ -1,15 +1,28 @@
+from typing import Any, Dict
+
 from django.contrib.auth.models import Group, User
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.cache import cache
 from django.core.validators import RegexValidator
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.urls import reverse
-from main.tasks import (send_new_goods_subscribers_notification_task,
-                        send_welcome_email_task)
-from picklefield.fields import PickledObjectField
+from main.caching import bump_catalog_version
+from main.tasks import (generate_thumbnails_task,
+                        notify_new_goods_subscribers_task,
+                        schedule_goods_short_refresh, send_welcome_email_task)
+from main.thumbnails import (THUMBNAIL_FIELDS, is_changed, pending_thumbnails,
+                             store_thumbnails)
 from sorl.thumbnail import ImageField
 
+AVATAR_CACHE_TIMEOUT = 60 * 60 * 24
+# max number of characters of a description shown by goods cards and lists
+SHORT_DESCRIPTION_LENGTH = 250
+
 
 class Seller(models.Model):
     """This class describes how to store and operate data about sellers.
@@ -73,6 +86,64 @@ class Tag(models.Model):
         return f"Tag(name='{self.name}')"
 
 
+def goods_search_vector() -> SearchVector:
+    """This function returns an expression which builds a weighted search
+    document of a good: a name is weighted higher than a description.
+    """
+    return SearchVector("name", weight="A") + SearchVector("description", weight="B")
+
+
+def shorten_description(description: str) -> str:
+    """This function cuts a description to 'SHORT_DESCRIPTION_LENGTH'
+    characters with an ellipsis.
+    """
+    if len(description) <= SHORT_DESCRIPTION_LENGTH:
+        return description
+    return description[: SHORT_DESCRIPTION_LENGTH - 1] + "…"
+
+
+class GoodsQuerySet(models.QuerySet):
+    """This class describes additional operations on a queryset of goods."""
+
+    def update_search_vector(self) -> int:
+        """This method recalculates a stored search document of all goods
+        in a queryset with a single UPDATE statement.
+
+        :return: number of updated rows
+        :rtype: int
+        """
+        return self.update(search_vector=goods_search_vector())
+
+    def listing(self) -> "GoodsQuerySet":
+        """This method makes a queryset of goods lists which doesn't read
+        a long description and a search document. Lists show a short
+        description instead.
+        """
+        return self.defer("description", "search_vector")
+
+    def update_versioned(self, **kwargs) -> int:
+        """This method updates all goods in a queryset like 'update' and also
+        makes cached cards and pages of these goods outdated.
+
+        :return: number of updated rows
+        :rtype: int
+        """
+        rows = self.update(version=F("version") + 1, **kwargs)
+        bump_catalog_version()
+        transaction.on_commit(schedule_goods_short_refresh)
+        return rows
+
+
+class CatalogManager(models.Manager.from_queryset(GoodsQuerySet)):
+    """This class describes a manager of goods shown by the storefront, they
+    are published and not archived. Its queries use partial indexes of
+    these goods.
+    """
+
+    def get_queryset(self) -> GoodsQuerySet:
+        return super().get_queryset().filter(is_published=True, is_archive=False)
+
+
 class Goods(models.Model):
     """This class describes how to store and operate data about goods.
 
@@ -81,6 +152,8 @@ class Goods(models.Model):
     name - a name of a good
     description - a long text description which will be displayed in
     a detailed view
+    short_description - a beginning of a description which is displayed by
+    lists of goods, it is updated on save
     seller - foreign key of a seller of this good
     weight - a weight of a good
     category - foreign key of a category of this good
@@ -93,6 +166,14 @@ class Goods(models.Model):
     image - a photo of this good
     creation_date - a date when a good had been created
     views_counter - a current views counter
+    search_vector - a precomputed full-text search document of a name and
+    a description
+    version - a number which is increased on every change and used in
+    cache keys
+    thumbnails - URLs and dimensions of generated sizes of an image, they are
+    made by a background task after an image is uploaded
+    objects - a manager of all goods
+    catalog - a manager of published goods which are not archived
     """
 
     SIZES = (
@@ -102,6 +183,9 @@ class Goods(models.Model):
     )
     name = models.CharField(max_length=80)
     description = models.TextField()
+    short_description = models.CharField(
+        max_length=SHORT_DESCRIPTION_LENGTH, blank=True, editable=False
+    )
     seller = models.ForeignKey(
         Seller, on_delete=models.CASCADE, verbose_name="the related seller"
     )
@@ -126,9 +210,31 @@ class Goods(models.Model):
     in_stock = models.IntegerField(default=0)
     is_published = models.BooleanField(verbose_name="Опубликован", default=True)
     is_archive = models.BooleanField(verbose_name="В архиве", default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
+
+    objects = GoodsQuerySet.as_manager()
+    catalog = CatalogManager()
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["name", "id"], name="main_goods_name_id_idx"),
+            GinIndex(fields=["search_vector"], name="main_goods_search_idx"),
+            GinIndex(fields=["tags"], name="main_goods_tags_idx"),
+            # partial indexes of goods shown by the storefront
+            models.Index(
+                fields=["name", "id"],
+                name="main_goods_catalog_name_idx",
+                condition=models.Q(is_published=True, is_archive=False),
+            ),
+            models.Index(
+                fields=["creation_date", "id"],
+                name="main_goods_catalog_date_idx",
+                condition=models.Q(is_published=True, is_archive=False),
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -143,6 +249,61 @@ class Goods(models.Model):
             + f"image={self.image or None})"
         )
 
+    def save(self, *args, **kwargs) -> None:
+        """This overridden method saves a good with an increased version and
+        keeps its short description and stored search document in sync with
+        a name and a description. A version of a stored good is increased in
+        DB and read back, so versions set by 'update_versioned' meanwhile
+        aren't written over.
+        """
+        stored = not self._state.adding
+        if stored:
+            self.version = F("version") + 1
+        else:
+            self.version += 1
+        if "description" not in self.get_deferred_fields():
+            self.short_description = shorten_description(self.description)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "version"}
+            if "description" in update_fields:
+                kwargs["update_fields"].add("short_description")
+        super().save(*args, **kwargs)
+        if stored:
+            self.refresh_from_db(fields=["version"])
+        if update_fields is None or {"name", "description"} & set(update_fields):
+            Goods.objects.filter(pk=self.pk).update_search_vector()
+
+    @staticmethod
+    @receiver(post_save, sender="main.Goods")
+    @receiver(post_delete, sender="main.Goods")
+    def invalidate_catalog_pages(sender, instance, **kwargs) -> None:
+        """This method makes cached catalog pages outdated when a good was
+        created, updated or deleted and schedules a refresh of the catalog
+        view after a transaction commits.
+        """
+        bump_catalog_version()
+        transaction.on_commit(schedule_goods_short_refresh)
+
+    @staticmethod
+    @receiver(post_save, sender="main.Goods")
+    @receiver(post_save, sender="main.Profile")
+    def schedule_thumbnails(sender, instance, **kwargs) -> None:
+        """This method resets thumbnails of a good or a profile when its image
+        was uploaded or removed and creates a task which generates them after
+        a transaction commits. Templates show an original image until then.
+        """
+        label = sender._meta.label
+        if not is_changed(instance, label):
+            return
+        image = getattr(instance, THUMBNAIL_FIELDS[label][0])
+        instance.thumbnails = pending_thumbnails(image)
+        store_thumbnails(instance, label)
+        if image:
+            transaction.on_commit(
+                lambda: generate_thumbnails_task.delay(label, instance.pk)
+            )
+
 
 class Subscriptions(models.Model):
     """This class describes how to store and operate data about subscriptions.
@@ -164,7 +325,8 @@ class Subscriptions(models.Model):
         sender: Goods, instance: Goods, created: bool, **kwargs
     ) -> None:
         """This method creates delayed task which sents subscribed users
-        an email about a newly created good.
+        an email about a newly created good. The task is created after
+        a transaction commits, so it always finds the good.
 
         :param sender: Goods class
         :type sender: class 'main.models.Goods'
@@ -175,12 +337,9 @@ class Subscriptions(models.Model):
         :type created: bool
         """
         if created:
-            subscription = Subscriptions.objects.filter(name="New goods").first()
-            if subscription:
-                for profile in Profile.objects.filter(subsciber=subscription):
-                    send_new_goods_subscribers_notification_task.delay(
-                        instance.id, profile.id
-                    )
+            transaction.on_commit(
+                lambda: notify_new_goods_subscribers_task.delay(instance.id)
+            )
 
 
 class Profile(models.Model):
@@ -194,6 +353,7 @@ class Profile(models.Model):
     was confirmed
     birth_date - a bith date of a user
     avatar - user's uploaded profile pic
+    thumbnails - URLs and dimensions of generated sizes of an avatar
     subsciber - a foreign keys of user's subscriptions
     """
 
@@ -212,6 +372,7 @@ class Profile(models.Model):
     )
     birth_date = models.DateField(null=True, blank=True)
     avatar = ImageField(upload_to="user_profile/", verbose_name="Аватар", blank=True)
+    thumbnails = models.JSONField(default=dict, blank=True, editable=False)
     subsciber = models.ManyToManyField(
         Subscriptions, verbose_name="Подписки", blank=True
     )
@@ -224,6 +385,40 @@ class Profile(models.Model):
         """
         return reverse("profile", kwargs={"pk": self.pk})
 
+    @staticmethod
+    def avatar_cache_key(user_id: int) -> str:
+        """This method returns a cache key of a user's avatar.
+
+        :param user_id: id of a user in DB
+        :type user_id: int
+        """
+        return f"avatar_{user_id}"
+
+    @classmethod
+    def get_cached_avatar(cls, user_id: int) -> Dict[str, Any]:
+        """This method returns thumbnails of a user's avatar. They are cached
+        until a profile is saved or new thumbnails are generated.
+
+        :param user_id: id of a user in DB
+        :type user_id: int
+        :return: thumbnails of an avatar or an empty dict
+        :rtype: dict
+        """
+        key = cls.avatar_cache_key(user_id)
+        avatar = cache.get(key)
+        if avatar is None:
+            name, thumbnails = (
+                cls.objects.filter(user_id=user_id)
+                .values_list("avatar", "thumbnails")
+                .first()
+            ) or ("", {})
+            field = cls._meta.get_field("avatar")
+            avatar = thumbnails or pending_thumbnails(
+                field.attr_class(None, field, name)
+            )
+            cache.set(key, avatar, AVATAR_CACHE_TIMEOUT)
+        return avatar
+
     @staticmethod
     @receiver(post_save, sender=User)
     def create_user_profile(
@@ -256,6 +451,14 @@ class Profile(models.Model):
         """
         instance.profile.save()
 
+    @staticmethod
+    @receiver(post_save, sender="main.Profile")
+    def invalidate_cached_avatar(sender, instance, **kwargs) -> None:
+        """This method removes a cached avatar of a user when a Profile object
+        was updated.
+        """
+        cache.delete(Profile.avatar_cache_key(instance.user_id))
+
 
 class SMSLog(models.Model):
     """This class describes how to store and operate data about sent messages
@@ -263,7 +466,7 @@ class SMSLog(models.Model):
 
     user - a foreign key of a user whom SMS was sent
     code - a generated code using for verification
-    message - a server response
+    message - a compact server response with a message id and a status
     creation_date - date and time when a message was sent
     """
 
@@ -272,34 +475,92 @@ class SMSLog(models.Model):
         on_delete=models.CASCADE,
     )
     code = models.PositiveIntegerField()
-    message = PickledObjectField()
+    message = models.JSONField(default=dict)
+    creation_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "creation_date"], name="main_smslog_user_date_idx"
+            ),
+        ]
+
+
+class BulkUpdateJob(models.Model):
+    """This class describes how to store a state of a background update of
+    goods selected in the admin, a task continues a job from its last
+    updated good after a restart.
+
+    STATUSES - a tuple with possible statuses of a job
+    user - a foreign key of a user who started a job
+    title - a name of a job shown in the admin
+    changes - new values of fields of selected goods
+    goods_ids - sorted ids of selected goods
+    total - number of selected goods
+    done - number of updated goods
+    last_pk - id of a last updated good
+    status - a current status of a job
+    creation_date - date and time when a job was started
+    """
+
+    STATUSES = (
+        ("P", "Pending"),
+        ("R", "Running"),
+        ("F", "Finished"),
+        ("E", "Failed"),
+    )
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    title = models.CharField(max_length=120)
+    changes = models.JSONField(default=dict)
+    goods_ids = ArrayField(models.IntegerField(), default=list)
+    total = models.PositiveIntegerField(default=0)
+    done = models.PositiveIntegerField(default=0)
+    last_pk = models.IntegerField(null=True)
+    status = models.CharField(max_length=1, choices=STATUSES, default="P")
     creation_date = models.DateTimeField(auto_now_add=True)
 
+    def __str__(self) -> str:
+        return self.title
+
 
 class GoodsShort(models.Model):
-    """This class describes how to store and operate data about goods.
+    """This class describes a read-only projection of published goods which
+    are not archived. It is a materialized view with only columns of catalog
+    cards, so the catalog doesn't read long descriptions of goods. The view is
+    refreshed by a delayed task after goods are changed.
 
     name - a name of a good
-    description - a long text description which will be displayed in
-    a detailed view
+    short_description - a beginning of a description shown on a card
     manufacturer - a manufacturer of this good
     tags - foreign keys of a tags of this good
+    rating - a current user's rating of a good
     price - a current price
+    discount - a current discount provided by a seller
     creation_date - a date when a good had been created
     views_counter - a current views counter
+    in_stock - number of goods in stock
+    version - a version of a good used in cache keys of cards
+    search_vector - a stored full-text search document of a good
     """
+
     class Meta:
         managed = False
+        ordering = ["name"]
 
     name = models.CharField(max_length=80)
-    description = models.TextField()
+    short_description = models.CharField(max_length=SHORT_DESCRIPTION_LENGTH)
     manufacturer = models.CharField(max_length=80)
     tags = ArrayField(
         models.CharField(max_length=40, blank=True, null=True), blank=True, null=True
     )
+    rating = models.FloatField(default=5.0)
     price = models.FloatField(default=0)
+    discount = models.FloatField(default=0)
     creation_date = models.DateField(verbose_name="Дата создания")
     views_counter = models.IntegerField(default=0)
     in_stock = models.IntegerField(default=0)
-    is_published = models.BooleanField(verbose_name="Опубликован", default=True)
-    is_archive = models.BooleanField(verbose_name="В архиве", default=False)
+    version = models.PositiveIntegerField(default=0)
+    search_vector = SearchVectorField(null=True)
+
+    def __str__(self) -> str:
+        return self.name
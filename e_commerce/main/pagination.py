@@ -0,0 +1,202 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Sequence
+
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Field, Q, QuerySet
+
+
+CURSOR_SALT = "main.pagination.cursor"
+
+
+class InvalidCursor(InvalidPage):
+    """This exception is raised when a provided cursor token can't be decoded."""
+
+
+class KeysetPage:
+    """This class describes one page of objects fetched by a 'KeysetPaginator'.
+
+    object_list - objects of a page
+    paginator - a paginator which produced this page
+    next_cursor - an opaque token for the next page or None
+    previous_cursor - an opaque token for the previous page or None
+    """
+
+    def __init__(
+        self,
+        object_list: List[Any],
+        paginator: "KeysetPaginator",
+        next_cursor: Optional[str],
+        previous_cursor: Optional[str],
+    ) -> None:
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self) -> str:
+        return f"<KeysetPage of {len(self.object_list)} objects>"
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """This class provides a cursor-based (keyset) pagination of a queryset.
+
+    Unlike the default 'Paginator' it never runs 'COUNT(*)' and never uses
+    'OFFSET': every page is fetched with a 'WHERE (ordering) > (cursor)'
+    condition, so any page costs the same as the first one.
+
+    object_list - a queryset to paginate
+    per_page - number of objects displayed on one page
+    ordering - a unique ordering of a queryset, the last field must be unique
+    (usually 'id'), a field may be prefixed with '-' for descending order
+    """
+
+    def __init__(
+        self, object_list: QuerySet, per_page: int, ordering: Sequence[str]
+    ) -> None:
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    def encode_cursor(self, obj: Any) -> str:
+        """This method builds an opaque token from the ordering values
+        of a given object.
+
+        :param obj: an object of a page
+        :type obj: class 'django.db.models.Model'
+        """
+        return self.encode_values(
+            [getattr(obj, field.lstrip("-")) for field in self.ordering]
+        )
+
+    @staticmethod
+    def encode_values(values: List[Any]) -> str:
+        """This method builds a signed token from ordering values, so only
+        cursors issued by the server are accepted and the number of distinct
+        cursors is limited by objects.
+
+        :param values: ordering values of an object
+        :type values: List[Any]
+        """
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        token = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        return signing.Signer(salt=CURSOR_SALT).sign(token)
+
+    def _ordering_fields(self) -> List[Field]:
+        """This method returns model fields or annotations' output fields
+        of the ordering.
+        """
+        annotations = self.object_list.query.annotations
+        opts = self.object_list.model._meta
+        fields = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            if name in annotations:
+                fields.append(annotations[name].output_field)
+            else:
+                fields.append(opts.pk if name == "pk" else opts.get_field(name))
+        return fields
+
+    def decode_cursor(self, token: str) -> List[Any]:
+        """This method restores ordering values from an opaque token. A token
+        must be signed by the server and values are converted by their
+        fields, so a forged token can't reach a query.
+
+        :param token: a token made by 'encode_cursor'
+        :type token: str
+        """
+        try:
+            token = signing.Signer(salt=CURSOR_SALT).unsign(token)
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            values = json.loads(raw)
+        except (signing.BadSignature, binascii.Error, ValueError):
+            raise InvalidCursor("Invalid cursor")
+        if (
+            not isinstance(values, list)
+            or len(values) != len(self.ordering)
+            or not all(isinstance(value, (str, int, float)) for value in values)
+        ):
+            raise InvalidCursor("Invalid cursor")
+        try:
+            values = [
+                field.to_python(value)
+                for field, value in zip(self._ordering_fields(), values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor("Invalid cursor")
+        return values
+
+    def _seek_filter(self, values: List[Any], backwards: bool) -> Q:
+        """This method builds a row comparison '(a, b) > (x, y)' expanded to
+        '(a > x) OR (a = x AND b > y)' which respects mixed sort directions.
+        """
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            descending = field.startswith("-")
+            lookup = "lt" if descending != backwards else "gt"
+            equal = {
+                prev.lstrip("-"): values[index]
+                for index, prev in enumerate(self.ordering[:position])
+            }
+            condition |= Q(**equal, **{f"{name}__{lookup}": values[position]})
+        return condition
+
+    def _order_by(self, backwards: bool) -> List[str]:
+        if not backwards:
+            return list(self.ordering)
+        return [
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        ]
+
+    def page(
+        self, after: Optional[str] = None, before: Optional[str] = None
+    ) -> KeysetPage:
+        """This method returns a page which follows 'after' cursor or precedes
+        'before' cursor. Without cursors it returns the first page.
+
+        :param after: a cursor of the last object of a previous page
+        :type after: str
+        :param before: a cursor of the first object of a next page
+        :type before: str
+        """
+        backwards = bool(before) and not after
+        queryset = self.object_list.order_by(*self._order_by(backwards))
+        token = before if backwards else after
+        if token:
+            queryset = queryset.filter(
+                self._seek_filter(self.decode_cursor(token), backwards)
+            )
+
+        objects = list(queryset[: self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[: self.per_page]
+        if backwards:
+            objects.reverse()
+
+        next_cursor = previous_cursor = None
+        if objects:
+            if has_more or backwards:
+                next_cursor = self.encode_cursor(objects[-1])
+            if (has_more and backwards) or (token and not backwards):
+                previous_cursor = self.encode_cursor(objects[0])
+        return KeysetPage(objects, self, next_cursor, previous_cursor)
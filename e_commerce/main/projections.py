@@ -0,0 +1,44 @@
+from django.apps import apps
+from django.db import connection
+from django_redis import get_redis_connection
+
+from .caching import bump_catalog_version
+
+GOODS_SHORT_REFRESH_KEY = "main:goods_short:refresh_pending"
+# seconds goods writes are collected for before one refresh of the view
+GOODS_SHORT_REFRESH_DELAY = 5
+# a refresh is requested again after it if a scheduled task was lost
+GOODS_SHORT_REFRESH_TIMEOUT = 60 * 5
+
+
+def request_goods_short_refresh() -> bool:
+    """This function marks the 'GoodsShort' materialized view as outdated.
+
+    :return: whether a refresh isn't scheduled yet, so a caller has to
+    schedule it
+    :rtype: bool
+    """
+    return bool(
+        get_redis_connection("default").set(
+            GOODS_SHORT_REFRESH_KEY, 1, nx=True, ex=GOODS_SHORT_REFRESH_TIMEOUT
+        )
+    )
+
+
+def refresh_goods_short(concurrently: bool = True) -> None:
+    """This function reloads published goods to the 'GoodsShort' materialized
+    view and makes cached catalog pages outdated. A pending mark is removed
+    first, so goods written during a refresh request one more refresh.
+
+    :param concurrently: whether the catalog can be read during a refresh,
+    a refresh without it is faster and is used after bulk loads
+    :type concurrently: bool
+    """
+    get_redis_connection("default").delete(GOODS_SHORT_REFRESH_KEY)
+    table = apps.get_model("main.GoodsShort")._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}"
+            f"{table}"
+        )
+    bump_catalog_version()
@@ -0,0 +1,55 @@
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from twilio.rest import Client
+
+# messages sent by 'LocMemBackend', like 'django.core.mail.outbox' in tests
+outbox: List[Dict[str, str]] = []
+
+
+class TwilioBackend:
+    """This class sends SMS through Twilio. A client is made once per
+    process, so its HTTP connections are reused by following messages.
+    """
+
+    def __init__(self) -> None:
+        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOCKEN)
+
+    def send(self, to_number: str, text: str) -> Dict[str, Any]:
+        """This method sends SMS with a text to a phone number.
+
+        :return: a compact gate response with a message id and a status
+        :rtype: dict
+        """
+        message = self.client.messages.create(
+            body=text, from_=settings.TWILIO_PHONE_NUMBER, to=to_number
+        )
+        return {
+            "sid": message.sid,
+            "status": message.status,
+            "error_code": message.error_code,
+        }
+
+
+class LocMemBackend:
+    """This class keeps SMS in the module 'outbox' list instead of sending
+    them. It is used in tests and local development.
+    """
+
+    def send(self, to_number: str, text: str) -> Dict[str, Any]:
+        outbox.append({"to": to_number, "text": text})
+        return {"sid": f"local-{len(outbox)}", "status": "sent", "error_code": None}
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path: str):
+    return import_string(path)()
+
+
+def get_sms_backend():
+    """This function returns an instance of a backend from 'SMS_BACKEND'
+    setting. An instance is made once per process.
+    """
+    return _load_backend(settings.SMS_BACKEND)
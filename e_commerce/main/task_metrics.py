@@ -0,0 +1,196 @@
+import logging
+import math
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from celery.signals import (before_task_publish, task_failure, task_postrun,
+                            task_prerun)
+from django.db import connections
+from django_redis import get_redis_connection
+
+from .metrics import RequestMetrics
+
+logger = logging.getLogger(__name__)
+
+TASK_STATS_KEY = "main:task_stats"
+TASK_STATS_SAMPLES = 1000
+TASK_SAMPLES = ("wait", "runtime", "queries")
+ENQUEUED_AT_HEADER = "enqueued_at"
+
+# a task id: (a UNIX start time, a monotonic start time, an execute wrapper
+# counting queries, a context the wrapper is installed by)
+_running: Dict[str, tuple] = {}
+
+
+def task_stats_key(task_name: str, part: str) -> str:
+    """This function returns a Redis key of samples or counters of a task.
+
+    :param task_name: a name of a task
+    :type task_name: str
+    :param part: 'counts' or one of 'TASK_SAMPLES'
+    :type part: str
+    """
+    return f"{TASK_STATS_KEY}:{task_name}:{part}"
+
+
+def queue_wait(request, started: float) -> Optional[float]:
+    """This function returns seconds a task waited in a queue. A wait of
+    a delayed task is counted from its ETA.
+
+    :param request: a request of a started task
+    :type request: class 'celery.app.task.Context'
+    :param started: a start time of a task as a UNIX timestamp
+    :type started: float
+    """
+    enqueued = getattr(request, ENQUEUED_AT_HEADER, None)
+    if enqueued is None:
+        enqueued = (getattr(request, "headers", None) or {}).get(ENQUEUED_AT_HEADER)
+    if enqueued is None:
+        return None
+    eta = getattr(request, "eta", None)
+    if eta:
+        try:
+            enqueued = max(enqueued, _timestamp(eta))
+        except ValueError:
+            pass
+    return max(started - enqueued, 0.0)
+
+
+def _timestamp(eta) -> float:
+    if isinstance(eta, str):
+        eta = datetime.fromisoformat(eta)
+    return eta.timestamp()
+
+
+def save_task_stats(
+    task_name: str, state: str, samples: Dict[str, float], exception: str = ""
+) -> None:
+    """This function adds samples of a finished task to capped Redis lists,
+    so only the latest 'TASK_STATS_SAMPLES' runs of a task are kept, and
+    counts its final state.
+
+    :param task_name: a name of a task
+    :type task_name: str
+    :param state: a final state of a task like 'SUCCESS' or 'RETRY'
+    :type state: str
+    :param samples: measured values by names from 'TASK_SAMPLES'
+    :type samples: dict
+    :param exception: a name of an exception class of a failed task
+    :type exception: str
+    """
+    pipe = get_redis_connection("default").pipeline()
+    pipe.sadd(TASK_STATS_KEY, task_name)
+    for name, value in samples.items():
+        key = task_stats_key(task_name, name)
+        pipe.lpush(key, value)
+        pipe.ltrim(key, 0, TASK_STATS_SAMPLES - 1)
+    if state:
+        pipe.hincrby(task_stats_key(task_name, "counts"), state, 1)
+    if exception:
+        pipe.hincrby(task_stats_key(task_name, "counts"), f"error:{exception}", 1)
+    pipe.execute()
+
+
+def get_task_stats() -> Dict[str, Dict]:
+    """This function returns kept samples and state counts of all measured
+    tasks.
+
+    :return: samples lists by names from 'TASK_SAMPLES' and 'counts' dict
+    by a task name
+    :rtype: dict
+    """
+    redis = get_redis_connection("default")
+    names = sorted(name.decode() for name in redis.smembers(TASK_STATS_KEY))
+    pipe = redis.pipeline()
+    for name in names:
+        for sample in TASK_SAMPLES:
+            pipe.lrange(task_stats_key(name, sample), 0, -1)
+        pipe.hgetall(task_stats_key(name, "counts"))
+    values = pipe.execute()
+    stats = {}
+    for index, name in enumerate(names):
+        row = values[
+            index * (len(TASK_SAMPLES) + 1) : (index + 1) * (len(TASK_SAMPLES) + 1)
+        ]
+        stats[name] = {
+            sample: [float(value) for value in row[number]]
+            for number, sample in enumerate(TASK_SAMPLES)
+        }
+        stats[name]["counts"] = {
+            state.decode(): int(count) for state, count in row[-1].items()
+        }
+    return stats
+
+
+def reset_task_stats() -> None:
+    redis = get_redis_connection("default")
+    names = [name.decode() for name in redis.smembers(TASK_STATS_KEY)]
+    keys = [
+        task_stats_key(name, part)
+        for name in names
+        for part in (*TASK_SAMPLES, "counts")
+    ]
+    redis.delete(TASK_STATS_KEY, *keys)
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """This function returns a nearest-rank percentile of values.
+
+    :param q: a percentile from 0 to 100
+    :type q: float
+    """
+    if not values:
+        return None
+    ordered: List[float] = sorted(values)
+    return ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)]
+
+
+@before_task_publish.connect
+def stamp_enqueued_at(headers=None, **kwargs):
+    """This function adds a time a task was sent at to its message."""
+    if headers is not None:
+        headers.setdefault(ENQUEUED_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def start_task_measure(task_id=None, task=None, **kwargs):
+    """This function starts counting time and DB queries of a task."""
+    metrics = RequestMetrics()
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(metrics))
+    _running[task_id] = (time.time(), time.perf_counter(), metrics, stack)
+
+
+@task_failure.connect
+def count_task_failure(task_id=None, exception=None, sender=None, **kwargs):
+    """This function counts an exception class of a failed task."""
+    try:
+        save_task_stats(sender.name, "", {}, type(exception).__name__)
+    except Exception:
+        logger.exception("Task stats couldn't be saved")
+
+
+@task_postrun.connect
+def finish_task_measure(task_id=None, task=None, state=None, **kwargs):
+    """This function saves a queue wait, runtime, number of DB queries and
+    a final state of a finished task.
+    """
+    running = _running.pop(task_id, None)
+    if running is None:
+        return
+    started_at, started, metrics, stack = running
+    stack.close()
+    samples = {
+        "runtime": time.perf_counter() - started,
+        "queries": metrics.queries,
+    }
+    wait = queue_wait(task.request, started_at)
+    if wait is not None:
+        samples["wait"] = wait
+    try:
+        save_task_stats(task.name, state or "", samples)
+    except Exception:
+        logger.exception("Task stats couldn't be saved")
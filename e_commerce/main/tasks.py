@@ -1,18 +1,28 @@
-from datetime import datetime, timedelta
-from random import randrange
+from datetime import date, datetime, timedelta
 
-from celery import shared_task
+from celery import group, shared_task
 from celery.utils.log import get_task_logger
 from django.apps import apps
 from django.core.cache import cache
-from django.db import transaction
 
-from .messages import (new_goods_subscribers_notification,
-                       new_goods_subscribers_weekly_notification,
+from .bulk_updates import run_bulk_update
+from .caching import refresh_popular_tags
+from .counters import flush_views_counters
+from .messages import (render_new_goods_digest,
+                       render_new_goods_notification, send_personalized_emails,
                        send_sms_to_number, send_welcome_email)
+from .projections import (GOODS_SHORT_REFRESH_DELAY, refresh_goods_short,
+                          request_goods_short_refresh)
+from .thumbnails import update_thumbnails
+from .verification import get_active_code
 
 logger = get_task_logger(__name__)
 
+NOTIFICATION_CHUNK_SIZE = 500
+DIGEST_CHUNK_SIZE = 500
+DIGEST_TIMEOUT = 60 * 60 * 24 * 7
+DIGEST_LOCK_TIMEOUT = 30 * 60
+
 
 @shared_task
 def send_welcome_email_task(user_id):
@@ -29,56 +39,201 @@ def send_welcome_email_task(user_id):
 
 
 @shared_task
-def send_new_goods_subscribers_notification_task(goods_id, profile_id):
-    """This function gets Goods and Profile objects by a provided IDs and
-    sends to them an email about these Goods. Runs as a delayed task.
+def notify_new_goods_subscribers_task(goods_id):
+    """This function renders an email about new Goods once unless they are
+    hidden from the storefront, splits subscribed users into chunks and
+    creates one delayed task per chunk which sends them the email. Runs as
+    a delayed task.
 
     :param goods_id: id of a goods in DB
     :type goods_id: int
-    :param profile_id: id of a profile in DB
-    :type profile_id: int
     """
-    logger.info("Sending new goods email")
-    profile_model = apps.get_model("main.Profile")
-    profile = profile_model.objects.get(id=profile_id)
+    logger.info(f"Notifying subscribers about new goods with id {goods_id}")
     goods_model = apps.get_model("main.Goods")
-    goods = goods_model.objects.get(id=goods_id)
-    new_goods_subscribers_notification(goods, profile)
+    goods = goods_model.catalog.filter(id=goods_id).first()
+    if not goods:
+        return
+    subscription_model = apps.get_model("main.Subscriptions")
+    subscription = subscription_model.objects.filter(name="New goods").first()
+    if not subscription:
+        return
+    email = render_new_goods_notification(goods)
+    profile_model = apps.get_model("main.Profile")
+    profile_ids = (
+        profile_model.objects.filter(subsciber=subscription)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    chunk = []
+    for profile_id in profile_ids.iterator():
+        chunk.append(profile_id)
+        if len(chunk) == NOTIFICATION_CHUNK_SIZE:
+            send_new_goods_subscribers_notification_task.delay(email, chunk)
+            chunk = []
+    if chunk:
+        send_new_goods_subscribers_notification_task.delay(email, chunk)
 
 
 @shared_task
-def send_weekly_new_goods_email_task():
-    """This function sends an email about new goods which was added this week
-    to subscribed users. Runs as a scheduled task.
+def send_new_goods_subscribers_notification_task(email, profile_ids):
+    """This function sends a rendered email about new Goods to profiles with
+    provided IDs. Runs as a delayed task.
+
+    :param email: rendered 'subject', 'text' and 'html' of an email
+    :type email: Dict[str, str]
+    :param profile_ids: ids of profiles in DB
+    :type profile_ids: List[int]
+    """
+    logger.info(f"Sending new goods email to {len(profile_ids)} subscribers")
+    profile_model = apps.get_model("main.Profile")
+    profiles = (
+        profile_model.objects.filter(id__in=profile_ids)
+        .select_related("user")
+        .order_by("id")
+    )
+    return send_personalized_emails(email, profiles)
+
+
+def digest_key(run_id, *parts):
+    """This function returns a cache key of a state of a digest run.
+
+    :param run_id: a unique name of a digest run
+    :type run_id: str
+    """
+    return ":".join(["main:digest", run_id, *map(str, parts)])
+
+
+def prepare_new_goods_digest(goods_ids=None):
+    """This function materializes new published goods, renders a digest email
+    once and splits subscribed users into chunks.
+
+    :param goods_ids: ids of goods to send, goods of a last week by default
+    :type goods_ids: List[int]
+    :return: a rendered email and chunks of profile ids or None if there
+    are no goods
+    :rtype: Dict[str, Any]
     """
-    logger.info("Sending new goods email")
-    start_date = datetime.now() - timedelta(days=7)
     goods_model = apps.get_model("main.Goods")
-    new_goods = goods_model.objects.filter(creation_date__gte=start_date)
+    if goods_ids is None:
+        start_date = datetime.now() - timedelta(days=7)
+        new_goods = goods_model.catalog.filter(creation_date__gte=start_date)
+    else:
+        new_goods = goods_model.catalog.filter(id__in=goods_ids)
+    new_goods = list(new_goods.values("id", "name", "short_description"))
+    if not new_goods:
+        return None
+
     subscription_model = apps.get_model("main.Subscriptions")
-    subscription = subscription_model.objects.get(name="New goods")
     profile_model = apps.get_model("main.Profile")
+    profile_ids = list(
+        profile_model.objects.filter(
+            subsciber__in=subscription_model.objects.filter(name="New goods")
+        )
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    return {
+        "email": render_new_goods_digest(new_goods),
+        "chunks": [
+            profile_ids[start : start + DIGEST_CHUNK_SIZE]
+            for start in range(0, len(profile_ids), DIGEST_CHUNK_SIZE)
+        ],
+    }
+
 
-    if new_goods:
-        for profile in profile_model.objects.filter(subsciber=subscription):
-            new_goods_subscribers_weekly_notification(new_goods, profile)
+@shared_task(acks_late=True)
+def send_new_goods_digest_task(run_id, goods_ids=None):
+    """This function sends an email about new goods to subscribed users in
+    parallel chunks. A rendered email and a plan of chunks are stored by
+    'run_id', so a repeated run only sends chunks which weren't sent yet.
+    Runs as a delayed task.
+
+    :param run_id: a unique name of a digest run
+    :type run_id: str
+    :param goods_ids: ids of goods to send, goods of a last week by default
+    :type goods_ids: List[int]
+    """
+    logger.info(f"Starting new goods digest '{run_id}'")
+    digest = cache.get(digest_key(run_id))
+    if digest is None:
+        digest = prepare_new_goods_digest(goods_ids)
+        if digest is None:
+            logger.info("There are no new goods for a digest")
+            return
+        # a concurrent run may have stored its plan first
+        cache.add(digest_key(run_id), digest, DIGEST_TIMEOUT)
+        digest = cache.get(digest_key(run_id))
+
+    done_keys = [digest_key(run_id, "done", i) for i in range(len(digest["chunks"]))]
+    done = cache.get_many(done_keys)
+    pending = [i for i, key in enumerate(done_keys) if key not in done]
+    logger.info(f"Digest '{run_id}': {len(pending)} of {len(done_keys)} chunks left")
+    if pending:
+        group(send_new_goods_digest_chunk_task.s(run_id, i) for i in pending)()
+
+
+@shared_task(acks_late=True)
+def send_new_goods_digest_chunk_task(run_id, index):
+    """This function sends a digest email to one chunk of subscribed users
+    and marks the chunk as sent. Runs as a delayed task.
+
+    :param run_id: a unique name of a digest run
+    :type run_id: str
+    :param index: a number of a chunk
+    :type index: int
+    """
+    digest = cache.get(digest_key(run_id))
+    if digest is None:
+        logger.warning(f"Digest '{run_id}' has expired")
+        return 0
+    done_key = digest_key(run_id, "done", index)
+    lock_key = digest_key(run_id, "lock", index)
+    if cache.get(done_key) or not cache.add(lock_key, 1, DIGEST_LOCK_TIMEOUT):
+        return 0
+
+    try:
+        profile_model = apps.get_model("main.Profile")
+        profiles = profile_model.objects.filter(
+            id__in=digest["chunks"][index]
+        ).select_related("user")
+        sent = send_personalized_emails(digest["email"], profiles)
+    except Exception:
+        cache.delete(lock_key)
+        raise
+    cache.set(done_key, 1, DIGEST_TIMEOUT)
+    logger.info(f"Digest '{run_id}': chunk {index} sent to {sent} users")
+    return sent
+
+
+@shared_task
+def send_weekly_new_goods_email_task():
+    """This function sends an email about new goods which was added this week
+    to subscribed users. A digest run is named by a week, so a repeated start
+    in the same week doesn't resend emails. Runs as a scheduled task.
+    """
+    year, week, _ = date.today().isocalendar()
+    send_new_goods_digest_task.delay(f"weekly-{year}-{week}")
 
 
 @shared_task
 def send_sms_verification_code(profile_id):
-    """This function generates a confirmation 4-digit code, sends it to
-    a provided user, and saves a server's response to a DB. Runs as a
-    delayed task.
+    """This function sends an active verification code to a phone number of
+    a provided profile and saves a gate response to a DB. A code is made by
+    'main.verification.request_code', so repeated tasks send the same code.
+    Runs as a delayed task.
 
     :param profile_id: id of a profile in DB
     :type profile_id: int
     """
-    verification_code = randrange(1000, 9999, 1)
+    verification_code = get_active_code(profile_id)
+    if verification_code is None:
+        logger.info(f"Verification code of profile {profile_id} has expired")
+        return
     profile_model = apps.get_model("main.Profile")
-    profile = profile_model.objects.get(id=profile_id)
+    profile = profile_model.objects.select_related("user").get(id=profile_id)
     logger.info(f"Sending verification code via SMS to number: {profile.phone_number}")
     message = send_sms_to_number(
-        profile.phone_number, f"Virification code: {verification_code}"
+        profile.phone_number, f"Verification code: {verification_code}"
     )
     smslog_model = apps.get_model("main.SMSLog")
     smslog_model.objects.create(
@@ -89,19 +244,16 @@ def send_sms_verification_code(profile_id):
 @shared_task
 def save_views_counter_cached_values_task():
     """This function gets goods views counters from a cache and saves them
-    to DB. Runs as a scheduled task.
+    to DB. Only goods viewed since a previous run are saved. Runs as
+    a scheduled task.
     """
     logger.info("Saving goods views counters to DB")
-    goods_model = apps.get_model("main.Goods")
-    goods_ids = list(goods_model.objects.all().values_list("id", flat=True))
-    cache_keys = [f"views_counter_{gid}" for gid in goods_ids]
-    cache_values = cache.get_many(cache_keys)
-    with transaction.atomic():
-        for key, value in cache_values.items():
-            goods = goods_model.objects.get(id=int(key.replace("views_counter_", "")))
-            goods.views_counter = value
-            goods.save()
-    logger.info("Saved goods views counters successfully")
+    report = flush_views_counters()
+    logger.info(
+        f"Saved {report['flushed']} goods views counters "
+        + f"in {report['duration']:.3f}s"
+    )
+    return report
 
 
 @shared_task
@@ -115,4 +267,60 @@ def create_new_tags_task(tags_list):
     tags_model = apps.get_model("main.Tag")
     for tag_name in tags_list:
         tags_model.objects.get_or_create(name=tag_name)
+    refresh_popular_tags()
     logger.info("Finish task: create_new_tags_task")
+
+
+@shared_task
+def refresh_popular_tags_task():
+    """This function recalculates popular tags of the catalog and puts them
+    to a cache. Runs as a scheduled task.
+    """
+    logger.info("Refreshing popular tags")
+    refresh_popular_tags()
+
+
+def schedule_goods_short_refresh():
+    """This function creates a delayed task which refreshes the catalog view
+    unless one is already scheduled, so goods written within a delay are
+    shown after a single refresh.
+    """
+    if request_goods_short_refresh():
+        refresh_goods_short_task.apply_async(countdown=GOODS_SHORT_REFRESH_DELAY)
+
+
+@shared_task
+def refresh_goods_short_task():
+    """This function reloads published goods to the catalog view. Runs as
+    a delayed task after goods are changed.
+    """
+    logger.info("Refreshing the catalog view")
+    refresh_goods_short()
+
+
+@shared_task
+def generate_thumbnails_task(model_label, pk):
+    """This function generates thumbnails of an uploaded image of a good or
+    a profile, so templates never resize images. Runs as a delayed task.
+
+    :param model_label: a label of a model like 'main.Goods'
+    :type model_label: str
+    :param pk: id of an object in DB
+    :type pk: int
+    """
+    logger.info(f"Generating thumbnails of {model_label} with id {pk}")
+    update_thumbnails(model_label, pk)
+
+
+@shared_task(acks_late=True)
+def bulk_update_goods_task(job_id):
+    """This function updates goods selected in the admin by chunks and saves
+    its progress, a restarted task skips updated chunks. Runs as a delayed
+    task.
+
+    :param job_id: id of a 'BulkUpdateJob' in DB
+    :type job_id: int
+    """
+    logger.info(f"Starting bulk update of goods {job_id}")
+    updated = run_bulk_update(job_id)
+    logger.info(f"Bulk update {job_id}: {updated} goods updated")
@@ -83,3 +83,20 @@ def current_time(format_string):
     :type format_string: str
     """
     return datetime.datetime.now().strftime(format_string)
+
+
+@register.simple_tag(takes_context=True)
+def query_replace(context, **kwargs):
+    """This function returns the current request's query string with
+    given parameters replaced. A parameter with None value is removed.
+
+    :param context: a template context with a request
+    :type context: class 'django.template.context.RequestContext'
+    """
+    query = context["request"].GET.copy()
+    for key, value in kwargs.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return query.urlencode()
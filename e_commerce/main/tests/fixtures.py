@@ -10,8 +10,15 @@ class GoodsFactory(factory.Factory):
 
     name = "Test good"
     description = "Test good description"
-    seller = Seller.objects.get(name="Bobbie's Bits")
-    category = Category.objects.get(name="Tools")
+    seller = factory.LazyFunction(
+        lambda: Seller.objects.get_or_create(
+            name="Bobbie's Bits",
+            defaults={"rating": 5, "email": "bobby@bobbiesbits.com"},
+        )[0]
+    )
+    category = factory.LazyFunction(
+        lambda: Category.objects.get_or_create(name="Tools")[0]
+    )
     manufacturer = "Test manufacturer"
     price = 50
-    creation_date = datetime.now()
+    creation_date = factory.LazyFunction(datetime.now)
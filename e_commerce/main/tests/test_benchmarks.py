@@ -0,0 +1,76 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django_redis import get_redis_connection
+from main.benchmarks import (BENCHMARK_REDIS_DB, LISTING_SIZES,
+                             find_regressions, isolated_redis, load_baseline,
+                             measure_listing, run_benchmarks)
+from main.caching import bump_catalog_version, get_catalog_version
+from main.models import Seller
+
+
+class BenchmarksTestCase(TestCase):
+    """This class serves for testing that the main views do not run more
+    queries than the stored benchmark baseline.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        call_command(
+            "maketestdata",
+            goods=60,
+            users=5,
+            subscribers=2,
+            tags=10,
+            description_paragraphs=3,
+            stdout=StringIO(),
+        )
+
+    def test_no_query_regressions(self):
+        Seller.objects.create(
+            name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+        )
+        user = User.objects.create_superuser(
+            "benchmark", "benchmark@example.com", "benchmark"
+        )
+
+        results = run_benchmarks(user, repeat=2)
+
+        for name, result in results.items():
+            self.assertIn(result["status"], (200, 302), name)
+        self.assertEqual(find_regressions(results, load_baseline()), [])
+
+    def test_listing_reads_less(self):
+        """This method testing that listing projections fetch the same goods
+        with fewer bytes than full rows.
+        """
+        results = measure_listing(repeat=1)
+
+        for size in LISTING_SIZES:
+            full_rows = results[f"full_rows_{size}"]
+            for name in ("listing", "goods_short"):
+                result = results[f"{name}_{size}"]
+                self.assertEqual(result["rows"], full_rows["rows"], name)
+                self.assertLess(result["bytes"], full_rows["bytes"] / 2, name)
+
+    def test_isolated_redis(self):
+        """This method testing that benchmark caches don't reach caches of
+        a site and tasks queued after a commit are counted.
+        """
+        version = get_catalog_version()
+        with isolated_redis(BENCHMARK_REDIS_DB):
+            bump_catalog_version()
+            self.assertEqual(get_catalog_version(), 1)
+            Seller.objects.create(
+                name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+            )
+            user = User.objects.create_superuser(
+                "benchmark", "benchmark@example.com", "benchmark"
+            )
+            results = run_benchmarks(user, repeat=1)
+        self.assertEqual(get_catalog_version(), version)
+        self.assertGreater(results["goods_create_submit"]["tasks"], 0)
+        with isolated_redis(BENCHMARK_REDIS_DB):
+            self.assertEqual(get_redis_connection("default").dbsize(), 0)
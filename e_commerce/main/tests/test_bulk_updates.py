@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from main import admin
+from main.bulk_updates import run_bulk_update
+from main.caching import get_catalog_version
+from main.models import BulkUpdateJob, Goods, GoodsQuerySet
+from main.tests.fixtures import GoodsFactory
+
+
+class BulkUpdateTestCase(TestCase):
+    """This class serves for testing admin actions which update large
+    selections of goods in background jobs.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        for name in ("Hammer", "Hammer", "Hammer", "Saw"):
+            GoodsFactory(name=name).save()
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@qa.com", "admin")
+        )
+        self.changelist = reverse("admin:main_goods_changelist")
+
+    def archive_hammers(self):
+        return self.client.post(
+            f"{self.changelist}?q=Hammer",
+            {
+                "action": "make_archive",
+                "select_across": "1",
+                "index": "0",
+                "_selected_action": Goods.objects.values_list("pk", flat=True),
+            },
+            follow=True,
+        )
+
+    def test_small_selection_is_updated_at_once(self):
+        """This method testing that a few selected goods are updated within
+        a request.
+        """
+        self.archive_hammers()
+        self.assertEqual(Goods.objects.filter(is_archive=True).count(), 3)
+        self.assertNotIn(admin.BULK_UPDATE_SESSION_KEY, self.client.session)
+
+    @mock.patch.object(admin, "BULK_UPDATE_SYNC_LIMIT", 2)
+    @mock.patch.object(admin.bulk_update_goods_task, "delay")
+    def test_large_selection_is_updated_by_chunks(self, delay):
+        """This method testing that a background job updates only filtered
+        goods by chunks, makes cached pages outdated once per chunk and its
+        progress is shown in the admin.
+        """
+        response = self.archive_hammers()
+        self.assertContains(response, "goods will be updated in background")
+        self.assertFalse(Goods.objects.filter(is_archive=True).exists())
+        (job_id,) = self.client.session[admin.BULK_UPDATE_SESSION_KEY]
+        self.assertEqual(BulkUpdateJob.objects.get(pk=job_id).total, 3)
+
+        response = self.client.get(self.changelist)
+        self.assertContains(response, "0 of 3 goods are updated.")
+
+        versions = dict(Goods.objects.values_list("pk", "version"))
+        catalog_version = get_catalog_version()
+        self.assertEqual(run_bulk_update(job_id, chunk_size=2), 3)
+        self.assertEqual(get_catalog_version(), catalog_version + 2)
+        for goods in Goods.objects.all():
+            archived = goods.name == "Hammer"
+            self.assertEqual(goods.is_archive, archived)
+            self.assertEqual(goods.version, versions[goods.pk] + archived)
+        self.assertEqual(run_bulk_update(job_id, chunk_size=2), 0)
+
+        response = self.client.get(self.changelist)
+        self.assertContains(response, "3 goods were updated.")
+        self.assertEqual(self.client.session[admin.BULK_UPDATE_SESSION_KEY], [])
+
+    @mock.patch.object(admin, "BULK_UPDATE_SYNC_LIMIT", 2)
+    @mock.patch.object(admin.bulk_update_goods_task, "delay")
+    def test_failed_job_is_reported(self, delay):
+        """This method testing that a failed job keeps its progress, isn't
+        run again and is reported in the admin like a lost job.
+        """
+        self.archive_hammers()
+        (job_id,) = self.client.session[admin.BULK_UPDATE_SESSION_KEY]
+
+        update_versioned = GoodsQuerySet.update_versioned
+        chunks = []
+
+        def lose_second_chunk(queryset, **changes):
+            chunks.append(queryset)
+            if len(chunks) > 1:
+                raise RuntimeError("Lost")
+            return update_versioned(queryset, **changes)
+
+        with mock.patch.object(
+            GoodsQuerySet,
+            "update_versioned",
+            autospec=True,
+            side_effect=lose_second_chunk,
+        ), self.assertRaises(RuntimeError):
+            run_bulk_update(job_id, chunk_size=2)
+        job = BulkUpdateJob.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.done), ("E", 2))
+        self.assertEqual(job.last_pk, job.goods_ids[1])
+        self.assertEqual(Goods.objects.filter(is_archive=True).count(), 2)
+        self.assertEqual(run_bulk_update(job_id, chunk_size=2), 0)
+
+        session = self.client.session
+        session[admin.BULK_UPDATE_SESSION_KEY] = [job_id, job_id + 1]
+        session.save()
+        response = self.client.get(self.changelist)
+        self.assertContains(response, "failed after 2 of 3 goods were updated.")
+        self.assertContains(response, f"Background update #{job_id + 1} was lost.")
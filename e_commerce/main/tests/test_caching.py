@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.timezone import now
+from main.caching import (POPULAR_TAGS_KEY, compute_popular_tags,
+                          get_popular_tags)
+from main.models import Category, Goods, Seller
+
+
+class PopularTagsTestCase(TestCase):
+    """This class serves for testing the cached popular tags of the catalog."""
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        seller = Seller.objects.create(
+            name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+        )
+        category = Category.objects.create(name="Tools")
+        for tags in (["New", "Hammer"], ["Hammer"], ["Hammer", "New"], ["Sale", ""]):
+            Goods.objects.create(
+                name="Hammer",
+                description="Iron hammer. Keep your fingers safe",
+                seller=seller,
+                category=category,
+                manufacturer="Noname",
+                tags=tags,
+                creation_date=now(),
+            )
+        cache.delete(POPULAR_TAGS_KEY)
+
+    def test_tags_ordered_by_usage(self):
+        """This method testing that tags are counted across goods, ordered by
+        usage and limited.
+        """
+        self.assertEqual(
+            compute_popular_tags(limit=2),
+            [{"name": "Hammer", "count": 3}, {"name": "New", "count": 2}],
+        )
+
+    def test_tags_are_cached(self):
+        """This method testing that popular tags are calculated only once."""
+        get_popular_tags()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_popular_tags()), 3)
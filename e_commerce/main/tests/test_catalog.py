@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from main.models import Goods
+from main.tests.fixtures import GoodsFactory
+
+
+class CatalogManagerTestCase(TestCase):
+    """This class serves for testing the 'Goods.catalog' manager and partial
+    indexes of its queries.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        today = date.today()
+        for number in range(60):
+            GoodsFactory(
+                name=f"Goods {number:02}",
+                creation_date=today - timedelta(days=number),
+                is_published=number % 3 != 1,
+                is_archive=number % 3 == 2,
+            ).save()
+
+    def assertUsesIndex(self, queryset, index):
+        """This method checks that a plan of a queryset scans an index when
+        sequential scans are expensive like in a big table.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Goods._meta.db_table}")
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        self.assertIn(index, queryset.explain())
+
+    def test_only_published_goods(self):
+        """This method testing that the manager skips unpublished and archived
+        goods.
+        """
+        self.assertEqual(Goods.objects.count(), 60)
+        self.assertEqual(Goods.catalog.count(), 20)
+        self.assertFalse(
+            Goods.catalog.filter(is_published=False).exists()
+            or Goods.catalog.filter(is_archive=True).exists()
+        )
+
+    def test_name_ordering_uses_partial_index(self):
+        """This method testing that a catalog page is read from the partial
+        index in the name order.
+        """
+        queryset = Goods.catalog.order_by("name", "id")[:9]
+        self.assertUsesIndex(queryset, "main_goods_catalog_name_idx")
+
+    def test_creation_date_range_uses_partial_index(self):
+        """This method testing that goods of a week, like in weekly digests,
+        are found by the partial index.
+        """
+        queryset = Goods.catalog.filter(
+            creation_date__gte=date.today() - timedelta(days=7)
+        ).values("id", "name", "short_description")
+        self.assertUsesIndex(queryset, "main_goods_catalog_date_idx")
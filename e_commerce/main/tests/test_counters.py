@@ -0,0 +1,76 @@
+from threading import Thread
+
+from django.test import TestCase
+from django.utils.timezone import now
+from django_redis import get_redis_connection
+from main.counters import (DIRTY_VIEWS_COUNTERS_KEY, flush_views_counters,
+                           record_view, views_delta_key)
+from main.models import Category, Goods, Seller
+
+
+class FlushViewsCountersTestCase(TestCase):
+    """This class serves for testing saving of cached views counters to DB."""
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        seller = Seller.objects.create(
+            name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+        )
+        category = Category.objects.create(name="Tools")
+        self.goods = [
+            Goods.objects.create(
+                name=f"Hammer {number}",
+                description="Iron hammer. Keep your fingers safe",
+                seller=seller,
+                category=category,
+                manufacturer="Noname",
+                creation_date=now(),
+            )
+            for number in range(3)
+        ]
+        delta_keys = [views_delta_key(goods.id) for goods in self.goods]
+        get_redis_connection("default").delete(DIRTY_VIEWS_COUNTERS_KEY, *delta_keys)
+
+    def test_flush_viewed_goods_only(self):
+        """This method testing that only viewed goods are saved and
+        the dirty set is emptied.
+        """
+        record_view(self.goods[0])
+        record_view(self.goods[0])
+        record_view(self.goods[2])
+
+        report = flush_views_counters(chunk_size=1)
+
+        self.assertEqual(report["flushed"], 2)
+        self.assertEqual(
+            list(
+                Goods.objects.order_by("name").values_list("views_counter", flat=True)
+            ),
+            [2, 0, 1],
+        )
+        self.assertFalse(
+            get_redis_connection("default").exists(DIRTY_VIEWS_COUNTERS_KEY)
+        )
+
+    def test_concurrent_views_are_not_lost(self):
+        """This method testing that views counted from many threads while
+        counters are being flushed are all saved to DB.
+        """
+        goods = self.goods[1]
+        threads_number, views_per_thread = 16, 250
+
+        def hammer():
+            for _ in range(views_per_thread):
+                record_view(goods)
+
+        threads = [Thread(target=hammer) for _ in range(threads_number)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            flush_views_counters()
+        for thread in threads:
+            thread.join()
+        flush_views_counters()
+
+        goods.refresh_from_db()
+        self.assertEqual(goods.views_counter, threads_number * views_per_thread)
@@ -0,0 +1,133 @@
+import io
+import json
+from unittest import mock
+
+from django.test import TestCase
+from main import importer
+from main.models import Category, Goods, Seller, Tag
+
+
+@mock.patch.object(importer.refresh_popular_tags_task, "delay")
+@mock.patch.object(importer.send_new_goods_digest_task, "delay")
+class ImportGoodsTestCase(TestCase):
+    """This class serves for testing the bulk import of goods."""
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        self.seller = Seller.objects.create(
+            name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+        )
+        Category.objects.create(name="Tools")
+        Tag.objects.create(name="Hammer")
+
+    def test_csv_import(self, digest_delay, tags_delay):
+        """This method testing that valid rows of a CSV file are created in
+        chunks, invalid rows are reported and side effects run once.
+        """
+        stream = io.StringIO(
+            "name,description,category,manufacturer,tags,price,discount,in_stock\n"
+            'Hammer,Iron hammer,Tools,Noname,"Hammer,New",10,5,3\n'
+            "Saw,Sharp saw,Tools,Noname,New,20,95,1\n"
+            "Axe,Heavy axe,Weapons,Noname,,30,0,1\n"
+            "Nails,Box of nails,,Noname,Sale,1,,100\n"
+            "Drill,Cordless drill,Tools,Noname,New,50,10,2\n"
+        )
+
+        with self.assertNumQueries(14):
+            report = importer.import_goods(stream, "csv", self.seller, chunk_size=2)
+
+        self.assertEqual(
+            (report["read"], report["created"], report["invalid"]), (5, 3, 2)
+        )
+        self.assertEqual([line for line, errors in report["errors"]], [3, 4])
+        self.assertIn("discount", report["errors"][0][1])
+        self.assertIn("category", report["errors"][1][1])
+        self.assertEqual(
+            list(Goods.objects.values_list("name", "in_stock", "discount")),
+            [("Drill", 2, 10.0), ("Hammer", 3, 5.0), ("Nails", 100, 0.0)],
+        )
+        self.assertFalse(Goods.objects.filter(search_vector=None).exists())
+        self.assertEqual(
+            sorted(Tag.objects.values_list("name", flat=True)),
+            ["Hammer", "New", "Sale"],
+        )
+        tags_delay.assert_called_once_with()
+        digest_delay.assert_called_once()
+        self.assertEqual(
+            sorted(digest_delay.call_args.args[1]),
+            sorted(Goods.objects.values_list("id", flat=True)),
+        )
+
+    def test_jsonl_import(self, digest_delay, tags_delay):
+        """This method testing that JSONL rows with lists of tags are imported."""
+        rows = [
+            {"name": "Hammer", "description": "Iron", "manufacturer": "Noname"},
+            {
+                "name": "Saw",
+                "description": "Sharp",
+                "manufacturer": "Noname",
+                "tags": ["New", "Sale"],
+                "category": "Tools",
+                "price": 20,
+            },
+        ]
+        stream = io.StringIO("\n".join(json.dumps(row) for row in rows) + "\n")
+
+        report = importer.import_goods(stream, "jsonl", self.seller)
+
+        self.assertEqual(report["created"], 2)
+        self.assertEqual(Goods.objects.get(name="Saw").tags, ["New", "Sale"])
+        self.assertEqual(Goods.objects.get(name="Saw").category.name, "Tools")
+
+    def test_nothing_imported(self, digest_delay, tags_delay):
+        """This method testing that no side effects run without new goods."""
+        report = importer.import_goods(
+            io.StringIO("name,description\n"), "csv", self.seller
+        )
+        self.assertEqual(report["created"], 0)
+        digest_delay.assert_not_called()
+        tags_delay.assert_not_called()
+
+    def test_broken_jsonl_lines(self, digest_delay, tags_delay):
+        """This method testing that malformed lines and values which aren't
+        objects are reported like invalid rows.
+        """
+        stream = io.StringIO(
+            '{"name": "Hammer", "description": "Iron", "manufacturer": "Noname"}\n'
+            '{"name": "Saw", \n'
+            '["Axe"]\n'
+            "42\n"
+        )
+
+        report = importer.import_goods(stream, "jsonl", self.seller)
+
+        self.assertEqual(
+            (report["read"], report["created"], report["invalid"]), (4, 1, 3)
+        )
+        self.assertEqual([line for line, errors in report["errors"]], [2, 3, 4])
+        self.assertIn("Invalid JSON", report["errors"][0][1]["__all__"][0]["message"])
+
+    def test_failed_import_is_finished(self, digest_delay, tags_delay):
+        """This method testing that goods of committed chunks get their tags,
+        cache invalidation and a digest when a later chunk fails.
+        """
+        stream = io.StringIO(
+            "name,description,manufacturer,tags\n"
+            "Hammer,Iron hammer,Noname,New\n"
+            "Saw,Sharp saw,Noname,Sale\n"
+        )
+        calls = iter(
+            [Goods.objects.bulk_create, mock.Mock(side_effect=RuntimeError("Lost"))]
+        )
+        with mock.patch.object(
+            Goods.objects, "bulk_create", side_effect=lambda goods: next(calls)(goods)
+        ), mock.patch.object(importer, "bump_catalog_version") as bump:
+            with self.assertRaises(RuntimeError):
+                importer.import_goods(stream, "csv", self.seller, chunk_size=1)
+
+        self.assertEqual(list(Goods.objects.values_list("name", flat=True)), ["Hammer"])
+        self.assertTrue(Tag.objects.filter(name="New").exists())
+        self.assertFalse(Tag.objects.filter(name="Sale").exists())
+        bump.assert_called_once_with()
+        digest_delay.assert_called_once()
+        tags_delay.assert_called_once_with()
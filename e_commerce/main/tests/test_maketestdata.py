@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TestCase
+from main.models import Goods, Profile, Tag
+
+
+class MakeTestDataTestCase(TestCase):
+    """This class serves for testing the synthetic data generator."""
+
+    options = {"goods": 300, "users": 40, "subscribers": 15, "tags": 30, "seed": 7}
+
+    def make(self, **options):
+        call_command("maketestdata", stdout=StringIO(), **{**self.options, **options})
+
+    def snapshot(self):
+        return list(
+            Goods.objects.order_by("id").values_list(
+                "name", "tags", "views_counter", "price", "category__name"
+            )
+        )
+
+    def test_generated_data(self):
+        """This method testing that requested numbers of rows are created with
+        filled search documents and subscribed profiles.
+        """
+        self.make()
+
+        self.assertEqual(Goods.objects.count(), 300)
+        self.assertEqual(Tag.objects.count(), 30)
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(Profile.objects.count(), 40)
+        self.assertEqual(
+            Profile.objects.filter(subsciber__name="New goods").count(), 15
+        )
+        self.assertFalse(Goods.objects.filter(search_vector=None).exists())
+        self.assertTrue(
+            User.objects.get(username="loadtest7_0").check_password("testpassword")
+        )
+
+    def test_same_seed_same_data(self):
+        """This method testing that a seed fully defines generated data."""
+        with transaction.atomic():
+            self.make()
+            first = self.snapshot()
+            transaction.set_rollback(True)
+        self.make()
+        self.assertEqual(self.snapshot(), first)
+
+        with self.assertRaises(CommandError):
+            self.make(goods=0)
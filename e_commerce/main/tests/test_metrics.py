@@ -0,0 +1,119 @@
+from io import StringIO
+
+from chat.throttling import REJECTED_FRAMES_KEY, save_rejected_frames
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from django_redis import get_redis_connection
+from main.metrics import (MetricsRecorder, RequestMetrics, get_metrics,
+                          render_prometheus, reset_metrics, summarize)
+from main.models import Category, Goods, Seller
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_FLUSH_INTERVAL=0)
+class MetricsMiddlewareTestCase(TestCase):
+    """This class serves for testing metrics of views collected by
+    the metrics middleware.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        self.goods = Goods.objects.create(
+            name="Hammer",
+            description="Iron hammer. Keep your fingers safe",
+            seller=Seller.objects.create(
+                name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+            ),
+            category=Category.objects.create(name="Tools"),
+            manufacturer="Noname",
+            creation_date=now(),
+        )
+        reset_metrics()
+        self.addCleanup(reset_metrics)
+
+    def test_metrics_by_view(self):
+        """This method testing that requests are aggregated by URL names with
+        their queries, cache lookups and template render time.
+        """
+        self.client.get(reverse("goods-detail", args=[self.goods.id]))
+        self.client.get(reverse("goods-detail", args=[self.goods.id]))
+
+        report = summarize(get_metrics())
+
+        detail = report["goods-detail"]
+        self.assertEqual(detail["requests"], 2)
+        self.assertGreater(detail["avg_queries"], 0)
+        self.assertGreater(detail["avg_template_ms"], 0)
+        self.assertLessEqual(detail["avg_db_ms"], detail["avg_ms"])
+
+    def test_metrics_endpoint(self):
+        """This method testing that metrics are available only for staff in
+        the Prometheus text format.
+        """
+        self.client.get(reverse("goods-detail", args=[self.goods.id]))
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 302)
+
+        staff = User.objects.create_user("staff", password="staff", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'e_commerce_request_duration_seconds_count{view="goods-detail"} 1',
+            response.content.decode(),
+        )
+
+    def test_rejected_chat_frames(self):
+        """This method testing that numbers of rejected chat frames are shown
+        by the metrics endpoint and the 'viewmetrics' command.
+        """
+        redis = get_redis_connection("default")
+        redis.delete(REJECTED_FRAMES_KEY)
+        self.addCleanup(redis.delete, REJECTED_FRAMES_KEY)
+        save_rejected_frames({"rate_limited": 2, "busy": 1})
+        staff = User.objects.create_user("staff", password="staff", is_staff=True)
+        self.client.force_login(staff)
+
+        text = self.client.get(reverse("metrics")).content.decode()
+
+        self.assertIn("# TYPE e_commerce_chat_rejected_frames_total counter\n", text)
+        self.assertIn(
+            'e_commerce_chat_rejected_frames_total{reason="rate_limited"} 2\n', text
+        )
+        self.assertIn('e_commerce_chat_rejected_frames_total{reason="busy"} 1\n', text)
+
+        out = StringIO()
+        call_command("viewmetrics", stdout=out)
+        self.assertRegex(out.getvalue(), r"rate_limited +2\n")
+        self.assertRegex(out.getvalue(), r"busy +1\n")
+
+
+class PrometheusFormatTestCase(TestCase):
+    """This class serves for testing the Prometheus text format of metrics."""
+
+    def test_cumulative_buckets(self):
+        """This method testing that histogram buckets are cumulative and
+        counters are rendered by views.
+        """
+        recorder = MetricsRecorder(interval=60)
+        for queries in (0, 3, 300):
+            metrics = RequestMetrics()
+            metrics.queries = queries
+            metrics.cache_hits = 1
+            recorder.record("goods", 0.02, metrics)
+        values = {
+            tuple(field.split("|")): value for field, value in recorder.values.items()
+        }
+
+        text = render_prometheus(values)
+
+        self.assertIn('e_commerce_db_queries_bucket{view="goods",le="0"} 1\n', text)
+        self.assertIn('e_commerce_db_queries_bucket{view="goods",le="5"} 2\n', text)
+        self.assertIn('e_commerce_db_queries_bucket{view="goods",le="200"} 2\n', text)
+        self.assertIn('e_commerce_db_queries_bucket{view="goods",le="+Inf"} 3\n', text)
+        self.assertIn('e_commerce_db_queries_sum{view="goods"} 303\n', text)
+        self.assertIn('e_commerce_cache_hits_total{view="goods"} 3\n', text)
+        self.assertIn("# TYPE e_commerce_cache_misses_total counter\n", text)
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse_lazy
+from django.utils.timezone import now
+from django_redis import get_redis_connection
+from main.models import Category, Goods, GoodsShort, Seller
+from main.projections import GOODS_SHORT_REFRESH_KEY, refresh_goods_short
+from main.tasks import refresh_goods_short_task, schedule_goods_short_refresh
+
+
+class GoodsShortTestCase(TestCase):
+    """This class serves for testing the 'GoodsShort' materialized view of
+    the catalog and its delayed refresh.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        get_redis_connection("default").delete(GOODS_SHORT_REFRESH_KEY)
+        self.addCleanup(get_redis_connection("default").delete, GOODS_SHORT_REFRESH_KEY)
+        seller = Seller.objects.create(
+            name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+        )
+        category = Category.objects.create(name="Tools")
+        self.goods = {
+            name: Goods.objects.create(
+                name=name,
+                description="Iron hammer. " * 30,
+                seller=seller,
+                category=category,
+                manufacturer="Noname",
+                creation_date=now(),
+                is_published=is_published,
+                is_archive=is_archive,
+            )
+            for name, is_published, is_archive in (
+                ("Hammer", True, False),
+                ("Draft", False, False),
+                ("Archived", True, True),
+            )
+        }
+
+    def test_only_published_goods(self):
+        """This method testing that the view has only published goods which
+        are not archived and short descriptions.
+        """
+        refresh_goods_short()
+        hammer = GoodsShort.objects.get()
+        self.assertEqual(hammer.pk, self.goods["Hammer"].pk)
+        self.assertEqual(len(hammer.short_description), 250)
+
+        response = self.client.get(reverse_lazy("goods"))
+        self.assertEqual(
+            [goods.name for goods in response.context["goods_list"]], ["Hammer"]
+        )
+        self.assertContains(response, hammer.short_description)
+        self.assertTrue(hammer.short_description.endswith("…"))
+
+    def test_refresh_is_debounced(self):
+        """This method testing that a burst of goods writes schedules one
+        refresh and writes after a refresh schedule another one.
+        """
+        with mock.patch.object(refresh_goods_short_task, "apply_async") as apply:
+            for _ in range(3):
+                schedule_goods_short_refresh()
+            apply.assert_called_once()
+
+            refresh_goods_short_task()
+            schedule_goods_short_refresh()
+            self.assertEqual(apply.call_count, 2)
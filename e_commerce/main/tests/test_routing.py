@@ -0,0 +1,66 @@
+from inspect import signature
+from unittest import mock
+
+from django.test import SimpleTestCase
+from e_commerce.celery import app
+from main import tasks
+
+EXPECTED_QUEUES = {
+    "interactive": [tasks.send_sms_verification_code, tasks.send_welcome_email_task],
+    "bulk": [
+        tasks.notify_new_goods_subscribers_task,
+        tasks.send_new_goods_subscribers_notification_task,
+        tasks.send_weekly_new_goods_email_task,
+        tasks.send_new_goods_digest_task,
+        tasks.send_new_goods_digest_chunk_task,
+        tasks.generate_thumbnails_task,
+        tasks.bulk_update_goods_task,
+    ],
+    "maintenance": [
+        tasks.save_views_counter_cached_values_task,
+        tasks.refresh_goods_short_task,
+        tasks.refresh_popular_tags_task,
+        tasks.create_new_tags_task,
+    ],
+}
+
+
+class TaskRoutingTestCase(SimpleTestCase):
+    """This class serves for testing that tasks are sent to queues of their
+    workers.
+    """
+
+    def test_tasks_land_on_queues(self):
+        """This method testing that every task is published to its queue with
+        the queue's routing key.
+        """
+        for queue, queue_tasks in EXPECTED_QUEUES.items():
+            for task in queue_tasks:
+                with self.subTest(task=task.name), mock.patch.object(
+                    app.amqp, "send_task_message"
+                ) as send:
+                    args = [1] * len(signature(task.run).parameters)
+                    task.apply_async(args)
+                    sent_to = send.call_args.kwargs["queue"]
+                    self.assertEqual(sent_to.name, queue)
+                    self.assertEqual(sent_to.routing_key, queue)
+
+    def test_every_task_is_routed(self):
+        """This method testing that no task of the project falls back to
+        the default queue.
+        """
+        routed = {task.name for queue in EXPECTED_QUEUES.values() for task in queue}
+        project_tasks = {name for name in app.tasks if name.startswith("main.")}
+        self.assertEqual(project_tasks, routed)
+        self.assertEqual(set(app.conf.task_routes), routed)
+
+    def test_sms_codes_go_first(self):
+        """This method testing that SMS codes have the highest priority,
+        which is 0 for the Redis broker.
+        """
+        with mock.patch.object(app.amqp, "send_task_message") as send:
+            tasks.send_sms_verification_code.delay(1)
+            tasks.send_welcome_email_task.delay(1)
+        sms, welcome = (call.kwargs["priority"] for call in send.call_args_list)
+        self.assertEqual(sms, 0)
+        self.assertGreater(welcome, sms)
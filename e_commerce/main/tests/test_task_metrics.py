@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from types import SimpleNamespace
+
+from celery.signals import task_failure
+from django.core.management import call_command
+from django.test import TestCase
+from main.task_metrics import (get_task_stats, percentile, queue_wait,
+                               reset_task_stats)
+from main.tasks import refresh_popular_tags_task, send_welcome_email_task
+
+
+class TaskMetricsTestCase(TestCase):
+    """This class serves for testing metrics of Celery tasks collected by
+    task signals.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        reset_task_stats()
+        self.addCleanup(reset_task_stats)
+
+    def test_task_runs_are_measured(self):
+        """This method testing that runtime, DB queries and final states of
+        tasks are saved by task names.
+        """
+        refresh_popular_tags_task.apply()
+        refresh_popular_tags_task.apply()
+        task_failure.send(
+            sender=send_welcome_email_task, task_id="1", exception=ValueError()
+        )
+
+        stats = get_task_stats()
+
+        refresh = stats["main.tasks.refresh_popular_tags_task"]
+        self.assertEqual(refresh["counts"], {"SUCCESS": 2})
+        self.assertEqual(len(refresh["runtime"]), 2)
+        self.assertEqual(refresh["queries"], [1.0, 1.0])
+        welcome = stats["main.tasks.send_welcome_email_task"]
+        self.assertEqual(welcome["counts"], {"error:ValueError": 1})
+
+        out = StringIO()
+        call_command("celerystats", task="refresh", stdout=out)
+        self.assertIn("refresh_popular_tags_task", out.getvalue())
+        self.assertNotIn("send_welcome_email_task", out.getvalue())
+
+    def test_queue_wait(self):
+        """This method testing that a queue wait is counted from a time
+        a task was sent at or from its ETA.
+        """
+        now = datetime.now().astimezone()
+        sent = SimpleNamespace(enqueued_at=now.timestamp() - 3, eta=None)
+        delayed = SimpleNamespace(
+            enqueued_at=now.timestamp() - 3,
+            eta=(now - timedelta(seconds=1)).isoformat(),
+        )
+
+        self.assertAlmostEqual(queue_wait(sent, now.timestamp()), 3)
+        self.assertAlmostEqual(queue_wait(delayed, now.timestamp()), 1)
+        self.assertIsNone(queue_wait(SimpleNamespace(), now.timestamp()))
+
+    def test_percentile(self):
+        """This method testing nearest-rank percentiles."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([5], 95), 5)
+        self.assertIsNone(percentile([], 50))
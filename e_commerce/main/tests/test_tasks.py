@@ -0,0 +1,144 @@
+from unittest import mock
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase
+from django.utils.timezone import now
+from main import tasks
+from main.models import Category, Goods, Seller, Subscriptions
+
+
+class NewGoodsNotificationTestCase(TestCase):
+    """This class serves for testing the fan-out of a new goods notification
+    to subscribed users.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        subscription, created = Subscriptions.objects.get_or_create(name="New goods")
+        self.profile_ids = []
+        for number in range(5):
+            user = User.objects.create_user(f"user{number}", f"user{number}@qa.com")
+            user.profile.subsciber.add(subscription)
+            self.profile_ids.append(user.profile.id)
+        User.objects.create_user("unsubscribed", "unsubscribed@qa.com")
+        self.goods = Goods.objects.create(
+            name="Hammer",
+            description="Iron hammer. Keep your fingers safe",
+            seller=Seller.objects.create(
+                name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+            ),
+            category=Category.objects.create(name="Tools"),
+            manufacturer="Noname",
+            creation_date=now(),
+        )
+
+    @mock.patch.object(tasks, "NOTIFICATION_CHUNK_SIZE", 2)
+    @mock.patch.object(tasks.send_new_goods_subscribers_notification_task, "delay")
+    def test_subscribers_are_chunked(self, delay):
+        """This method testing that an email is rendered once and one task
+        is created per chunk of subscribers.
+        """
+        with mock.patch.object(
+            tasks,
+            "render_new_goods_notification",
+            wraps=tasks.render_new_goods_notification,
+        ) as render:
+            tasks.notify_new_goods_subscribers_task(self.goods.id)
+        render.assert_called_once_with(self.goods)
+        email = delay.call_args_list[0].args[0]
+        self.assertIn("Hammer", email["html"])
+        self.assertEqual(
+            [call.args for call in delay.call_args_list],
+            [
+                (email, self.profile_ids[0:2]),
+                (email, self.profile_ids[2:4]),
+                (email, self.profile_ids[4:]),
+            ],
+        )
+
+    @mock.patch.object(tasks.send_new_goods_subscribers_notification_task, "delay")
+    def test_hidden_goods_are_not_sent(self, delay):
+        """This method testing that no chunks are created for archived goods."""
+        Goods.objects.filter(pk=self.goods.pk).update(is_archive=True)
+        tasks.notify_new_goods_subscribers_task(self.goods.id)
+        delay.assert_not_called()
+
+    def test_chunk_is_sent_with_constant_queries(self):
+        """This method testing that a chunk is loaded with one query and
+        every subscriber gets a personal email.
+        """
+        email = tasks.render_new_goods_notification(self.goods)
+        with self.assertNumQueries(1):
+            tasks.send_new_goods_subscribers_notification_task(email, self.profile_ids)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].to, ["user0@qa.com"])
+        self.assertIn("Привет, user0!", mail.outbox[0].body)
+        self.assertIn("Привет, user0!", mail.outbox[0].alternatives[0][0])
+        self.assertIn("Hammer", mail.outbox[0].alternatives[0][0])
+
+
+class NewGoodsDigestTestCase(TestCase):
+    """This class serves for testing the resumable digest of new goods."""
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        subscription, created = Subscriptions.objects.get_or_create(name="New goods")
+        for number in range(5):
+            user = User.objects.create_user(f"user{number}", f"user{number}@qa.com")
+            user.profile.subsciber.add(subscription)
+        seller = Seller.objects.create(
+            name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+        )
+        for name in ("Hammer", "Nails"):
+            Goods.objects.create(
+                name=name,
+                description=f"{name} description",
+                seller=seller,
+                manufacturer="Noname",
+                creation_date=now(),
+            )
+        self.run_id = f"test-{uuid4()}"
+
+    def start_digest(self):
+        """This method starts a digest run and returns numbers of chunks
+        which it dispatched.
+        """
+        with mock.patch.object(tasks, "group") as group:
+            tasks.send_new_goods_digest_task(self.run_id)
+        if not group.called:
+            return []
+        return [signature.args[1] for signature in group.call_args.args[0]]
+
+    @mock.patch.object(tasks, "DIGEST_CHUNK_SIZE", 2)
+    def test_digest_is_sent_once(self):
+        """This method testing that every subscriber gets one digest with all
+        new goods and a repeated run sends nothing.
+        """
+        chunks = self.start_digest()
+        self.assertEqual(chunks, [0, 1, 2])
+        for index in chunks:
+            tasks.send_new_goods_digest_chunk_task(self.run_id, index)
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn("Привет, user3!", mail.outbox[3].alternatives[0][0])
+        self.assertIn("Nails description", mail.outbox[3].alternatives[0][0])
+        self.assertEqual(self.start_digest(), [])
+        self.assertEqual(tasks.send_new_goods_digest_chunk_task(self.run_id, 0), 0)
+
+    @mock.patch.object(tasks, "DIGEST_CHUNK_SIZE", 2)
+    def test_digest_resumes_failed_chunks(self):
+        """This method testing that a repeated run sends only chunks which
+        failed in a previous run.
+        """
+        chunks = self.start_digest()
+        tasks.send_new_goods_digest_chunk_task(self.run_id, chunks[0])
+        with mock.patch.object(
+            tasks, "send_personalized_emails", side_effect=ConnectionError
+        ):
+            with self.assertRaises(ConnectionError):
+                tasks.send_new_goods_digest_chunk_task(self.run_id, chunks[1])
+
+        self.assertEqual(self.start_digest(), [1, 2])
+        self.assertEqual(len(mail.outbox), 2)
@@ -0,0 +1,123 @@
+import io
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from main.models import Goods, Profile
+from main.tasks import generate_thumbnails_task
+from main.tests.fixtures import GoodsFactory
+from main.thumbnails import store_thumbnails
+from PIL import Image
+
+
+def image_file(width, height, mode="RGBA"):
+    """This function returns a PNG image of a size as an uploaded file."""
+    output = io.BytesIO()
+    Image.new(mode, (width, height), "red").save(output, "PNG")
+    return ContentFile(output.getvalue())
+
+
+class ThumbnailsTestCase(TestCase):
+    """This class serves for testing thumbnails generated by background tasks
+    and the 'makethumbnails' command.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        patcher = mock.patch.object(generate_thumbnails_task, "delay")
+        self.delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_goods(self, width=800, height=600):
+        goods = GoodsFactory()
+        goods.image.save("photo.png", image_file(width, height), save=False)
+        goods.save()
+        return goods
+
+    def test_goods_thumbnails(self):
+        """This method testing that an uploaded photo is shown as is until
+        a task makes its sizes in JPEG and WebP.
+        """
+        goods = self.make_goods()
+        goods.refresh_from_db()
+        self.assertEqual(
+            goods.thumbnails,
+            {"source": goods.image.name, "original": goods.image.url},
+        )
+
+        version = goods.version
+        generate_thumbnails_task(Goods._meta.label, goods.pk)
+
+        goods.refresh_from_db()
+        self.assertEqual(goods.version, version + 1)
+        for size, width, height in (("catalog", 197, 148), ("detail", 533, 400)):
+            thumbnail = goods.thumbnails[size]
+            self.assertEqual((thumbnail["width"], thumbnail["height"]), (width, height))
+            self.assertTrue(thumbnail["url"].endswith(f"/{size}.jpg"))
+            self.assertTrue(thumbnail["webp"].endswith(f"/{size}.webp"))
+            name = thumbnail["webp"][len("/media/") :]
+            with default_storage.open(name) as webp:
+                self.assertEqual(Image.open(webp).format, "WEBP")
+
+    def test_avatar_thumbnails(self):
+        """This method testing that avatars are cropped to squares and new
+        thumbnails replace a cached avatar.
+        """
+        user = User.objects.create_user("ringo", password="ringo")
+        cache.delete(Profile.avatar_cache_key(user.id))
+        profile = user.profile
+        profile.avatar.save("ringo.png", image_file(300, 100), save=True)
+        self.assertNotIn("avatar", Profile.get_cached_avatar(user.id))
+
+        generate_thumbnails_task(Profile._meta.label, profile.pk)
+
+        avatar = Profile.get_cached_avatar(user.id)
+        self.assertEqual(
+            (avatar["avatar"]["width"], avatar["avatar"]["height"]), (40, 40)
+        )
+        self.assertEqual(
+            (avatar["profile"]["width"], avatar["profile"]["height"]), (200, 200)
+        )
+
+    def test_changed_image_is_not_overwritten(self):
+        """This method testing that thumbnails of a replaced image are not
+        stored.
+        """
+        goods = self.make_goods()
+        stale = Goods.objects.get(pk=goods.pk)
+        goods.image.save("other.png", image_file(10, 10), save=True)
+
+        stale.thumbnails = {"source": stale.image.name}
+        self.assertFalse(store_thumbnails(stale, Goods._meta.label))
+        goods.refresh_from_db()
+        self.assertEqual(goods.thumbnails["source"], goods.image.name)
+
+    def test_makethumbnails_backfill(self):
+        """This method testing that the command makes thumbnails of existing
+        images only once.
+        """
+        goods = self.make_goods(100, 100)
+        GoodsFactory().save()
+        Goods.objects.filter(pk=goods.pk).update(thumbnails={})
+
+        out = StringIO()
+        call_command("makethumbnails", model="goods", workers=1, stdout=out)
+        self.assertIn("Thumbnails were made for 1 objects.", out.getvalue())
+        goods.refresh_from_db()
+        self.assertEqual(goods.thumbnails["detail"]["height"], 100)
+
+        out = StringIO()
+        call_command("makethumbnails", workers=1, stdout=out)
+        self.assertIn("Thumbnails are up to date.", out.getvalue())
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+from main import sms
+from main.models import SMSLog
+from main.tasks import send_sms_verification_code
+from main.verification import (check_code, get_active_code, request_code,
+                               verification_key)
+
+
+@override_settings(SMS_BACKEND="main.sms.LocMemBackend")
+class PhoneVerificationTestCase(TestCase):
+    """This class serves for testing phone number verification codes."""
+
+    def setUp(self):
+        """This method provides a test data setup for test cases."""
+        self.user = User.objects.create_user("bobby", password="bobby")
+        self.profile = self.user.profile
+        self.profile.phone_number = "+79990000000"
+        self.profile.save()
+        self.clear_codes()
+        self.addCleanup(self.clear_codes)
+        sms.outbox.clear()
+
+    def clear_codes(self):
+        get_redis_connection("default").delete(
+            *(
+                verification_key(self.profile.id, part)
+                for part in ("code", "cooldown", "attempts")
+            )
+        )
+
+    def test_one_active_code(self):
+        """This method testing that a code is sent once in a cooldown and
+        a resent code is the same.
+        """
+        self.assertTrue(request_code(self.profile.id))
+        code = get_active_code(self.profile.id)
+        self.assertFalse(request_code(self.profile.id))
+
+        get_redis_connection("default").delete(
+            verification_key(self.profile.id, "cooldown")
+        )
+        self.assertTrue(request_code(self.profile.id))
+        self.assertEqual(get_active_code(self.profile.id), code)
+        self.assertTrue(1000 <= code <= 9999)
+
+    def test_check_code(self):
+        """This method testing that a right code is used up and a code is
+        dropped after too many wrong attempts.
+        """
+        request_code(self.profile.id)
+        code = get_active_code(self.profile.id)
+        wrong = 1000 if code != 1000 else 1001
+
+        self.assertFalse(check_code(self.profile.id, wrong))
+        self.assertTrue(check_code(self.profile.id, code))
+        self.assertIsNone(get_active_code(self.profile.id))
+        self.assertFalse(check_code(self.profile.id, code))
+
+        self.clear_codes()
+        request_code(self.profile.id)
+        code = get_active_code(self.profile.id)
+        for _ in range(3):
+            check_code(self.profile.id, wrong, max_attempts=3)
+        self.assertFalse(check_code(self.profile.id, code, max_attempts=3))
+
+    def test_page_reload_sends_one_sms(self):
+        """This method testing that reloading the confirmation page sends
+        one SMS which confirms a phone number.
+        """
+        self.client.force_login(self.user)
+        with mock.patch.object(send_sms_verification_code, "delay") as delay:
+            for _ in range(3):
+                self.client.get(reverse("phone-confirmation"))
+        delay.assert_called_once_with(self.profile.id)
+
+        send_sms_verification_code(self.profile.id)
+        code = get_active_code(self.profile.id)
+        self.assertEqual(
+            sms.outbox, [{"to": "+79990000000", "text": f"Verification code: {code}"}]
+        )
+        log = SMSLog.objects.get(user=self.user)
+        self.assertEqual(log.message["status"], "sent")
+
+        response = self.client.post(reverse("phone-confirmation"), {"code": code})
+        self.assertRedirects(response, reverse("phone-confirmed"))
+        self.profile.refresh_from_db()
+        self.assertTrue(self.profile.is_phone_confirmed)
@@ -1,8 +1,16 @@
+import base64
+import json
+from unittest import mock
+from uuid import uuid4
+
 from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse_lazy
 from django.utils.timezone import now
-from main.models import Category, Goods, Seller, Subscriptions
+from main.models import Category, Goods, Profile, Seller, Subscriptions
+from main.pagination import KeysetPaginator
+from main.projections import refresh_goods_short
 
 
 class GoodsListTestCase(TestCase):
@@ -18,6 +26,275 @@ class GoodsListTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
 
 
+class GoodsListPaginationTestCase(TestCase):
+    """This class serves for testing the cursor-based pagination of the
+    'GoodsList' class-based view.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for view's test cases."""
+        self.client = Client()
+        seller = Seller.objects.create(
+            name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+        )
+        category = Category.objects.create(name="Tools")
+        for number in range(12):
+            Goods.objects.create(
+                name=f"Hammer {number % 4}",
+                description="Iron hammer. Keep your fingers safe",
+                seller=seller,
+                category=category,
+                manufacturer="Noname",
+                creation_date=now(),
+            )
+        self.ordered_ids = list(
+            Goods.objects.order_by("name", "id").values_list("id", flat=True)
+        )
+        refresh_goods_short()
+
+    def test_next_and_previous_pages(self):
+        """This method testing that 'after' and 'before' cursors walk through
+        all goods in the (name, id) order without gaps and duplicates.
+        """
+        first = self.client.get(reverse_lazy("goods"))
+        first_page = first.context["page_obj"]
+        self.assertEqual([goods.id for goods in first_page], self.ordered_ids[:9])
+        self.assertFalse(first_page.has_previous())
+        self.assertTrue(first_page.has_next())
+
+        second = self.client.get(
+            reverse_lazy("goods"), {"after": first_page.next_cursor}
+        )
+        second_page = second.context["page_obj"]
+        self.assertEqual([goods.id for goods in second_page], self.ordered_ids[9:])
+        self.assertFalse(second_page.has_next())
+
+        back = self.client.get(
+            reverse_lazy("goods"), {"before": second_page.previous_cursor}
+        )
+        self.assertEqual(
+            [goods.id for goods in back.context["page_obj"]], self.ordered_ids[:9]
+        )
+
+    def test_invalid_cursor(self):
+        """This method testing that a broken cursor responds with 404."""
+        response = self.client.get(reverse_lazy("goods"), {"after": "broken"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_forged_cursor(self):
+        """This method testing that a cursor which wasn't signed by the server
+        responds with 404.
+        """
+        token = base64.urlsafe_b64encode(json.dumps(["Hammer", 1]).encode())
+        response = self.client.get(reverse_lazy("goods"), {"after": token.decode()})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_of_wrong_types(self):
+        """This method testing that a well-formed cursor with values of wrong
+        types responds with 404 instead of failing in a query.
+        """
+        for values, params in (
+            (["Hammer", "abc"], {}),
+            (["Hammer", {}], {}),
+            ([None, 1], {}),
+            (["abc", 1], {"search": "hammer"}),
+        ):
+            token = KeysetPaginator.encode_values(values)
+            with self.subTest(values=values):
+                response = self.client.get(
+                    reverse_lazy("goods"), {"after": token, **params}
+                )
+                self.assertEqual(response.status_code, 404)
+
+
+class GoodsListCacheTestCase(TestCase):
+    """This class serves for testing the cache of anonymous catalog pages and
+    goods cards.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for view's test cases."""
+        self.client = Client()
+        self.goods = Goods.objects.create(
+            name="Hammer",
+            description="Iron hammer. Keep your fingers safe",
+            seller=Seller.objects.create(
+                name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+            ),
+            category=Category.objects.create(name="Tools"),
+            manufacturer="Noname",
+            creation_date=now(),
+        )
+        refresh_goods_short()
+
+    def test_anonymous_page_is_cached(self):
+        """This method testing that a repeated anonymous request doesn't
+        query DB.
+        """
+        first = self.client.get(reverse_lazy("goods"))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse_lazy("goods"))
+        self.assertEqual(first.content, second.content)
+
+    def test_unknown_params_are_not_cached(self):
+        """This method testing that pages with parameters which the catalog
+        doesn't read, repeated parameters, search results and tags which
+        aren't popular aren't put to a cache.
+        """
+        for params in (
+            {"junk": "1"},
+            {
+                "after": [
+                    KeysetPaginator.encode_values(["A", 1]),
+                    KeysetPaginator.encode_values(["B", 2]),
+                ]
+            },
+            {"search": uuid4().hex},
+            {"tag": uuid4().hex},
+        ):
+            with self.subTest(params=params), mock.patch.object(
+                cache, "set"
+            ) as cache_set:
+                response = self.client.get(reverse_lazy("goods"), params)
+                self.assertEqual(response.status_code, 200)
+                keys = [call.args[0] for call in cache_set.call_args_list]
+                self.assertFalse(
+                    [key for key in keys if key.startswith("main:catalog_page")]
+                )
+
+    def test_changed_goods_are_shown(self):
+        """This method testing that a changed good is shown instead of
+        a cached page and a cached card once the catalog view is refreshed.
+        """
+        self.client.get(reverse_lazy("goods"))
+        self.goods.description = "Steel hammer"
+        self.goods.save()
+        refresh_goods_short()
+        response = self.client.get(reverse_lazy("goods"))
+        self.assertContains(response, "Steel hammer")
+
+        Goods.objects.filter(pk=self.goods.pk).update_versioned(name="Big hammer")
+        refresh_goods_short()
+        response = self.client.get(reverse_lazy("goods"))
+        self.assertContains(response, "Big hammer")
+
+        # an instance loaded before the update gets a version not used yet
+        self.goods.description = "Golden hammer"
+        self.goods.save()
+        refresh_goods_short()
+        response = self.client.get(reverse_lazy("goods"))
+        self.assertContains(response, "Golden hammer")
+
+
+class GoodsTagFilterTestCase(TestCase):
+    """This class serves for testing the 'tag' parameter of the 'GoodsList'
+    class-based view.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for view's test cases."""
+        self.client = Client()
+        seller = Seller.objects.create(
+            name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+        )
+        category = Category.objects.create(name="Tools")
+        self.goods = {
+            name: Goods.objects.create(
+                name=name,
+                description="Iron hammer. Keep your fingers safe",
+                seller=seller,
+                category=category,
+                manufacturer="Noname",
+                tags=tags,
+                creation_date=now(),
+            )
+            for name, tags in (
+                ("Hammer", ["New", "Tools"]),
+                ("Nails", ["Tools"]),
+                ("Teddy", ["New", "For Kids"]),
+            )
+        }
+        refresh_goods_short()
+
+    def filtered_names(self, params):
+        """This method returns names of goods shown by the catalog for given
+        query parameters.
+        """
+        response = self.client.get(reverse_lazy("goods"), params)
+        return [goods.name for goods in response.context["goods_list"]]
+
+    def test_all_tags(self):
+        """This method testing that goods must have all given tags by default."""
+        self.assertEqual(self.filtered_names({"tag": ["New", "Tools"]}), ["Hammer"])
+
+    def test_any_tag(self):
+        """This method testing that goods may have any of given tags with
+        'match=any'.
+        """
+        self.assertEqual(
+            self.filtered_names({"tag": ["For Kids", "Tools"], "match": "any"}),
+            ["Hammer", "Nails", "Teddy"],
+        )
+
+    def test_unknown_tag(self):
+        """This method testing that an unknown tag gives an empty catalog."""
+        self.assertEqual(self.filtered_names({"tag": "Missing"}), [])
+
+
+class GoodsSearchTestCase(TestCase):
+    """This class serves for testing the 'search' parameter of the 'GoodsList'
+    class-based view.
+    """
+
+    def setUp(self):
+        """This method provides a test data setup for view's test cases."""
+        self.client = Client()
+        seller = Seller.objects.create(
+            name="Bobbie's Bits", rating=5, email="bobby@bobbiesbits.com"
+        )
+        category = Category.objects.create(name="Tools")
+        self.in_description = Goods.objects.create(
+            name="Nails",
+            description="Use them with a hammer",
+            seller=seller,
+            category=category,
+            manufacturer="Noname",
+            creation_date=now(),
+        )
+        self.in_name = Goods.objects.create(
+            name="Hammer",
+            description="Iron tool. Keep your fingers safe",
+            seller=seller,
+            category=category,
+            manufacturer="Noname",
+            creation_date=now(),
+        )
+        Goods.objects.create(
+            name="Saw",
+            description="Sharp saw",
+            seller=seller,
+            category=category,
+            manufacturer="Noname",
+            creation_date=now(),
+        )
+        refresh_goods_short()
+
+    def test_search_vector_is_stored_on_save(self):
+        """This method testing that a saved good has a search document."""
+        self.in_name.refresh_from_db()
+        self.assertIn("hammer", self.in_name.search_vector)
+
+    def test_name_match_ranks_higher(self):
+        """This method testing that goods matched by a name go before goods
+        matched by a description.
+        """
+        response = self.client.get(reverse_lazy("goods"), {"search": "hammer"})
+        self.assertEqual(
+            [goods.id for goods in response.context["goods_list"]],
+            [self.in_name.id, self.in_description.id],
+        )
+
+
 class GoodsDetailTestCase(TestCase):
     """This class serves for testing the 'GoodsDetail' class-based view."""
 
@@ -48,6 +325,20 @@ class GoodsDetailTestCase(TestCase):
         )
         self.assertEqual(response.status_code, 200)
 
+    def test_hidden_goods_not_found(self):
+        """This method testing that unpublished and archived goods respond
+        with 404.
+        """
+        for changes in ({"is_published": False}, {"is_archive": True}):
+            with self.subTest(**changes):
+                Goods.objects.filter(pk=self.goods.pk).update(
+                    **{"is_published": True, "is_archive": False, **changes}
+                )
+                response = self.client.get(
+                    reverse_lazy("goods-detail", kwargs={"pk": self.goods.id})
+                )
+                self.assertEqual(response.status_code, 404)
+
 
 class GoodsCreateTestCase(TestCase):
     """This class serves for testing the 'GoodsCreate' class-based view."""
@@ -120,6 +411,37 @@ class ProfileUpdateTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
 
 
+class AvatarContextProcessorTestCase(TestCase):
+    """This class serves for testing the 'avatar' context processor."""
+
+    def setUp(self):
+        """This method provides a test data setup for view's test cases."""
+        self.client = Client()
+        self.user = User.objects.create_user("john", "lennon@qa.com", "johnpassword")
+        self.client.login(username="john", password="johnpassword")
+        cache.delete(Profile.avatar_cache_key(self.user.id))
+
+    def test_avatar_is_cached(self):
+        """This method testing that a profile is queried only by a first
+        rendered page and a profile update invalidates a cached avatar.
+        """
+        response = self.client.get(reverse_lazy("goods"))
+        self.assertEqual(response.context["avatar"], {})
+        with self.assertNumQueries(0):
+            self.assertEqual(Profile.get_cached_avatar(self.user.id), {})
+
+        profile = Profile.objects.get(user=self.user)
+        profile.avatar = "user_profile/john.png"
+        profile.save()
+        self.assertEqual(
+            Profile.get_cached_avatar(self.user.id),
+            {
+                "source": "user_profile/john.png",
+                "original": "/media/user_profile/john.png",
+            },
+        )
+
+
 class IndexTestCase(TestCase):
     """This class serves for testing the 'index' view."""
 
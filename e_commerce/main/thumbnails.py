@@ -0,0 +1,212 @@
+import hashlib
+import io
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+THUMBNAIL_QUALITY = 85
+
+
+class ThumbnailSize(NamedTuple):
+    """This class describes a generated size of images.
+
+    width - a max width in pixels or None to keep proportions by a height
+    height - a max height in pixels or None to keep proportions by a width
+    crop - whether an image is cropped by a center to exact width and height
+    """
+
+    width: Optional[int]
+    height: Optional[int]
+    crop: bool = False
+
+
+# an image field and generated sizes of models with thumbnails
+THUMBNAIL_FIELDS = {
+    "main.Goods": (
+        "image",
+        {"catalog": ThumbnailSize(None, 148), "detail": ThumbnailSize(None, 400)},
+    ),
+    "main.Profile": (
+        "avatar",
+        {
+            "avatar": ThumbnailSize(40, 40, crop=True),
+            "profile": ThumbnailSize(200, 200, crop=True),
+        },
+    ),
+}
+# a key of a thumbnail URL: an image format
+THUMBNAIL_FORMATS = {"url": "JPEG", "webp": "WEBP"}
+EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+
+
+def resize(image: Image.Image, size: ThumbnailSize) -> Image.Image:
+    """This function scales an image down to a size keeping proportions or
+    crops it by a center if a size has to be exact.
+    """
+    if size.crop:
+        return ImageOps.fit(image, (size.width, size.height), Image.LANCZOS)
+    width, height = image.size
+    scale = min(
+        (size.width or width) / width,
+        (size.height or height) / height,
+        1,
+    )
+    target = (max(round(width * scale), 1), max(round(height * scale), 1))
+    return image.resize(target, Image.LANCZOS)
+
+
+def encode(image: Image.Image, image_format: str) -> bytes:
+    """This function saves an image in a format. Transparent images are put
+    on a white background for formats without an alpha channel.
+    """
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    output = io.BytesIO()
+    image.save(output, image_format, quality=THUMBNAIL_QUALITY)
+    return output.getvalue()
+
+
+def thumbnail_name(source: str, size: str, image_format: str) -> str:
+    """This function returns a storage name of a size of a source image."""
+    digest = hashlib.sha1(source.encode()).hexdigest()
+    return (
+        f"{settings.THUMBNAIL_PREFIX}{digest[:2]}/{digest}/"
+        f"{size}.{EXTENSIONS[image_format]}"
+    )
+
+
+def make_thumbnails(field_file: Any, sizes: Dict[str, ThumbnailSize]) -> Dict[str, Any]:
+    """This function decodes an uploaded image once and saves all its sizes
+    in JPEG and WebP formats.
+
+    :param field_file: an uploaded image of a model field
+    :type field_file: class 'django.db.models.fields.files.FieldFile'
+    :param sizes: generated sizes by names
+    :type sizes: Dict[str, ThumbnailSize]
+    :return: a name and a URL of a source image and URLs and dimensions of
+    every size
+    :rtype: dict
+    """
+    field_file.open("rb")
+    try:
+        image = ImageOps.exif_transpose(Image.open(field_file))
+        image.load()
+    finally:
+        field_file.close()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    thumbnails: Dict[str, Any] = {
+        "source": field_file.name,
+        "original": field_file.url,
+    }
+    for size_name, size in sizes.items():
+        resized = resize(image, size)
+        thumbnail = {"width": resized.width, "height": resized.height}
+        for key, image_format in THUMBNAIL_FORMATS.items():
+            name = thumbnail_name(field_file.name, size_name, image_format)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            name = default_storage.save(
+                name, ContentFile(encode(resized, image_format))
+            )
+            thumbnail[key] = default_storage.url(name)
+        thumbnails[size_name] = thumbnail
+    return thumbnails
+
+
+def pending_thumbnails(field_file: Any) -> Dict[str, Any]:
+    """This function returns thumbnails of a just uploaded image which are
+    not generated yet. Templates show an original image until then.
+    """
+    if not field_file:
+        return {}
+    return {"source": field_file.name, "original": field_file.url}
+
+
+def is_changed(instance: Any, model_label: str) -> bool:
+    """This function checks if stored thumbnails of an object were made from
+    another image, i.e. an image was uploaded or removed.
+    """
+    field, _ = THUMBNAIL_FIELDS[model_label]
+    image = getattr(instance, field)
+    return (instance.thumbnails or {}).get("source") != (image.name or None)
+
+
+def is_outdated(instance: Any, model_label: str) -> bool:
+    """This function checks if stored thumbnails of an object were made from
+    another image or miss any size.
+    """
+    field, sizes = THUMBNAIL_FIELDS[model_label]
+    image = getattr(instance, field)
+    thumbnails = instance.thumbnails or {}
+    if not image:
+        return bool(thumbnails)
+    return thumbnails.get("source") != image.name or not all(
+        size in thumbnails for size in sizes
+    )
+
+
+def update_thumbnails(model_label: str, pk: int, force: bool = False) -> bool:
+    """This function generates thumbnails of an object and stores their URLs.
+    They are stored only if an image wasn't changed while they were made.
+
+    :param model_label: a label of a model from 'THUMBNAIL_FIELDS'
+    :type model_label: str
+    :param pk: a primary key of an object
+    :type pk: int
+    :param force: whether thumbnails are made again even if they are valid
+    :type force: bool
+    :return: whether thumbnails were made
+    :rtype: bool
+    """
+    field, sizes = THUMBNAIL_FIELDS[model_label]
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not getattr(instance, field):
+        return False
+    if not force and not is_outdated(instance, model_label):
+        return False
+    image = getattr(instance, field)
+    instance.thumbnails = make_thumbnails(image, sizes)
+    return store_thumbnails(instance, model_label)
+
+
+def store_thumbnails(instance: Any, model_label: str) -> bool:
+    """This function saves thumbnails of an object unless its image was
+    changed since they were made. It doesn't send model signals.
+
+    :return: whether thumbnails were saved
+    :rtype: bool
+    """
+    field, _ = THUMBNAIL_FIELDS[model_label]
+    model = apps.get_model(model_label)
+    queryset = model.objects.filter(
+        pk=instance.pk, **{field: getattr(instance, field).name}
+    )
+    if model_label == "main.Goods":
+        return bool(queryset.update_versioned(thumbnails=instance.thumbnails))
+    updated = queryset.update(thumbnails=instance.thumbnails)
+    if updated:
+        cache.delete(model.avatar_cache_key(instance.user_id))
+    return bool(updated)
+
+
+def update_thumbnails_chunk(
+    model_label: str, pks: Iterable[int], force: bool = False
+) -> int:
+    """This function makes thumbnails of a chunk of objects in a worker
+    process of the backfill.
+
+    :return: number of objects with new thumbnails
+    :rtype: int
+    """
+    return sum(update_thumbnails(model_label, pk, force) for pk in pks)
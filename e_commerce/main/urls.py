@@ -32,6 +32,7 @@ urlpatterns = [
     ),
     path("accounts/", include("allauth.urls")),
     path("search/", views.SearchView.as_view(), name="search"),
+    path("metrics/", views.metrics, name="metrics"),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,88 @@
+import secrets
+from typing import Optional
+
+from django_redis import get_redis_connection
+
+VERIFICATION_CODE_TIMEOUT = 60 * 10
+VERIFICATION_RESEND_COOLDOWN = 60
+VERIFICATION_MAX_ATTEMPTS = 5
+
+
+def verification_key(profile_id: int, part: str) -> str:
+    """This function returns a Redis key of a verification state of a profile.
+
+    :param profile_id: id of a profile in DB
+    :type profile_id: int
+    :param part: 'code', 'cooldown' or 'attempts'
+    :type part: str
+    """
+    return f"main:verification:{part}:{profile_id}"
+
+
+def request_code(
+    profile_id: int,
+    timeout: int = VERIFICATION_CODE_TIMEOUT,
+    cooldown: int = VERIFICATION_RESEND_COOLDOWN,
+) -> bool:
+    """This function makes a profile's verification code if it doesn't have
+    an active one. A profile has at most one active code, a repeated request
+    keeps the code and prolongs it. SMS may be sent at most once in
+    'cooldown' seconds.
+
+    :param profile_id: id of a profile in DB
+    :type profile_id: int
+    :param timeout: number of seconds a code is active for
+    :type timeout: int
+    :param cooldown: number of seconds before a code can be sent again
+    :type cooldown: int
+    :return: whether a code should be sent now
+    :rtype: bool
+    """
+    redis = get_redis_connection("default")
+    if not redis.set(verification_key(profile_id, "cooldown"), 1, nx=True, ex=cooldown):
+        return False
+    code_key = verification_key(profile_id, "code")
+    pipe = redis.pipeline()
+    pipe.set(code_key, 1000 + secrets.randbelow(9000), nx=True, ex=timeout)
+    pipe.expire(code_key, timeout)
+    pipe.execute()
+    return True
+
+
+def get_active_code(profile_id: int) -> Optional[int]:
+    """This function returns an active verification code of a profile or
+    None if it has expired.
+    """
+    code = get_redis_connection("default").get(verification_key(profile_id, "code"))
+    return int(code) if code is not None else None
+
+
+def check_code(
+    profile_id: int, code: int, max_attempts: int = VERIFICATION_MAX_ATTEMPTS
+) -> bool:
+    """This function compares a code entered by a user with an active one.
+    A right code is used up. An active code is dropped after 'max_attempts'
+    wrong codes, so a new one has to be requested.
+
+    :param profile_id: id of a profile in DB
+    :type profile_id: int
+    :param code: a code entered by a user
+    :type code: int
+    :param max_attempts: number of attempts to enter an active code
+    :type max_attempts: int
+    :rtype: bool
+    """
+    redis = get_redis_connection("default")
+    code_key = verification_key(profile_id, "code")
+    attempts_key = verification_key(profile_id, "attempts")
+    pipe = redis.pipeline()
+    pipe.get(code_key)
+    pipe.incr(attempts_key)
+    pipe.expire(attempts_key, VERIFICATION_CODE_TIMEOUT)
+    active, attempts, _ = pipe.execute()
+    if active is not None and attempts <= max_attempts and int(active) == code:
+        redis.delete(code_key, attempts_key, verification_key(profile_id, "cooldown"))
+        return True
+    if attempts >= max_attempts:
+        redis.delete(code_key, attempts_key)
+    return False
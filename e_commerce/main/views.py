@@ -1,98 +1,145 @@
 from datetime import datetime
 from typing import Any, Dict, Union
 
+from chat.throttling import get_rejected_frames
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.mixins import (LoginRequiredMixin,
                                         PermissionRequiredMixin)
 from django.contrib.auth.models import User
-from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.search import SearchQuery, SearchRank
 from django.core.cache import cache
-from django.db.models import QuerySet
+from django.db.models import F, FloatField, QuerySet
+from django.db.models.functions import Cast
 from django.forms import BaseModelForm
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect
 from django.http.request import HttpRequest
 from django.http.response import HttpResponse
-from django.shortcuts import get_object_or_404, render
+from django.shortcuts import render
 from django.urls import reverse_lazy
 from django.views.generic import DetailView, FormView, ListView, TemplateView
 from django.views.generic.edit import CreateView, UpdateView
 
+from .caching import (CATALOG_PAGE_TIMEOUT, catalog_page_cache_key,
+                      get_catalog_version, get_popular_tags)
+from .counters import record_view
 from .forms import (GoodsCreateUpdateForm, PhoneConfirmForm, ProfileFormSet,
                     SearchForm, UserForm)
-from .models import Goods, Profile, Seller, Tag
+from .metrics import get_metrics, render_prometheus
+from .models import Goods, GoodsShort, Seller
+from .pagination import InvalidCursor, KeysetPaginator
 from .tasks import create_new_tags_task, send_sms_verification_code
+from .verification import request_code
 
 
 class GoodsList(ListView):
-    """This class provides a list-based view for a 'Goods' model.
+    """This class provides a list-based view for a 'Goods' model. Goods are
+    read from the 'GoodsShort' view which has only published goods and
+    columns of catalog cards.
 
-    model - model of a view
+    queryset - goods of the catalog view without search documents, they are
+    only filtered by
+    template_name - a template that will be used for a page rendering
     paginate_by - number of objects displayed on one page
     context_object_name - a name by which objects can be available
     in a template
+    keyset_ordering - a unique ordering used for the cursor-based pagination
     """
 
-    model = Goods
+    queryset = GoodsShort.objects.defer("search_vector")
+    template_name = "main/goods_list.html"
     paginate_by = 9
     context_object_name = "goods_list"
+    keyset_ordering = ("name", "id")
+
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        """This overridden method returns a rendered catalog page from a cache
+        for anonymous users. A cache key contains a catalog version, so any
+        change of goods makes cached pages outdated. Pages with unknown query
+        parameters aren't cached.
+
+        :param request: user's request object
+        :type request: class 'django.http.request.HttpRequest'
+        """
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = catalog_page_cache_key(request.GET, get_catalog_version())
+        if key is None:
+            return super().get(request, *args, **kwargs)
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs)
+        response.render()
+        if response.status_code == 200:
+            cache.set(key, response.content, CATALOG_PAGE_TIMEOUT)
+        return response
 
     def get_context_data(self, **kwargs) -> Dict[str, Any]:
         """This overridden method provides additional context data like
-        a user's avatar and available tags to a response.
+        cached popular tags to a response.
         """
         context = super().get_context_data(**kwargs)
-        context["tag_list"] = Tag.objects.all()
+        context["tag_list"] = get_popular_tags()
         context["tag"] = self.request.GET.get("tag")
-        if self.request.user.is_authenticated:
-            context["avatar"] = Profile.objects.get(user=self.request.user).avatar
-        else:
-            context["avatar"] = None
         return context
 
     def get_queryset(self) -> QuerySet[Any]:
-        """This overridden method provides a queryset filtered by tag
-        if a request contains a 'tag' parameter. It also supports 'search' parameter.
+        """This overridden method provides a queryset filtered by tags
+        if a request contains 'tag' parameters. Goods must have all given tags
+        or any of them if a request contains 'match=any'. It also supports
+        'search' parameter, search results are ordered by relevance using
+        the stored search document.
         """
         queryset = super().get_queryset()
-        if self.request.GET.get("tag"):
-            self.tag = get_object_or_404(Tag, name=self.request.GET.get("tag"))
-            return queryset.filter(tags__contains=[self.tag])
+        tags = [tag for tag in self.request.GET.getlist("tag") if tag]
+        if tags:
+            if self.request.GET.get("match") == "any":
+                return queryset.filter(tags__overlap=tags)
+            return queryset.filter(tags__contains=tags)
         elif self.request.GET.get("search"):
-            return self.model.objects.annotate(
-                search=SearchVector("name", "description"),
-            ).filter(search=self.request.GET.get("search"))
+            query = SearchQuery(self.request.GET.get("search"))
+            self.keyset_ordering = ("-rank", "id")
+            # double precision keeps a rank exact when it goes through a cursor
+            return queryset.annotate(
+                rank=Cast(SearchRank(F("search_vector"), query), FloatField()),
+            ).filter(search_vector=query)
         else:
             return queryset
 
+    def paginate_queryset(self, queryset: QuerySet[Any], page_size: int):
+        """This overridden method paginates a queryset with a cursor passed in
+        'after' or 'before' parameters instead of a page number, so a deep page
+        doesn't need 'COUNT(*)' and 'OFFSET'.
+        """
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        try:
+            page = paginator.page(
+                after=self.request.GET.get("after"),
+                before=self.request.GET.get("before"),
+            )
+        except InvalidCursor as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
 
 class GoodsDetail(DetailView):
     """This class provides a detailed view of a 'Goods' model.
 
-    queryset - a query dict containing 'Goods' objects
+    queryset - a query dict containing published 'Goods' objects
     context_object_name - a name by which objects can be available
     in a template
     """
 
-    queryset = Goods.objects.all()
+    queryset = Goods.catalog.all()
     context_object_name = "goods"
 
     def get_context_data(self, **kwargs) -> Dict[str, Any]:
         """This overridden method provides additional context data like
-        a user's avatar to a response.
+        a views counter to a response.
         """
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_authenticated:
-            context["avatar"] = Profile.objects.get(user=self.request.user).avatar
-        else:
-            context["avatar"] = None
         if "views_counter" not in context:
-            views_counter_cache_name = f"views_counter_{context['goods'].id}"
-            context["views_counter"] = cache.get(views_counter_cache_name)
-            if not context["views_counter"]:
-                context["views_counter"] = Goods.objects.get(
-                    id=context["goods"].id
-                ).views_counter
-            context["views_counter"] += 1
-            cache.set(views_counter_cache_name, context["views_counter"], 120)
+            context["views_counter"] = record_view(context["goods"])
         return context
 
 
@@ -124,8 +171,8 @@ class GoodsCreate(PermissionRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs) -> Dict[str, Any]:
         """This overridden method provides additional context data like
-        a user's avatar, a form, and information about CSS classes of form's
-        fields to a response.
+        a form and information about CSS classes of form's fields
+        to a response.
         """
         if "form" not in kwargs:
             kwargs["form"] = self.get_form()
@@ -140,10 +187,6 @@ class GoodsCreate(PermissionRequiredMixin, CreateView):
         )
         context["filds_for_custom_select"] = ("tags", "size", "category")
         context["form"] = kwargs.get("form")
-        if self.request.user.is_authenticated:
-            context["avatar"] = Profile.objects.get(user=self.request.user).avatar
-        else:
-            context["avatar"] = None
         return context
 
     def post(
@@ -215,8 +258,8 @@ class GoodsUpdate(PermissionRequiredMixin, UpdateView):
 
     def get_context_data(self, **kwargs) -> Dict[str, Any]:
         """This overridden method provides additional context data like
-        a user's avatar, a form, and information about CSS classes of form's
-        fields to a response.
+        a form and information about CSS classes of form's fields
+        to a response.
         """
         if "form" not in kwargs:
             kwargs["form"] = self.get_form()
@@ -231,10 +274,6 @@ class GoodsUpdate(PermissionRequiredMixin, UpdateView):
         )
         context["filds_for_custom_select"] = ("tags", "size", "category")
         context["form"] = kwargs.get("form")
-        if self.request.user.is_authenticated:
-            context["avatar"] = Profile.objects.get(user=self.request.user).avatar
-        else:
-            context["avatar"] = None
         return context
 
     def post(
@@ -303,7 +342,7 @@ class ProfileUpdate(LoginRequiredMixin, UpdateView):
 
     def get_context_data(self, **kwargs) -> Dict[str, Any]:
         """This overridden method provides additional context data like
-        a user's avatar and forms to a response.
+        forms to a response.
         """
         context = super().get_context_data(**kwargs)
         if "user_form" not in kwargs:
@@ -312,7 +351,6 @@ class ProfileUpdate(LoginRequiredMixin, UpdateView):
             kwargs["profile_form_set"] = ProfileFormSet(instance=self.object)
         context["user_form"] = kwargs.get("user_form")
         context["profile_form_set"] = kwargs.get("profile_form_set")
-        context["avatar"] = Profile.objects.get(user=self.object).avatar
         return context
 
     def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
@@ -413,16 +451,19 @@ class PhoneConfirmation(LoginRequiredMixin, FormView):
     ) -> Union[HttpResponseRedirect, HttpResponse]:
         """This overridden method checks if a user's phone number was
         confirmed and sends a confirmation code if it's not. Otherwise,
-        it redirects to a 'phone confirmed' page.
+        it redirects to a 'phone confirmed' page. A code isn't sent again
+        until a resend cooldown is over, so reloading a page doesn't send
+        more SMS.
 
         :param request: user's request object
         :type request: class 'django.http.request.HttpRequest'
         """
-        if request.user.profile.is_phone_confirmed:
+        profile = request.user.profile
+        if profile.is_phone_confirmed:
             return HttpResponseRedirect(self.get_success_url())
-        else:
-            send_sms_verification_code.delay(request.user.profile.id)
-            return self.render_to_response(self.get_context_data())
+        if request_code(profile.id):
+            send_sms_verification_code.delay(profile.id)
+        return self.render_to_response(self.get_context_data())
 
 
 class PhoneConfirmed(LoginRequiredMixin, TemplateView):
@@ -438,10 +479,6 @@ def index(request: HttpRequest) -> HttpResponse:
     """This function returns a rendered template of the site's main page."""
     turn_on_block = True
     text_for_filter = "Братухе подари на днюху черный орфографический словарь"
-    if request.user.is_authenticated:
-        avatar = Profile.objects.get(user=request.user).avatar
-    else:
-        avatar = None
     return render(
         request,
         "main/index.html",
@@ -449,11 +486,22 @@ def index(request: HttpRequest) -> HttpResponse:
             "turn_on_block": turn_on_block,
             "user": request.user,
             "text_for_filter": text_for_filter,
-            "avatar": avatar,
         },
     )
 
 
+@staff_member_required
+def metrics(request: HttpRequest) -> HttpResponse:
+    """This function returns aggregated metrics of views and numbers of
+    rejected chat frames in the Prometheus text format. It is available only
+    for staff users.
+    """
+    return HttpResponse(
+        render_prometheus(get_metrics(), get_rejected_frames()),
+        content_type="text/plain; version=0.0.4",
+    )
+
+
 class SearchView(FormView):
     """This class provides a view for a search form.
 